@@ -0,0 +1,117 @@
+"""
+Benchmarks of the nearest-dealer search against a linear scan.
+
+100k synthetic dealers spread over the continental US; both searches
+must return the same dealers.
+"""
+
+import heapq
+import random
+
+import pytest
+
+DEALERS = 100_000
+QUERIES = 100
+LIMIT = 10
+RADIUS_KM = 50
+
+
+@pytest.fixture(scope="module")
+def coordinates(django_db):
+    rng = random.Random(22)
+    return [
+        (rng.uniform(25.0, 49.0), rng.uniform(-124.0, -67.0))
+        for _ in range(DEALERS)
+    ]
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = random.Random(7)
+    return [
+        (rng.uniform(25.0, 49.0), rng.uniform(-124.0, -67.0))
+        for _ in range(QUERIES)
+    ]
+
+
+@pytest.fixture(scope="module")
+def tree(coordinates):
+    from djangoapp.geo import KDTree, to_unit_vector
+
+    return KDTree([to_unit_vector(lat, long) for lat, long in coordinates])
+
+
+def linear_nearest(coordinates, lat, long, limit):
+    from djangoapp.geo import haversine_km
+
+    return heapq.nsmallest(
+        limit,
+        range(len(coordinates)),
+        key=lambda i: haversine_km(lat, long, *coordinates[i]),
+    )
+
+
+def linear_within(coordinates, lat, long, radius_km):
+    from djangoapp.geo import haversine_km
+
+    return sorted(
+        (haversine_km(lat, long, *point), i)
+        for i, point in enumerate(coordinates)
+        if haversine_km(lat, long, *point) <= radius_km
+    )
+
+
+def test_kdtree_matches_linear_scan(coordinates, queries, tree):
+    from djangoapp.geo import km_to_chord, to_unit_vector
+
+    for lat, long in queries[:10]:
+        target = to_unit_vector(lat, long)
+        found = [index for _, index in tree.nearest(target, LIMIT)]
+        assert found == linear_nearest(coordinates, lat, long, LIMIT)
+        within = [
+            index for _, index in tree.within(target, km_to_chord(RADIUS_KM))
+        ]
+        assert within == [
+            index
+            for _, index in linear_within(coordinates, lat, long, RADIUS_KM)
+        ]
+
+
+def test_kdtree_build(benchmark, coordinates):
+    from djangoapp.geo import KDTree, to_unit_vector
+
+    points = [to_unit_vector(lat, long) for lat, long in coordinates]
+    benchmark.pedantic(KDTree, args=(points,), rounds=3)
+
+
+def test_kdtree_nearest(benchmark, queries, tree):
+    from djangoapp.geo import to_unit_vector
+
+    targets = [to_unit_vector(lat, long) for lat, long in queries]
+
+    def run():
+        return [tree.nearest(target, LIMIT) for target in targets]
+
+    benchmark(run)
+
+
+def test_kdtree_within(benchmark, queries, tree):
+    from djangoapp.geo import km_to_chord, to_unit_vector
+
+    targets = [to_unit_vector(lat, long) for lat, long in queries]
+    radius = km_to_chord(RADIUS_KM)
+
+    def run():
+        return [tree.within(target, radius) for target in targets]
+
+    benchmark(run)
+
+
+def test_linear_scan_nearest(benchmark, coordinates, queries):
+    def run():
+        return [
+            linear_nearest(coordinates, lat, long, LIMIT)
+            for lat, long in queries[:5]
+        ]
+
+    benchmark.pedantic(run, rounds=3)
@@ -0,0 +1,50 @@
+"""
+Micro-benchmarks for VADER scoring in djangoapp/microservices/app.py.
+"""
+
+
+def test_polarity_scores_single(benchmark, sentiment_app, review_texts):
+    text = review_texts[0]
+    benchmark(sentiment_app.sia.polarity_scores, text)
+
+
+def test_label_corpus(benchmark, sentiment_app, review_texts):
+    def label_all():
+        return [
+            sentiment_app.label_scores(sentiment_app.sia.polarity_scores(t))
+            for t in review_texts
+        ]
+
+    labels = benchmark(label_all)
+    assert len(labels) == len(review_texts)
+
+
+def test_analyze_batch_route(benchmark, sentiment_app, review_texts):
+    client = sentiment_app.app.test_client()
+    texts = review_texts[:100]
+
+    response = benchmark(client.post, "/analyze_batch", json={"texts": texts})
+    assert response.status_code == 200
+
+
+def test_batch_scorer_matches_polarity_scores(sentiment_app, review_texts):
+    # golden corpus: every seed review, plus its upper-case, negated,
+    # contrasted and punctuated variants
+    corpus = []
+    for text in review_texts:
+        corpus += [
+            text,
+            text.upper(),
+            "Not " + text,
+            text + " but the service was VERY slow!!",
+            "It was never so " + text.lower() + "??",
+        ]
+    expected = [sentiment_app.sia.polarity_scores(t) for t in corpus]
+    assert sentiment_app.scorer.polarity_scores(corpus) == expected
+
+
+def test_batch_scorer_corpus(benchmark, sentiment_app, review_texts):
+    texts = review_texts * 20
+
+    scores = benchmark(sentiment_app.scorer.polarity_scores, texts)
+    assert len(scores) == len(texts)
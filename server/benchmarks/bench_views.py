@@ -0,0 +1,136 @@
+"""
+Micro-benchmarks for the JSON shaping done in djangoapp/views.py.
+
+Upstream calls are replaced by prebuilt payloads, so the numbers cover
+only the view logic and the JSON serialization.
+"""
+
+import json
+from unittest import mock
+
+import pytest
+
+from .stubs import make_dealer, make_review
+
+REVIEWS = 200
+STREAMED_REVIEWS = 20000
+
+
+@pytest.fixture
+def rf(django_db):
+    from django.test import RequestFactory
+
+    return RequestFactory()
+
+
+def dealer_index(count):
+    from djangoapp.dealers import DealerIndex
+
+    index = DealerIndex(lambda fresh=False: None)
+    index.apply([make_dealer(i) for i in range(1, count + 1)])
+    return index
+
+
+def test_get_dealer_reviews_shaping(benchmark, rf):
+    from djangoapp import restapis, views
+
+    reviews = [make_review(i, 1, 12) for i in range(REVIEWS)]
+
+    def fake_get_request(endpoint, **kwargs):
+        return [dict(review) for review in reviews]
+
+    def fake_sentiments(texts, deadline=None):
+        return [{"sentiment": "positive"} for _ in texts]
+
+    request = rf.get("/djangoapp/reviews/dealer/1")
+    with mock.patch.object(restapis, "get_request", fake_get_request), \
+            mock.patch.object(views, "dealer_index", dealer_index(50)), \
+            mock.patch.object(
+                views, "analyze_review_sentiments_batch", fake_sentiments), \
+            mock.patch.object(views, "enqueue"):
+        response = benchmark(views.get_dealer_reviews, request, 1)
+    assert response.status_code == 200
+
+
+def test_get_dealer_reviews_stored_sentiments(benchmark, rf):
+    from djangoapp import restapis, views
+
+    reviews = [
+        dict(make_review(i, 1, 12), sentiment="positive")
+        for i in range(REVIEWS)
+    ]
+
+    def fake_get_request(endpoint, **kwargs):
+        return [dict(review) for review in reviews]
+
+    request = rf.get("/djangoapp/reviews/dealer/1")
+    with mock.patch.object(restapis, "get_request", fake_get_request), \
+            mock.patch.object(views, "dealer_index", dealer_index(50)), \
+            mock.patch.object(
+                views, "analyze_review_sentiments_batch",
+                wraps=views.analyze_review_sentiments_batch) as analyze:
+        response = benchmark(views.get_dealer_reviews, request, 1)
+    assert response.status_code == 200
+    # stored labels are served as they are, nothing is sent to the analyzer
+    assert all(call.args == ([],) for call in analyze.call_args_list)
+
+
+def test_get_dealer_reviews_streamed(benchmark, rf):
+    from djangoapp import restapis, views
+
+    reviews = [
+        dict(make_review(i, 1, 12), sentiment="positive")
+        for i in range(STREAMED_REVIEWS)
+    ]
+
+    def fake_get_request(endpoint, limit, after=-1):
+        # pages ordered by id, as the backend serves them
+        return [dict(review) for review in reviews[after + 1:][:limit]]
+
+    def run():
+        response = views.get_dealer_reviews(request, 1)
+        return b"".join(response.streaming_content)
+
+    request = rf.get("/djangoapp/reviews/dealer/1")
+    with mock.patch.object(restapis, "get_request", fake_get_request), \
+            mock.patch.object(views, "dealer_index", dealer_index(50)):
+        body = benchmark(run)
+    assert len(json.loads(body)["reviews"]) == STREAMED_REVIEWS
+
+
+def test_get_dealerships_serialization(benchmark, rf):
+    from djangoapp import views
+
+    request = rf.get("/djangoapp/get_dealers")
+    with mock.patch.object(views, "dealer_index", dealer_index(50)):
+        response = benchmark(views.get_dealerships, request)
+    assert response.status_code == 200
+
+
+def test_dealer_index_lookup(benchmark):
+    index = dealer_index(50)
+
+    def lookup():
+        return index.get(25), index.in_state("Texas")
+
+    dealer, in_state = benchmark(lookup)
+    assert dealer.id == 25
+    assert all(d.state == "Texas" for d in in_state)
+
+
+def test_get_cars_cached_payload(benchmark, rf):
+    from djangoapp import views
+
+    request = rf.get("/djangoapp/get_cars")
+    response = benchmark(views.get_cars, request)
+    assert response.status_code == 200
+
+
+def test_get_cars_filtered_page(benchmark, rf):
+    from djangoapp import views
+
+    request = rf.get(
+        "/djangoapp/get_cars", {"type": "suv", "limit": 10, "fields": "id"}
+    )
+    response = benchmark(views.get_cars, request)
+    assert response.status_code == 200
@@ -0,0 +1,63 @@
+"""
+Fixtures for the pytest-benchmark micro-benchmarks.
+
+Run them explicitly from the server directory, for example:
+    python -m pytest benchmarks/bench_views.py benchmarks/bench_sentiment.py
+    python -m pytest benchmarks/bench_geo.py
+"""
+
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+REVIEWS_FILE = SERVER_DIR / "database" / "data" / "reviews.json"
+MICROSERVICE_DIR = SERVER_DIR / "djangoapp" / "microservices"
+
+
+@pytest.fixture(scope="session")
+def django_db():
+    """Set up Django against a migrated, seeded test database."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "djangoproj.settings")
+    import django
+
+    django.setup()
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+    from djangoapp.populate import initiate
+
+    initiate()
+    yield connection
+    connection.creation.destroy_test_db(
+        connection.settings_dict["NAME"], verbosity=0
+    )
+
+
+@pytest.fixture(scope="session")
+def review_texts():
+    """Review texts of the backend seed data."""
+    with open(REVIEWS_FILE, encoding="utf-8") as fileobj:
+        return [review["review"] for review in json.load(fileobj)["reviews"]]
+
+
+@pytest.fixture(scope="session")
+def sentiment_app():
+    """Import the sentiment analyzer Flask module from its directory."""
+    pytest.importorskip("flask")
+    nltk = pytest.importorskip("nltk")
+    # fall back to the lexicon bundled in microservices/sentiment/
+    nltk.data.path.append(str(MICROSERVICE_DIR))
+    # app.py imports its sibling modules, as when run from its directory
+    if str(MICROSERVICE_DIR) not in sys.path:
+        sys.path.insert(0, str(MICROSERVICE_DIR))
+    spec = importlib.util.spec_from_file_location(
+        "sentiment_app", MICROSERVICE_DIR / "app.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,169 @@
+"""
+Concurrent login benchmark for the SQLite database profiles.
+
+Runs the login view from several processes and threads against one
+database file, as gunicorn workers do, once per DB_PROFILE, and prints
+logins per second, latency percentiles and "database is locked" errors.
+A cheap password hasher keeps the numbers about database writes (the
+session row and last_login) rather than password hashing.
+
+Usage (from the server directory):
+    python -m benchmarks.dbbench
+    python -m benchmarks.dbbench --processes 3 --threads 4 --seconds 10 \\
+        --profiles default production
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def _setup(profile, path):
+    os.environ["DB_PROFILE"] = profile
+    os.environ["SQLITE_PATH"] = path
+    # every simulated client logs in from the same address
+    os.environ["AUTH_THROTTLE_IP_RATE"] = "1e9"
+    os.environ["AUTH_THROTTLE_USER_RATE"] = "1e9"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "djangoproj.settings")
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.PASSWORD_HASHERS = FAST_HASHERS
+
+
+def _prepare(profile, path, users):
+    _setup(profile, path)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    for n in range(users):
+        User.objects.create_user(username=f"{USERNAME}{n}", password=PASSWORD)
+
+
+def _worker(profile, path, threads, seconds, users, start, results):
+    _setup(profile, path)
+    from django.db import OperationalError, close_old_connections
+    from django.test import Client
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def run(number):
+        client = Client(HTTP_HOST="localhost")
+        body = {"userName": f"{USERNAME}{number % users}",
+                "password": PASSWORD}
+        start.wait()
+        ends = time.monotonic() + seconds
+        while time.monotonic() < ends:
+            started = time.perf_counter()
+            try:
+                response = client.post(
+                    "/djangoapp/login", body, content_type="application/json"
+                )
+                failed = response.status_code != 200
+            except OperationalError:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors.append(failed)
+        close_old_connections()
+
+    pool = [
+        threading.Thread(target=run, args=(os.getpid() * threads + n,))
+        for n in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((latencies, sum(errors)))
+
+
+def run_profile(profile, processes, threads, seconds):
+    """
+    Benchmark logins under one DB_PROFILE on a fresh database file.
+
+    Returns:
+        dict: Logins per second, p50/p95/p99 latency in ms and errors.
+    """
+    context = multiprocessing.get_context("spawn")
+    path = os.path.join(
+        tempfile.mkdtemp(prefix="djangoapp-dbbench-"), "db.sqlite3"
+    )
+    users = processes * threads
+    prepare = context.Process(
+        target=_prepare, args=(profile, path, users)
+    )
+    prepare.start()
+    prepare.join()
+
+    start = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_worker,
+            args=(profile, path, threads, seconds, users, start, results),
+        )
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    # let every process finish importing django before the clock starts
+    time.sleep(3)
+    start.set()
+    latencies = []
+    errors = 0
+    for _ in workers:
+        worker_latencies, worker_errors = results.get()
+        latencies += worker_latencies
+        errors += worker_errors
+    for worker in workers:
+        worker.join()
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "rps": len(latencies) / seconds,
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--processes", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--profiles", nargs="+",
+                        choices=["default", "production"],
+                        default=["default", "production"])
+    args = parser.parse_args(argv)
+
+    print(f"processes={args.processes} threads={args.threads} "
+          f"seconds={args.seconds}")
+    print(f"{'profile':<14}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'errors':>8}")
+    for profile in args.profiles:
+        result = run_profile(
+            profile, args.processes, args.threads, args.seconds
+        )
+        print(f"{profile:<14}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+              f"{result['p95']:>10.1f}{result['p99']:>10.1f}"
+              f"{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
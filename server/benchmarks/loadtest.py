@@ -0,0 +1,227 @@
+"""
+Load test for the Django views against local upstream stand-ins.
+
+Boots the Django app on a local WSGI server with a throwaway database,
+points it at the stub backend and sentiment services, drives each
+scenario at a fixed concurrency and prints p50/p95/p99 latency and
+throughput.
+
+Usage (from the server directory):
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --concurrency 16 --requests 500 \\
+        --backend-latency 0.05 --reviews 200 --scenarios get_dealer_reviews
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+
+from .stubs import BackendHandler, SentimentHandler, StubConfig, start_stub
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+SCENARIOS = (
+    "get_dealerships",
+    "get_dealer_reviews",
+    "get_cars",
+    "add_review",
+    "login_user",
+)
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def boot_django():
+    """Set up Django with a fresh migrated database and a test user."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "djangoproj.settings")
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.ALLOWED_HOSTS = ["*"]
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+
+    # a throwaway file, so concurrent writers behave as in production
+    directory = tempfile.mkdtemp(prefix="djangoapp-bench-")
+    connection.settings_dict["TEST"]["NAME"] = os.path.join(
+        directory, "bench.sqlite3"
+    )
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+
+    from djangoapp.populate import initiate
+
+    initiate()
+    User.objects.create_user(username=USERNAME, password=PASSWORD)
+
+
+def start_app():
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server(
+        "127.0.0.1",
+        0,
+        get_wsgi_application(),
+        server_class=_ThreadingWSGIServer,
+        handler_class=_QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_request(scenario, base_url, dealers):
+    """Return a callable issuing one request of a scenario."""
+    api = base_url + "/djangoapp"
+    local = threading.local()
+    counter = iter(range(10 ** 9))
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            if scenario == "add_review":
+                local.session.post(
+                    api + "/login",
+                    json={"userName": USERNAME, "password": PASSWORD},
+                )
+        return local.session
+
+    def run():
+        n = next(counter)
+        if scenario == "get_dealerships":
+            return session().get(api + "/get_dealers")
+        if scenario == "get_dealer_reviews":
+            return session().get(f"{api}/reviews/dealer/{n % dealers + 1}")
+        if scenario == "get_cars":
+            return session().get(api + "/get_cars")
+        if scenario == "add_review":
+            return session().post(api + "/add_review", json={
+                "name": USERNAME,
+                "dealership": n % dealers + 1,
+                "review": f"Benchmark review {n}",
+                "purchase": True,
+                "purchase_date": "2024-01-01",
+                "car_make": "Audi",
+                "car_model": "A6",
+                "car_year": 2020,
+            })
+        return session().post(
+            api + "/login", json={"userName": USERNAME, "password": PASSWORD}
+        )
+
+    return run
+
+
+def run_scenario(call, total, executor):
+    """
+    Issue `total` calls through the executor's worker threads.
+
+    Returns:
+        dict: Latency percentiles in ms, throughput and error count.
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed():
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            response = call()
+            failed = response.status_code >= 400
+        except requests.exceptions.RequestException:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    started = time.perf_counter()
+    futures = [executor.submit(timed) for _ in range(total)]
+    for future in futures:
+        future.result()
+    wall = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "rps": total / wall,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--backend-latency", type=float, default=0.02)
+    parser.add_argument("--sentiment-latency", type=float, default=0.01)
+    parser.add_argument("--dealers", type=int, default=50)
+    parser.add_argument("--reviews", type=int, default=50,
+                        help="Reviews per dealer.")
+    parser.add_argument("--review-words", type=int, default=12)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    args = parser.parse_args(argv)
+
+    backend_config = StubConfig(
+        latency=args.backend_latency,
+        dealers=args.dealers,
+        reviews_per_dealer=args.reviews,
+        review_words=args.review_words,
+    )
+    sentiment_config = StubConfig(latency=args.sentiment_latency)
+    _, backend_url = start_stub(BackendHandler, backend_config)
+    _, sentiment_url = start_stub(SentimentHandler, sentiment_config)
+    # restapis reads these when it is first imported
+    os.environ["backend_url"] = backend_url
+    os.environ["sentiment_analyzer_url"] = sentiment_url + "/"
+    # every request thread of the in-process server shares the pools
+    os.environ.setdefault(
+        "UPSTREAM_POOL_SIZE", str(args.concurrency * 4)
+    )
+    # every simulated client logs in from the same address
+    os.environ.setdefault("AUTH_THROTTLE_IP_RATE", "1e9")
+    os.environ.setdefault("AUTH_THROTTLE_USER_RATE", "1e9")
+
+    boot_django()
+    base_url = start_app()
+
+    print(f"concurrency={args.concurrency} requests={args.requests} "
+          f"backend_latency={args.backend_latency}s "
+          f"sentiment_latency={args.sentiment_latency}s "
+          f"reviews_per_dealer={args.reviews}")
+    print(f"{'scenario':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'req/s':>10}{'errors':>8}")
+    for scenario in args.scenarios:
+        call = make_request(scenario, base_url, args.dealers)
+        # the warm-up also opens (and logs in) each thread's session
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            run_scenario(call, args.warmup, executor)
+            result = run_scenario(call, args.requests, executor)
+        print(f"{scenario:<20}{result['p50']:>10.1f}{result['p95']:>10.1f}"
+              f"{result['p99']:>10.1f}{result['rps']:>10.1f}"
+              f"{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Local stand-ins for the Node.js backend and the sentiment analyzer.
+
+Both stubs serve the same routes as the real services from generated
+data, with a configurable injected latency and payload size, so the
+Django app can be benchmarked without MongoDB or NLTK.
+"""
+
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+@dataclass
+class StubConfig:
+    """
+    Shape of the data served by the stubs.
+
+    Attributes:
+        latency(float): Seconds slept before every response.
+        dealers(int): Number of dealerships served.
+        reviews_per_dealer(int): Reviews returned per dealership.
+        review_words(int): Words per generated review text.
+    """
+
+    latency: float = 0.0
+    dealers: int = 50
+    reviews_per_dealer: int = 50
+    review_words: int = 12
+
+
+STATES = ["Texas", "Kansas", "California", "New York", "Ohio", "Florida"]
+WORDS = [
+    "great", "service", "terrible", "car", "friendly", "slow", "price",
+    "excellent", "dealer", "bad", "staff", "recommend", "never", "again",
+]
+
+
+def make_dealer(dealer_id):
+    return {
+        "id": dealer_id,
+        "city": f"City {dealer_id}",
+        "state": STATES[dealer_id % len(STATES)],
+        "st": "ST",
+        "address": f"{dealer_id} Main Street",
+        "zip": f"{10000 + dealer_id}",
+        "lat": 30.0 + dealer_id % 15,
+        "long": -100.0 - dealer_id % 30,
+        "short_name": f"Dealer{dealer_id}",
+        "full_name": f"Dealer {dealer_id} Car Dealership",
+    }
+
+
+def make_review(review_id, dealer_id, words):
+    text = " ".join(
+        WORDS[(review_id * 7 + i * 3) % len(WORDS)] for i in range(words)
+    )
+    return {
+        "id": review_id,
+        "name": f"Reviewer {review_id}",
+        "dealership": dealer_id,
+        "review": f"{text} #{review_id}",
+        "purchase": review_id % 2 == 0,
+        "purchase_date": "07/11/2020",
+        "car_make": "Audi",
+        "car_model": "A6",
+        "car_year": 2020,
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        time.sleep(self.config.latency)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+
+class BackendHandler(_StubHandler):
+    """Serves the routes of `database/app.js`."""
+
+    def _reviews(self, dealer_id):
+        config = self.config
+        first = dealer_id * config.reviews_per_dealer
+        return [
+            make_review(first + i, dealer_id, config.review_words)
+            for i in range(config.reviews_per_dealer)
+        ]
+
+    def _page(self, reviews, query):
+        # ?limit=&after= pages ordered by id, as the Node.js routes serve
+        params = parse_qs(query)
+        if "limit" not in params:
+            return reviews
+        after = int(params.get("after", ["-1"])[0])
+        limit = int(params["limit"][0])
+        return [review for review in reviews if review["id"] > after][:limit]
+
+    def do_GET(self):
+        config = self.config
+        path, _, query = self.path.partition("?")
+        dealers = [make_dealer(i) for i in range(1, config.dealers + 1)]
+        if path == "/fetchDealers":
+            return self._reply(dealers)
+        match = re.fullmatch(r"/fetchDealers/(.+)", path)
+        if match:
+            state = match.group(1).replace("%20", " ")
+            return self._reply([d for d in dealers if d["state"] == state])
+        match = re.fullmatch(r"/fetchDealer/(\d+)", path)
+        if match:
+            dealer_id = int(match.group(1))
+            return self._reply(
+                [make_dealer(dealer_id)] if dealer_id <= config.dealers
+                else []
+            )
+        if path == "/fetchReviews":
+            return self._reply(self._page([
+                review for dealer in dealers
+                for review in self._reviews(dealer["id"])
+            ], query))
+        match = re.fullmatch(r"/fetchReviews/dealer/(\d+)", path)
+        if match:
+            return self._reply(
+                self._page(self._reviews(int(match.group(1))), query)
+            )
+        self._reply({"error": "Not found"}, status=404)
+
+    def do_POST(self):
+        if self.path == "/insert_review":
+            data = self._read_json()
+            return self._reply({"status": 200, "review": dict(data, id=1)})
+        if self.path == "/insert_reviews":
+            reviews = self._read_json().get("reviews", [])
+            return self._reply({
+                "status": 200,
+                "reviews": [
+                    dict(review, id=i) for i, review in enumerate(reviews, 1)
+                ],
+            })
+        if self.path == "/update_sentiments":
+            ids = [
+                item["id"]
+                for item in self._read_json().get("sentiments", [])
+            ]
+            return self._reply(
+                {"status": 200, "updated": len(ids), "ids": ids}
+            )
+        self._reply({"error": "Not found"}, status=404)
+
+
+def label(text):
+    """Cheap deterministic stand-in for the VADER label."""
+    return ("positive", "neutral", "negative")[len(text) % 3]
+
+
+class SentimentHandler(_StubHandler):
+    """Serves the routes of `djangoapp/microservices/app.py`."""
+
+    def do_GET(self):
+        match = re.fullmatch(r"/analyze/(.*)", self.path)
+        if match:
+            return self._reply({"sentiment": label(match.group(1))})
+        self._reply({"error": "Not found"}, status=404)
+
+    def do_POST(self):
+        if self.path == "/analyze_batch":
+            texts = self._read_json().get("texts", [])
+            return self._reply(
+                {"sentiments": [{"sentiment": label(t)} for t in texts]}
+            )
+        self._reply({"error": "Not found"}, status=404)
+
+
+def start_stub(handler, config, port=0):
+    """
+    Serve a stub handler on 127.0.0.1 from a daemon thread.
+
+    Returns:
+        tuple: (server, base url such as "http://127.0.0.1:8123")
+    """
+    handler_cls = type(handler.__name__, (handler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler_cls)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -15,6 +15,7 @@ const dealerships_data = JSON.parse(fs.readFileSync("./data/dealerships.json", '
 // import mongoose models created separately 
 const Reviews = require('./review');
 const Dealerships = require('./dealership');
+const Counters = require('./counter');
 
 async function initDB(){
 
@@ -27,8 +28,11 @@ async function initDB(){
     console.log("Mongodb connected");
 
     // First delete all data in mentioned collection and then insert bulk data
+    // (reviews posted since are dropped, the Django review statistics then
+    // need `manage.py rebuild_review_stats`)
     await Reviews.deleteMany({});
     await Reviews.insertMany(reviews_data.reviews);
+    await seedReviewIds();
 
     await Dealerships.deleteMany({});
     await Dealerships.insertMany(dealerships_data.dealerships);
@@ -41,18 +45,133 @@ async function initDB(){
   
 }
 
-initDB();
+// Raise the review id counter to the largest stored id. $max never lowers
+// it, so ids handed out before a restart are not handed out again.
+async function seedReviewIds() {
+  const last = await Reviews.findOne().sort({ id: -1 }).select('id').lean();
+  await Counters.updateOne(
+    { _id: 'reviews' },
+    { $max: { seq: last ? last.id : 0 } },
+    { upsert: true }
+  );
+}
+
+// inserts wait for the seed data and the seeded id counter
+const dbReady = initDB();
+
+// Reserve `count` consecutive review ids and return the first one.
+// One atomic $inc on the counter, however large the collection, so
+// concurrent inserts never get the same id.
+async function reserveReviewIds(count) {
+  await dbReady;
+  const counter = await Counters.findOneAndUpdate(
+    { _id: 'reviews' },
+    { $inc: { seq: count } },
+    { upsert: true, new: true, lean: true }
+  );
+  return counter.seq - count + 1;
+}
+
+// Build a review document from posted data
+function reviewDocument(data, id) {
+  return {
+		"id": id,
+		"name": data.name,
+		"dealership": Number(data.dealership),
+		"review": data.review,
+		"purchase": data.purchase,
+		"purchase_date": data.purchase_date,
+		"car_make": data.car_make,
+		"car_model": data.car_model,
+		"car_year": Number(data.car_year),
+		"sentiment": data.sentiment,
+		"request_id": data.request_id ? String(data.request_id) : undefined,
+	};
+}
 
 // Express route to home
 app.get('/', async (req, res) => {
     res.send("Welcome to the Mongoose API");
 });
 
+// Largest page of reviews returned for ?limit=
+const MAX_REVIEW_PAGE = 1000;
+
+// Resolve once a response can take more data or its client is gone,
+// whichever comes first, leaving no listener behind.
+function drained(res) {
+  return new Promise((resolve) => {
+    if (res.destroyed) {
+      return resolve();
+    }
+    const done = () => {
+      res.removeListener('drain', done);
+      res.removeListener('close', done);
+      resolve();
+    };
+    res.on('drain', done);
+    res.on('close', done);
+  });
+}
+
+// Send the reviews matching a filter.
+// With ?limit=N (and optionally ?after=<review id>) one page of at most N
+// reviews ordered by id is sent; the id of its last review is the cursor
+// of the next page. Without a limit every matching review is streamed
+// from a database cursor, so the whole set is never held in memory.
+async function sendReviews(req, res, filter) {
+  if (req.query.limit === undefined) {
+    const cursor = Reviews.find(filter).lean().cursor();
+    let first = true;
+    res.type('json');
+    res.write('[');
+    try {
+      for (let document = await cursor.next(); document !== null;
+        document = await cursor.next()) {
+        const chunk = (first ? '' : ',') + JSON.stringify(document);
+        first = false;
+        if (!res.write(chunk)) {
+          // wait for a slow client instead of buffering the collection
+          await drained(res);
+          if (res.destroyed) {
+            // the client went away, stop reading the cursor
+            return;
+          }
+        }
+      }
+    } catch (error) {
+      // headers are sent, a truncated body is all that can signal it
+      console.error('Error streaming reviews: ', error);
+      return res.destroy(error);
+    } finally {
+      cursor.close().catch((error) => {
+        console.error('Error closing review cursor: ', error);
+      });
+    }
+    return res.end(']');
+  }
+
+  const limit = parseInt(req.query.limit, 10);
+  const after = req.query.after === undefined ?
+    null : parseInt(req.query.after, 10);
+  if (!(limit > 0) || Number.isNaN(after)) {
+    return res.status(400).json({ error: 'Invalid limit or after' });
+  }
+  const query = Object.assign({}, filter);
+  if (after !== null) {
+    query.id = { $gt: after };
+  }
+  const documents = await Reviews.find(query)
+    .sort({ id: 1 })
+    .limit(Math.min(limit, MAX_REVIEW_PAGE))
+    .lean();
+  res.json(documents);
+}
+
 // Express route to fetch all reviews
 app.get('/fetchReviews', async (req, res) => {
   try {
-    const documents = await Reviews.find();
-    res.json(documents);
+    await sendReviews(req, res, {});
   } catch (error) {
     res.status(500).json({ error: 'Error fetching documents' });
   }
@@ -61,8 +180,7 @@ app.get('/fetchReviews', async (req, res) => {
 // Express route to fetch reviews by a particular dealer
 app.get('/fetchReviews/dealer/:id', async (req, res) => {
   try {
-    const documents = await Reviews.find({dealership: req.params.id});
-    res.json(documents);
+    await sendReviews(req, res, {dealership: req.params.id});
   } catch (error) {
     res.status(500).json({ error: 'Error fetching documents' });
   }
@@ -102,34 +220,106 @@ app.get('/fetchDealer/:id', async (req, res) => {
 });
 
 //Express route to insert review
+// A review posted with a request_id is stored once: posting it again,
+// e.g. a retry after a timeout, returns the review already stored.
 app.post('/insert_review', express.json(), async (req, res) => {
 
   const data = req.body; //already parsed JSON by express.json()
-  // find all reviews & sort them in decending order
-  const documents = await Reviews.find().sort( { id: -1 } );
-  let new_id = documents[0].id + 1;
-
-  const review = new Reviews({
-		"id": new_id,
-		"name": data.name,
-		"dealership": Number(data.dealership),
-		"review": data.review,
-		"purchase": data.purchase,
-		"purchase_date": data.purchase_date,
-		"car_make": data.car_make,
-		"car_model": data.car_model,
-		"car_year": Number(data.car_year),
-	});
-
+  const requestId = data.request_id ? String(data.request_id) : null;
   try {
+    if (requestId !== null) {
+      const stored = await Reviews.findOne({ request_id: requestId }).lean();
+      if (stored) {
+        return res.json({status: 200, review: stored});
+      }
+    }
+    const review = new Reviews(reviewDocument(data, await reserveReviewIds(1)));
     const savedReview = await review.save();
     res.json({status: 200, review: savedReview});
   } catch (error) {
+    if (requestId !== null && error.code === 11000) {
+      // a concurrent post of the same request stored it first
+      const stored = await Reviews.findOne({ request_id: requestId }).lean();
+      if (stored) {
+        return res.json({status: 200, review: stored});
+      }
+    }
 		console.error("Error inserting review: ", error);
     res.status(500).json({ error: 'Error inserting review' });
   }
 });
 
+// Largest number of reviews inserted by one /insert_reviews call
+const MAX_REVIEW_BATCH = 5000;
+
+//Express route to insert many reviews at once
+// The ids of the whole batch are reserved with one counter update and the
+// reviews written with one insertMany. Invalid reviews fail the batch
+// before anything is written; the reserved ids are then left unused.
+app.post('/insert_reviews', express.json({ limit: '10mb' }), async (req, res) => {
+  const reviews = req.body.reviews;
+  if (!Array.isArray(reviews)) {
+    return res.status(400).json({ error: 'Expected a list of reviews' });
+  }
+  if (reviews.length > MAX_REVIEW_BATCH) {
+    return res.status(413).json({
+      error: `At most ${MAX_REVIEW_BATCH} reviews per call`,
+    });
+  }
+  if (reviews.length === 0) {
+    return res.json({ status: 200, reviews: [] });
+  }
+  try {
+    const first = await reserveReviewIds(reviews.length);
+    const saved = await Reviews.insertMany(
+      reviews.map((data, i) => reviewDocument(data, first + i))
+    );
+    res.json({ status: 200, reviews: saved });
+  } catch (error) {
+    console.error("Error inserting reviews: ", error);
+    res.status(500).json({ error: 'Error inserting reviews' });
+  }
+});
+
+//Express route to store analyzer labels of existing reviews
+// Only reviews without a label get one, each with an atomic conditional
+// update, and the ids of those are returned, so a label stored twice (a
+// concurrent reader, a re-run) is reported once. With "overwrite" every
+// given review is relabelled and no ids are returned.
+app.post('/update_sentiments', express.json(), async (req, res) => {
+  const sentiments = req.body.sentiments;
+  if (!Array.isArray(sentiments)) {
+    return res.status(400).json({ error: 'Expected a list of sentiments' });
+  }
+  if (sentiments.length === 0) {
+    return res.json({ status: 200, updated: 0, ids: [] });
+  }
+  try {
+    if (req.body.overwrite) {
+      const result = await Reviews.bulkWrite(sentiments.map((item) => ({
+        updateOne: {
+          filter: { id: Number(item.id) },
+          update: { $set: { sentiment: item.sentiment } },
+        },
+      })), { ordered: false });
+      return res.json({ status: 200, updated: result.modifiedCount });
+    }
+    const updated = await Promise.all(sentiments.map((item) =>
+      Reviews.findOneAndUpdate(
+        { id: Number(item.id), sentiment: { $in: [null, ''] } },
+        { $set: { sentiment: item.sentiment } },
+        { projection: { id: 1 }, lean: true }
+      )
+    ));
+    const ids = updated.filter((review) => review !== null)
+      .map((review) => review.id);
+    res.json({ status: 200, updated: ids.length, ids: ids });
+  } catch (error) {
+    console.error("Error updating sentiments: ", error);
+    res.status(500).json({ error: 'Error updating sentiments' });
+  }
+});
+
 // Start the Express server
 app.listen(port, () => {
   // console.log(`Server is running on http://localhost:${port}`);
@@ -6,6 +6,7 @@ const reviews = new Schema({
 	id: {
     type: Number,
     required: true,
+    unique: true,
 	},
 	name: {
     type: String,
@@ -39,6 +40,22 @@ const reviews = new Schema({
     type: Number,
     required: true
   },
+  // label from the sentiment analyzer, missing on legacy reviews
+  sentiment: {
+    type: String,
+  },
+  // client key of a posted review, a repeated post returns the stored one
+  request_id: {
+    type: String,
+  },
 });
 
+// serves the reviews of a dealer, page by page in id order
+reviews.index({ dealership: 1, id: 1 });
+// one review per request id, reviews without one are not indexed
+reviews.index(
+  { request_id: 1 },
+  { unique: true, partialFilterExpression: { request_id: { $type: 'string' } } }
+);
+
 module.exports = mongoose.model('reviews', reviews);
@@ -10,3 +10,9 @@ class DjangoappConfig(AppConfig):
     the dealership application within the project.
     """
     name = 'djangoapp'
+
+    def ready(self):
+        # connect signal handlers
+        from . import signals  # noqa: F401
+        # register background tasks
+        from . import tasks  # noqa: F401
@@ -0,0 +1,41 @@
+"""
+Authentication backend caching the users of authenticated requests.
+
+AuthenticationMiddleware loads `request.user` from the database on every
+authenticated request. `CachedModelBackend` keeps the loaded users in
+settings.USER_CACHE instead, so with a cached or cookie session store an
+authenticated request needs no query at all. Cached users are dropped
+when they are saved or deleted, see djangoapp/signals.py. The cache is
+shared by all workers, so the drop reaches every one of them; without a
+shared cache users are not cached.
+"""
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def user_cache():
+    """Return the shared user cache, None when users are not cached."""
+    if settings.USER_CACHE is None:
+        return None
+    return caches[settings.USER_CACHE]
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose `get_user` reads through the user cache."""
+
+    def get_user(self, user_id):
+        if user_cache() is None:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache().set(key, user, settings.USER_CACHE_TTL)
+        return user
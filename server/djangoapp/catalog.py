@@ -0,0 +1,166 @@
+"""
+Pre-serialized car catalog payload for the `get_cars` view.
+
+The catalog only changes when the catalog loader or the admin writes to
+`CarMake`/`CarModel`. The JSON body of the unfiltered catalog and its ETag
+are built once and kept in memory; model signals and the loader bump the
+`CatalogVersion` row in the same transaction as the change, so every
+worker, and every process, rebuilds its copy on its next request after
+the change commits.
+Filtered requests go through `query_catalog`, which pages by id and
+only selects the projected fields.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.db import router
+from django.db.models import F
+
+from .models import CarMake, CarModel, CatalogVersion
+
+# fields a client may project, mapped to their CarModel lookups
+FIELDS = {
+    "id": "id",
+    "CarModel": "name",
+    "CarMake": "car_make__name",
+    "type": "type",
+    "year": "year",
+}
+DEFAULT_FIELDS = ("CarModel", "CarMake")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class CatalogPayload:
+    """
+    Cached JSON body and ETag of the full car catalog.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._generation = None
+        # (body, etag), swapped whole so readers never mix two builds
+        self._payload = None
+
+    def _current_generation(self):
+        # one primary key read, from the database the bumps are written to
+        return (
+            CatalogVersion.objects.using(router.db_for_write(CatalogVersion))
+            .filter(pk=CatalogVersion.ROW)
+            .values_list("version", flat=True)
+            .first()
+        ) or 0
+
+    def _build(self):
+        # from the written database, a replica may not have the change
+        # that triggered the rebuild yet
+        rows = list(
+            CarModel.objects.using(router.db_for_write(CarModel))
+            .values_list("name", "car_make__name")
+        )
+        cars = [{"CarModel": model, "CarMake": make} for model, make in rows]
+        body = json.dumps({"CarModels": cars}).encode("utf-8")
+        return body, 'W/"%s"' % hashlib.sha1(body).hexdigest()
+
+    def get(self):
+        """Return (body, etag), rebuilding only after a catalog change."""
+        generation = self._current_generation()
+        payload = self._payload
+        if payload is None or self._generation != generation:
+            with self._lock:
+                payload = self._payload
+                if payload is None or self._generation != generation:
+                    payload = self._build()
+                    self._payload = payload
+                    self._generation = generation
+        return payload
+
+    def invalidate(self):
+        """
+        Mark the payload of every worker as outdated.
+
+        Call it inside the transaction changing the catalog, the bump is
+        then seen exactly when the change is.
+        """
+        versions = CatalogVersion.objects.using(
+            router.db_for_write(CatalogVersion)
+        )
+        if not versions.filter(pk=CatalogVersion.ROW).update(
+            version=F("version") + 1
+        ):
+            versions.get_or_create(
+                pk=CatalogVersion.ROW, defaults={"version": 1}
+            )
+
+
+# process wide catalog payload served by get_cars
+catalog_payload = CatalogPayload()
+
+
+def make_ids(make):
+    """
+    Return the ids of the car makes named `make`, in any letter case.
+
+    One lookup of the case-folded name in the unique index on
+    `CarMake.name_key`, instead of a case-insensitive scan.
+    """
+    return list(
+        CarMake.objects.filter(name_key=CarMake.key_for(make))
+        .values_list("id", flat=True)
+    )
+
+
+def query_catalog(
+    make=None,
+    body_type=None,
+    year_min=None,
+    year_max=None,
+    after=None,
+    limit=DEFAULT_LIMIT,
+    fields=DEFAULT_FIELDS,
+):
+    """
+    Return one page of the catalog matching the given filters.
+
+    Pages are ordered by id and continue after the `after` cursor,
+    so every page costs an index range scan however deep it is. Filters
+    compare stored values exactly, so the make, type and year indexes
+    serve them.
+
+    Args:
+        make(str, optional): Car make name, case-insensitive.
+        body_type(str, optional): Body type such as SUV, case-insensitive.
+        year_min(int, optional): Lowest model year included.
+        year_max(int, optional): Highest model year included.
+        after(int, optional): Id of the last car model already seen.
+        limit(int): Maximum number of car models returned.
+        fields(tuple[str]): Names from FIELDS to include per car model.
+
+    Returns:
+        tuple: (list of car model dicts, cursor of the next page or None)
+    """
+    car_models = CarModel.objects.all()
+    if make is not None:
+        car_makes = make_ids(make)
+        if not car_makes:
+            return [], None
+        car_models = car_models.filter(car_make_id__in=car_makes)
+    if body_type is not None:
+        # body types are stored in upper case, see CarModel.BODY_TYPES
+        car_models = car_models.filter(type=body_type.upper())
+    if year_min is not None:
+        car_models = car_models.filter(year__gte=year_min)
+    if year_max is not None:
+        car_models = car_models.filter(year__lte=year_max)
+    if after is not None:
+        car_models = car_models.filter(id__gt=after)
+
+    lookups = ["id"] + [FIELDS[field] for field in fields]
+    rows = list(
+        car_models.order_by("id").values_list(*lookups)[:limit + 1]
+    )
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    cars = [dict(zip(fields, row[1:])) for row in rows[:limit]]
+    return cars, next_cursor
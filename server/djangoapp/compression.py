@@ -0,0 +1,172 @@
+"""
+Content-encoding negotiation and compression of API responses.
+
+CompressionMiddleware compresses JSON and text responses with the first
+encoding of settings.HTTP_CACHE["COMPRESS_ENCODINGS"] the client accepts.
+Brotli is used only when the Brotli package is installed. Bodies that
+carry an ETag are compressed once per encoding and kept in a bounded
+in-process LRU, so the dealer list and the car catalog are not
+recompressed on every request.
+"""
+
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .metrics import register_cache
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+class _GzipEncoder:
+    def __init__(self, level):
+        # wbits 31 writes a gzip header and trailer around the deflate data
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def process(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+ENCODERS = {"gzip": _GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = _BrotliEncoder
+
+
+def _accepted(header):
+    """Map each coding of an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def negotiate(accept_encoding):
+    """
+    Pick the response encoding for an Accept-Encoding header.
+
+    The server's preference order decides among the accepted codings.
+
+    Returns:
+        str: A key of ENCODERS, None to send the body uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    for encoding in settings.HTTP_CACHE["COMPRESS_ENCODINGS"]:
+        if encoding in ENCODERS and accepted.get(
+            encoding, accepted.get("*", 0)
+        ) > 0:
+            return encoding
+    return None
+
+
+def encoder(encoding):
+    return ENCODERS[encoding](
+        settings.HTTP_CACHE["COMPRESS_LEVELS"][encoding]
+    )
+
+
+def compress(content, encoding):
+    compressor = encoder(encoding)
+    return compressor.process(content) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of chunks, flushing after each one."""
+    compressor = encoder(encoding)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressedBodies:
+    """
+    LRU of compressed response bodies keyed by (ETag, encoding).
+
+    Args:
+        max_entries(int): Bodies kept before the least recently used
+            one is dropped.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag, encoding, content):
+        """Return `content` compressed, reusing the body of an ETag."""
+        key = (etag, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+        body = compress(content, encoding)
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# process wide cache used by CompressionMiddleware
+compressed_bodies = CompressedBodies(
+    settings.HTTP_CACHE["COMPRESSED_ENTRIES"]
+)
+register_cache("compressed", compressed_bodies.stats)
@@ -0,0 +1,77 @@
+"""
+Conditional GET and Cache-Control policies for the JSON API views.
+
+Views decorated with `conditional(policy)` get an ETag derived from the
+response body, a Cache-Control header from settings.HTTP_CACHE and a 304
+answer when the client already holds the current body. The ETags are
+weak, since CompressionMiddleware may send the same JSON gzip or brotli
+encoded.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+
+# headers a 304 response repeats from the response it replaces
+NOT_MODIFIED_HEADERS = ("Cache-Control", "ETag", "Expires", "Vary")
+
+
+def make_etag(content):
+    """Return a weak ETag identifying a response body."""
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header with an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(
+        _opaque(candidate.strip()) == wanted
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional(policy):
+    """
+    Decorate a GET view with ETag, If-None-Match and Cache-Control.
+
+    Only 200 responses with a body are handled. A view may set its own
+    ETag (e.g. a precomputed one) or Cache-Control, which are kept.
+
+    Args:
+        policy(str): Key of settings.HTTP_CACHE["CACHE_CONTROL"].
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if (
+                request.method not in ("GET", "HEAD")
+                or response.status_code != 200
+                or response.streaming
+            ):
+                return response
+            if not response.has_header("ETag"):
+                response["ETag"] = make_etag(response.content)
+            if not response.has_header("Cache-Control"):
+                response["Cache-Control"] = (
+                    settings.HTTP_CACHE["CACHE_CONTROL"][policy]
+                )
+            if_none_match = request.headers.get("If-None-Match")
+            if if_none_match and etag_matches(if_none_match, response["ETag"]):
+                not_modified = HttpResponseNotModified()
+                for header in NOT_MODIFIED_HEADERS:
+                    if response.has_header(header):
+                        not_modified[header] = response[header]
+                return not_modified
+            return response
+        return wrapper
+    return decorator
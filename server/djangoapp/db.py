@@ -0,0 +1,66 @@
+"""
+SQLite connection profile and read-replica routing.
+
+Used from settings.DATABASES: `sqlite_options` turns a dict of pragmas
+into the OPTIONS applied on every new connection, and
+`ReadReplicaRouter` sends reads to an optional "replica" database.
+"""
+
+from django.db import connections
+
+# apps and models whose reads must see the writes just made
+PRIMARY_APPS = frozenset({"admin", "auth", "contenttypes", "sessions"})
+PRIMARY_MODELS = frozenset({
+    "djangoapp.backgroundtask", "djangoapp.reviewcount",
+})
+
+
+def sqlite_options(pragmas, immediate=True):
+    """
+    Build the OPTIONS of a sqlite3 database from connection pragmas.
+
+    Args:
+        pragmas(dict): Pragma names mapped to their values.
+        immediate(bool): Start transactions with BEGIN IMMEDIATE, so a
+            writer waits for the lock up front instead of failing with
+            "database is locked" when it upgrades from a read.
+    """
+    options = {
+        "init_command": ";".join(
+            f"PRAGMA {name}={value}" for name, value in pragmas.items()
+        ),
+    }
+    if immediate:
+        options["transaction_mode"] = "IMMEDIATE"
+    return options
+
+
+class ReadReplicaRouter:
+    """
+    Route reads to the "replica" database and writes to "default".
+
+    Authentication, sessions, the task queue and the review counters
+    always read from "default", because they read rows right after
+    writing them. So does every read inside a transaction on "default",
+    e.g. the catalog loader reading back the ids of the makes it wrote.
+    """
+
+    def db_for_read(self, model, **hints):
+        meta = model._meta
+        if (
+            meta.app_label in PRIMARY_APPS
+            or meta.label_lower in PRIMARY_MODELS
+            or connections["default"].in_atomic_block
+        ):
+            return "default"
+        return "replica"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both databases hold the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
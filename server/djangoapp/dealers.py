@@ -0,0 +1,344 @@
+"""
+In-memory read model of the dealerships.
+
+Dealerships barely change, so the dealer views read them from a process
+wide index instead of calling the Node.js backend. The index holds
+compact `Dealer` records with hash indexes by id and by state. It loads
+the `/fetchDealers` list through the shared dealer cache, so workers
+refreshing together fetch it once, falling back to
+database/data/dealerships.json when the backend is down at start. Reads
+older than settings.DEALER_INDEX["REFRESH_INTERVAL"] trigger a background
+refresh that keeps unchanged records and rebuilds only the state buckets
+that changed. An unknown dealer id refreshes from the backend itself and
+stores the fresh list in the cache for the other workers.
+"""
+
+import json
+import logging
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+
+from .fanout import get_executor
+from .metrics import register_cache
+from .response_cache import dealer_cache, is_cacheable
+from .restapis import get_request
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    "id", "city", "state", "st", "address", "zip",
+    "lat", "long", "short_name", "full_name",
+)
+
+
+class Dealer:
+    """Immutable dealership record."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(FIELDS, values):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Dealer records are immutable")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a backend or dealerships.json document."""
+        return cls(
+            int(data["id"]),
+            data["city"],
+            data["state"],
+            data.get("st", ""),
+            data["address"],
+            data["zip"],
+            # stored as strings in Mongo, as numbers in the JSON file
+            float(data["lat"]),
+            float(data["long"]),
+            data.get("short_name", ""),
+            data["full_name"],
+        )
+
+    def values(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def as_dict(self):
+        return dict(zip(FIELDS, self.values()))
+
+    def __eq__(self, other):
+        return isinstance(other, Dealer) and self.values() == other.values()
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return f"Dealer(id={self.id}, full_name={self.full_name!r})"
+
+
+class Snapshot:
+    """One immutable version of the index, swapped whole on refresh."""
+
+    __slots__ = ("by_id", "by_state", "ordered", "version", "loaded_at")
+
+    def __init__(self, by_id, by_state, ordered, version, loaded_at):
+        self.by_id = by_id
+        self.by_state = by_state
+        self.ordered = ordered
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+class DealerIndexUnavailable(Exception):
+    """Neither the backend nor the fallback file could be loaded."""
+
+
+class DealerIndex:
+    """
+    Dealership records indexed by id and by state.
+
+    Args:
+        loader(callable): Called with `fresh` (bypass any cache) and
+            returning the list of dealer documents, or None.
+        fallback_path(str, optional): JSON file with a "dealerships"
+            list, loaded when the first load from `loader` fails.
+        refresh_interval(float): Seconds before a read triggers a
+            background refresh.
+        miss_refresh(float): Minimum age in seconds before an unknown
+            dealer id triggers a synchronous refresh.
+    """
+
+    def __init__(
+        self, loader, fallback_path=None, refresh_interval=60.0,
+        miss_refresh=10.0,
+    ):
+        self.loader = loader
+        self.fallback_path = fallback_path
+        self.refresh_interval = refresh_interval
+        self.miss_refresh = miss_refresh
+        self._snapshot = None
+        self._lock = threading.Lock()
+        # one load at a time, threads that waited on it reuse its result
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = None
+        self._refreshing = False
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def apply(self, documents):
+        """
+        Replace the index content with a list of dealer documents.
+
+        Unchanged records are kept, only states with an added, changed
+        or removed dealer get their bucket rebuilt.
+
+        Returns:
+            dict: Counts of added, changed, removed and unchanged dealers.
+        """
+        with self._lock:
+            old = self._snapshot
+            old_by_id = old.by_id if old is not None else {}
+            by_id = {}
+            touched = set()
+            stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+            for document in documents:
+                dealer = Dealer.from_dict(document)
+                previous = old_by_id.get(dealer.id)
+                if previous == dealer:
+                    by_id[dealer.id] = previous
+                    stats["unchanged"] += 1
+                    continue
+                by_id[dealer.id] = dealer
+                touched.add(dealer.state)
+                if previous is None:
+                    stats["added"] += 1
+                else:
+                    touched.add(previous.state)
+                    stats["changed"] += 1
+            for dealer_id in old_by_id.keys() - by_id.keys():
+                touched.add(old_by_id[dealer_id].state)
+                stats["removed"] += 1
+
+            now = time.monotonic()
+            if old is not None and not touched:
+                self._snapshot = Snapshot(
+                    old.by_id, old.by_state, old.ordered, old.version, now
+                )
+                return stats
+            by_state = dict(old.by_state) if old is not None else {}
+            buckets = {state: [] for state in touched}
+            for dealer in by_id.values():
+                if dealer.state in buckets:
+                    buckets[dealer.state].append(dealer)
+            for state, dealers in buckets.items():
+                if dealers:
+                    by_state[state] = tuple(
+                        sorted(dealers, key=lambda d: d.id)
+                    )
+                else:
+                    by_state.pop(state, None)
+            self._snapshot = Snapshot(
+                by_id,
+                by_state,
+                tuple(sorted(by_id.values(), key=lambda d: d.id)),
+                old.version + 1 if old is not None else 1,
+                now,
+            )
+        return stats
+
+    def refresh(self, fresh=False):
+        """
+        Reload the dealers from the loader.
+
+        Args:
+            fresh(bool): Ask the loader to skip its cache.
+
+        Concurrent calls are single-flight: a call that waited for another
+        one's load returns its result instead of loading again.
+
+        Returns:
+            dict: Change counts, see `apply`.
+
+        Raises:
+            DealerIndexUnavailable: The loader returned an error.
+        """
+        snapshot = self._snapshot
+        with self._refresh_lock:
+            if self._snapshot is not snapshot and self._last_refresh:
+                return self._last_refresh
+            documents = self.loader(fresh=fresh)
+            if not isinstance(documents, list):
+                with self._lock:
+                    self.refresh_errors += 1
+                raise DealerIndexUnavailable("Could not fetch dealers.")
+            stats = self.apply(documents)
+            self._last_refresh = stats
+        with self._lock:
+            self.refreshes += 1
+        if stats["added"] or stats["changed"] or stats["removed"]:
+            logger.info("Dealer index refreshed", extra=stats)
+        return stats
+
+    def _load_fallback(self):
+        if not self.fallback_path:
+            raise DealerIndexUnavailable("Could not fetch dealers.")
+        try:
+            with open(self.fallback_path, encoding="utf-8") as f:
+                documents = json.load(f)["dealerships"]
+        except (OSError, ValueError, KeyError) as e:
+            raise DealerIndexUnavailable(str(e)) from e
+        logger.warning(
+            "Dealer index loaded from %s, the backend is unavailable",
+            self.fallback_path,
+        )
+        self.apply(documents)
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Dealer index refresh failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def snapshot(self):
+        """
+        Return the current snapshot, loading it on first use.
+
+        A stale snapshot is returned as it is while a single background
+        refresh runs.
+
+        Raises:
+            DealerIndexUnavailable: Nothing could be loaded.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            try:
+                self.refresh()
+            except DealerIndexUnavailable:
+                if self._snapshot is None:
+                    self._load_fallback()
+            return self._snapshot
+        if time.monotonic() - snapshot.loaded_at > self.refresh_interval:
+            with self._lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                get_executor().submit(self._refresh_in_background)
+        return snapshot
+
+    def all(self):
+        """Return every dealer, ordered by id."""
+        return self.snapshot().ordered
+
+    def in_state(self, state):
+        """Return the dealers of a state (full name), ordered by id."""
+        return self.snapshot().by_state.get(state, ())
+
+    def get(self, dealer_id):
+        """
+        Return the dealer with an id, None if there is none.
+
+        An unknown id may be a dealer added since the last refresh, so it
+        refreshes the index once if that is older than `miss_refresh`.
+        """
+        snapshot = self.snapshot()
+        dealer = snapshot.by_id.get(dealer_id)
+        if dealer is None and (
+            time.monotonic() - snapshot.loaded_at > self.miss_refresh
+        ):
+            try:
+                self.refresh(fresh=True)
+            except DealerIndexUnavailable:
+                pass
+            dealer = self.snapshot().by_id.get(dealer_id)
+        with self._lock:
+            if dealer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dealer
+
+    def stats(self):
+        snapshot = self._snapshot
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "size": len(snapshot.by_id) if snapshot is not None else 0,
+            }
+
+
+def _fetch_dealers(fresh=False):
+    fetch = partial(get_request, "/fetchDealers")
+    if fresh:
+        # straight from the backend, then shared with the other workers
+        dealers = fetch()
+        dealer_cache.set("dealers", "All", dealers)
+    else:
+        # through the shared cache, so workers refreshing together fetch once
+        dealers = dealer_cache.get("dealers", "All", fetch)
+    return dealers if is_cacheable(dealers) else None
+
+
+def _build_index():
+    config = settings.DEALER_INDEX
+    return DealerIndex(
+        _fetch_dealers,
+        fallback_path=config["FALLBACK_FILE"],
+        refresh_interval=config["REFRESH_INTERVAL"],
+        miss_refresh=config["MISS_REFRESH"],
+    )
+
+
+# process wide index used by the dealer views
+dealer_index = _build_index()
+register_cache("dealer_index", dealer_index.stats)
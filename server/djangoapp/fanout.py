@@ -0,0 +1,105 @@
+"""
+Concurrent fan-out of independent upstream calls.
+
+The app is served by gunicorn sync workers under WSGI, so views issue
+their independent backend and analyzer calls through a small shared
+thread pool. Each fan-out is capped in how many calls it keeps in flight
+and bounded by an overall deadline, so a page costs roughly its slowest
+call instead of the sum of all of them.
+"""
+
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a fan-out does not finish before its deadline.
+
+    Attributes:
+        results(list): Results gathered so far, None for unfinished calls.
+    """
+
+    def __init__(self, results):
+        super().__init__("Fan-out deadline exceeded")
+        self.results = results
+
+
+def get_executor():
+    """Return the thread pool of the current process, creating it lazily."""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.FANOUT["MAX_WORKERS"],
+                    thread_name_prefix="fanout",
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def fan_out(calls, deadline=None, max_concurrency=None):
+    """
+    Run zero-argument callables concurrently and collect their results.
+
+    Args:
+        calls(list[callable]): The independent calls to run.
+        deadline(float, optional): Seconds allowed for the whole fan-out.
+            Defaults to settings.FANOUT["DEADLINE"]; math.inf waits for
+            every call, for batch jobs outside a request.
+        max_concurrency(int, optional): Calls kept in flight at once for
+            this fan-out. Defaults to settings.FANOUT["MAX_CONCURRENCY"].
+
+    Returns:
+        list: The results, in the order of `calls`.
+
+    Raises:
+        DeadlineExceeded: If calls are still pending at the deadline.
+        Exception: The first exception raised by any call.
+    """
+    if deadline is None:
+        deadline = settings.FANOUT["DEADLINE"]
+    if max_concurrency is None:
+        max_concurrency = settings.FANOUT["MAX_CONCURRENCY"]
+    if not calls:
+        return []
+
+    executor = get_executor()
+    expires = time.monotonic() + deadline
+    results = [None] * len(calls)
+    queued = list(enumerate(calls))
+    queued.reverse()
+    running = {}
+
+    while queued or running:
+        while queued and len(running) < max_concurrency:
+            index, call = queued.pop()
+            # run in a copy of the caller's context, so per-request
+            # timings are collected from the pool threads too
+            context = contextvars.copy_context()
+            running[executor.submit(context.run, call)] = index
+        remaining = expires - time.monotonic()
+        done, _ = wait(
+            running,
+            timeout=None if remaining == math.inf else max(remaining, 0),
+            return_when=FIRST_COMPLETED,
+        )
+        if not done:
+            for future in running:
+                future.cancel()
+            raise DeadlineExceeded(results)
+        for future in done:
+            results[running.pop(future)] = future.result()
+    return results
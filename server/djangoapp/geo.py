@@ -0,0 +1,207 @@
+"""
+Nearest-dealer search over the dealership coordinates.
+
+Points are stored as unit vectors on the sphere in a static 3-d tree.
+The straight-line (chord) distance between unit vectors grows with the
+great-circle distance, so the tree answers k-nearest and radius queries
+exactly with plain Euclidean pruning, with no special cases at the poles
+or the antimeridian. `DealerLocator` builds the tree from the dealer index
+and rebuilds it whenever the index version changes.
+"""
+
+import heapq
+import math
+import threading
+
+from .dealers import dealer_index
+
+EARTH_RADIUS_KM = 6371.0088
+
+# default and maximum number of dealers returned by one query
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 100
+
+
+def to_unit_vector(lat, long):
+    lat, long = math.radians(lat), math.radians(long)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(long), cos_lat * math.sin(long), math.sin(lat))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+def haversine_km(lat1, long1, lat2, long2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, long1, lat2, long2 = map(math.radians, (lat1, long1, lat2, long2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((long2 - long1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _squared(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class KDTree:
+    """
+    Static k-d tree over 3-d points.
+
+    Nodes are (point index, split axis, left child, right child) tuples,
+    split at the median of the axis with the widest spread.
+
+    Args:
+        points(list): (x, y, z) tuples; query results refer to them by
+            their position in this list.
+    """
+
+    def __init__(self, points):
+        self.points = points
+        # per axis coordinate lists, their __getitem__ is a fast sort key
+        self._axes = [[point[axis] for point in points] for axis in range(3)]
+        self.root = self._build(list(range(len(points))))
+        del self._axes
+
+    def _build(self, indexes):
+        if not indexes:
+            return None
+        spreads = []
+        for coordinates in self._axes:
+            values = list(map(coordinates.__getitem__, indexes))
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+        indexes.sort(key=self._axes[axis].__getitem__)
+        median = len(indexes) // 2
+        return (
+            indexes[median],
+            axis,
+            self._build(indexes[:median]),
+            self._build(indexes[median + 1:]),
+        )
+
+    def nearest(self, target, k):
+        """
+        Return the k points closest to a target.
+
+        Returns:
+            list: (squared distance, point index) pairs, closest first.
+        """
+        points = self.points
+        # max-heap of the best k so far, as negated squared distances
+        best = []
+
+        def visit(node):
+            index, axis, left, right = node
+            distance = _squared(points[index], target)
+            if len(best) < k:
+                heapq.heappush(best, (-distance, index))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, index))
+            offset = target[axis] - points[index][axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            if near is not None:
+                visit(near)
+            if far is not None and (
+                len(best) < k or offset * offset < -best[0][0]
+            ):
+                visit(far)
+
+        if self.root is not None and k > 0:
+            visit(self.root)
+        return sorted((-distance, index) for distance, index in best)
+
+    def within(self, target, radius):
+        """
+        Return the points at most `radius` away from a target.
+
+        Returns:
+            list: (squared distance, point index) pairs, closest first.
+        """
+        points = self.points
+        limit = radius * radius
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            index, axis, left, right = stack.pop()
+            distance = _squared(points[index], target)
+            if distance <= limit:
+                found.append((distance, index))
+            offset = target[axis] - points[index][axis]
+            if left is not None and offset - radius <= 0:
+                stack.append(left)
+            if right is not None and offset + radius >= 0:
+                stack.append(right)
+        found.sort()
+        return found
+
+
+class DealerLocator:
+    """
+    Nearest and radius dealer queries over the dealer index.
+
+    Args:
+        index(DealerIndex): Source of the dealers; the tree is rebuilt
+            when its snapshot version changes.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        # (index version, dealers, tree), swapped whole on rebuild
+        self._state = (None, (), None)
+        self._lock = threading.Lock()
+
+    def _tree(self):
+        snapshot = self.index.snapshot()
+        state = self._state
+        if state[0] != snapshot.version:
+            with self._lock:
+                state = self._state
+                if state[0] != snapshot.version:
+                    tree = KDTree([
+                        to_unit_vector(dealer.lat, dealer.long)
+                        for dealer in snapshot.ordered
+                    ])
+                    state = (snapshot.version, snapshot.ordered, tree)
+                    self._state = state
+        return state[1], state[2]
+
+    def nearest(self, lat, long, limit=DEFAULT_LIMIT):
+        """
+        Return the `limit` dealers closest to a point.
+
+        Returns:
+            list: (Dealer, distance in km) pairs, closest first.
+        """
+        dealers, tree = self._tree()
+        return [
+            (dealers[index], chord_to_km(math.sqrt(distance)))
+            for distance, index in tree.nearest(
+                to_unit_vector(lat, long), limit
+            )
+        ]
+
+    def within(self, lat, long, radius_km, limit=MAX_LIMIT):
+        """
+        Return the dealers at most `radius_km` from a point.
+
+        Returns:
+            list: Up to `limit` (Dealer, distance in km) pairs,
+            closest first.
+        """
+        dealers, tree = self._tree()
+        found = tree.within(to_unit_vector(lat, long), km_to_chord(radius_km))
+        return [
+            (dealers[index], chord_to_km(math.sqrt(distance)))
+            for distance, index in found[:limit]
+        ]
+
+
+# process wide locator used by the nearest dealers view
+dealer_locator = DealerLocator(dealer_index)
@@ -0,0 +1,41 @@
+"""
+Password hashers with costs taken from settings.PASSWORD_HASHER_COSTS.
+
+They keep the algorithm names of the Django hashers they extend, so
+existing hashes still verify. A hash made with other costs is upgraded to
+the configured ones at the user's next successful login.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with configurable time cost, memory cost and parallelism."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHER_COSTS["ARGON2_TIME_COST"]
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHER_COSTS["ARGON2_MEMORY_COST"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHER_COSTS["ARGON2_PARALLELISM"]
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with a configurable number of iterations."""
+
+    @property
+    def iterations(self):
+        # Django's default, raised with every release, unless configured
+        return (
+            settings.PASSWORD_HASHER_COSTS["PBKDF2_ITERATIONS"]
+            or PBKDF2PasswordHasher.iterations
+        )
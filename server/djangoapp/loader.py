@@ -0,0 +1,201 @@
+"""
+Bulk, idempotent loader for the car make and car model catalog.
+
+Records are streamed from JSON, JSON Lines or CSV files and upserted with
+`bulk_create` in fixed-size batches inside a single transaction. Car makes
+are identified by name in any letter case and car models by (make, name,
+year), so loading the same file twice leaves the tables unchanged.
+
+Accepted record keys are either those of `database/data/car_records.json`
+(make, model, bodyType, year) or those of the models themselves
+(car_make, name, type, year), plus an optional make description.
+"""
+
+import csv
+import json
+import time
+from itertools import islice
+
+from django.db import router, transaction
+
+from .catalog import catalog_payload
+from .models import CarMake, CarModel
+
+DEFAULT_BATCH_SIZE = 1000
+
+# bytes read per chunk when streaming a JSON array
+READ_SIZE = 64 * 1024
+
+
+def iter_json_array(fileobj):
+    """
+    Yield the objects of the first JSON array in a file, one at a time.
+
+    Works for a bare array as well as for a document wrapping it,
+    such as {"cars": [...]}, without loading the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    in_array = False
+    eof = False
+    while True:
+        if not eof and len(buffer) < READ_SIZE:
+            chunk = fileobj.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+        if not in_array:
+            start = buffer.find("[")
+            if start == -1:
+                if eof:
+                    return
+                buffer = ""
+                continue
+            buffer = buffer[start + 1:]
+            in_array = True
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer.startswith("]"):
+            return
+        if not buffer:
+            if eof:
+                return
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # the object continues in the next chunk
+            chunk = fileobj.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield record
+
+
+def iter_records(path, fmt=None):
+    """
+    Stream raw catalog records from a file.
+
+    Args:
+        path(str): Path of a .json, .jsonl or .csv file.
+        fmt(str, optional): One of "json", "jsonl" or "csv".
+            Guessed from the file extension by default.
+    """
+    fmt = fmt or str(path).rsplit(".", 1)[-1].lower()
+    with open(path, encoding="utf-8", newline="") as fileobj:
+        if fmt == "csv":
+            yield from csv.DictReader(fileobj)
+        elif fmt in ("jsonl", "ndjson"):
+            for line in fileobj:
+                if line.strip():
+                    yield json.loads(line)
+        elif fmt == "json":
+            yield from iter_json_array(fileobj)
+        else:
+            raise ValueError(f"Unsupported catalog format: {fmt}")
+
+
+def normalize(record):
+    """Map a raw record onto CarMake/CarModel field names."""
+    return {
+        "make": str(record.get("make") or record["car_make"]).strip(),
+        "description": (record.get("description") or "").strip(),
+        "name": str(record.get("model") or record["name"]).strip(),
+        "type": str(
+            record.get("bodyType") or record.get("type") or "SEDAN"
+        ).strip().upper(),
+        "year": int(record["year"]),
+    }
+
+
+def _upsert_batch(batch):
+    # car makes first, so models can reference their ids; a make is the
+    # same in any letter case, its first spelling is kept
+    makes = {}
+    for record in batch:
+        key = CarMake.key_for(record["make"])
+        name, description = makes.setdefault(
+            key, (record["make"], record["description"])
+        )
+        if not description and record["description"]:
+            makes[key] = (name, record["description"])
+    described = [
+        CarMake(name=name, name_key=key, description=description)
+        for key, (name, description) in makes.items() if description
+    ]
+    undescribed = [
+        CarMake(name=name, name_key=key, description="")
+        for key, (name, description) in makes.items() if not description
+    ]
+    if described:
+        CarMake.objects.bulk_create(
+            described,
+            update_conflicts=True,
+            unique_fields=["name_key"],
+            update_fields=["description"],
+        )
+    if undescribed:
+        CarMake.objects.bulk_create(undescribed, ignore_conflicts=True)
+    # read back from the database just written, never from a replica
+    make_ids = dict(
+        CarMake.objects.using(router.db_for_write(CarMake))
+        .filter(name_key__in=makes).values_list("name_key", "id")
+    )
+
+    car_models = {}
+    for record in batch:
+        key = (
+            make_ids[CarMake.key_for(record["make"])],
+            record["name"],
+            record["year"],
+        )
+        car_models[key] = CarModel(
+            car_make_id=key[0],
+            name=record["name"],
+            year=record["year"],
+            type=record["type"],
+        )
+    CarModel.objects.bulk_create(
+        car_models.values(),
+        update_conflicts=True,
+        unique_fields=["car_make", "name", "year"],
+        update_fields=["type"],
+    )
+    return len(makes), len(car_models)
+
+
+def load_catalog(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert catalog records in batches inside a single transaction.
+
+    Args:
+        records(iterable[dict]): Raw records, see `normalize`.
+        batch_size(int): Records written per bulk statement.
+
+    Returns:
+        dict: Number of records read, make and model rows written,
+        elapsed seconds and records per second.
+    """
+    started = time.perf_counter()
+    records = (normalize(record) for record in records)
+    total = makes = car_models = 0
+    with transaction.atomic():
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            batch_makes, batch_models = _upsert_batch(batch)
+            total += len(batch)
+            makes += batch_makes
+            car_models += batch_models
+        # bulk_create sends no post_save signals
+        catalog_payload.invalidate()
+    elapsed = time.perf_counter() - started
+    return {
+        "records": total,
+        "makes": makes,
+        "models": car_models,
+        "seconds": elapsed,
+        "rows_per_sec": total / elapsed if elapsed else 0.0,
+    }
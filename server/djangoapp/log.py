@@ -0,0 +1,164 @@
+"""
+Logging helpers for the dealership Django application.
+
+Used from settings.LOGGING: a queue handler that hands records to a
+background thread so request threads never block on stdout, JSON and
+plain text formatters that both keep the `extra` fields, and a filter
+sampling high-volume debug events.
+"""
+
+import copy
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
+
+# attributes every LogRecord has, anything else came in through `extra`
+RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "taskName"}
+
+
+def extra_fields(record):
+    """Return the fields a record was given through `extra`."""
+    return {
+        key: value for key, value in record.__dict__.items()
+        if key not in RESERVED_ATTRS and not key.startswith("_")
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(extra_fields(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class PlainFormatter(logging.Formatter):
+    """Format records as text, followed by their extra fields as key=value."""
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        pairs = " ".join(
+            f"{key}={json.dumps(value, default=str)}"
+            for key, value in extra_fields(record).items()
+        )
+        return f"{line} {pairs}" if pairs else line
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through only a fraction of records at or below `level`.
+
+    Args:
+        rate(float): Share of matching records kept, between 0 and 1.
+        level(str): Highest level that is sampled, DEBUG by default.
+    """
+
+    def __init__(self, rate=1.0, level="DEBUG"):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging.getLevelName(level)
+
+    def filter(self, record):
+        if record.levelno > self.level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Non-blocking handler writing to a stream from a background thread.
+
+    Records are put on a bounded in-memory queue and formatted and written
+    by a QueueListener thread. When the queue is full records are dropped
+    and counted instead of blocking the caller.
+
+    Configure it with the "()" key in settings.LOGGING: from Python 3.12
+    on, dictConfig builds handlers given by "class" that subclass
+    QueueHandler itself, passing only a queue.
+
+    Args:
+        queue(Queue, optional): Queue to use, a new one by default.
+        stream(str): "stdout" or "stderr".
+        maxsize(int): Capacity of the queue made when none is given.
+    """
+
+    def __init__(self, queue=None, stream="stdout", maxsize=10000):
+        super().__init__(Queue(maxsize) if queue is None else queue)
+        self.target = logging.StreamHandler(
+            sys.stderr if stream == "stderr" else sys.stdout
+        )
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # formatting happens in the listener thread
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        # (re)start after a fork, threads do not survive it
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid != pid:
+                self.listener = QueueListener(self.queue, self.target)
+                self.listener.start()
+                self._pid = pid
+
+    def close(self):
+        # called by logging.shutdown at exit: write out what is queued
+        with self._start_lock:
+            if self._pid == os.getpid():
+                self.listener.stop()
+            self._pid = None
+        super().close()
+
+    def prepare(self, record):
+        # the queue never leaves the process, so the record needs no
+        # pickling; only resolve the message while args are still live
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+
+def parse_levels(spec):
+    """
+    Parse per-logger levels such as "djangoapp.restapis=DEBUG,django=INFO".
+
+    Returns:
+        dict: Logger names mapped to settings.LOGGING logger entries.
+    """
+    loggers = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        loggers[name.strip()] = {"level": level.strip().upper()}
+    return loggers
@@ -0,0 +1,113 @@
+"""
+Management command to store sentiment labels on existing reviews.
+
+Reviews posted before sentiment was stored on write have no label, so
+`get_dealer_reviews` still has to call the analyzer for them. This scores
+them once, in analyzer batches, stores the labels in the backend and
+counts them in the review statistics. With --all, labels that replace
+older ones are not counted, the statistics are rebuilt at the end.
+
+Usage:
+    python manage.py backfill_sentiments
+    python manage.py backfill_sentiments --dealer 15
+    python manage.py backfill_sentiments --all --batch-size 1000
+"""
+
+import math
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp.restapis import (
+    analyze_review_sentiments_batch,
+    iter_review_pages,
+    stored_sentiments,
+    update_review_sentiments,
+)
+from djangoapp.review_stats import rebuild, record_sentiments
+
+
+class Command(BaseCommand):
+    help = "Score reviews without a stored sentiment and store the labels."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dealer", type=int, help="Only backfill this dealer's reviews."
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rescore reviews that already have a sentiment too.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Reviews fetched, scored and stored per round trip.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        endpoint = "/fetchReviews"
+        if options["dealer"] is not None:
+            endpoint += f"/dealer/{options['dealer']}"
+        batch_size = options["batch_size"]
+        seen = pending = stored = failed = 0
+        # one backend page of reviews in memory at a time
+        for reviews in iter_review_pages(endpoint, batch_size):
+            if not isinstance(reviews, list):
+                raise CommandError("Could not fetch reviews from the backend.")
+            seen += len(reviews)
+            batch = [
+                review for review in reviews
+                if options["all"] or not review.get("sentiment")
+            ]
+            if not batch:
+                continue
+            pending += len(batch)
+            # a batch job, not bound by the request deadline
+            results = analyze_review_sentiments_batch(
+                [review["review"] for review in batch], deadline=math.inf
+            )
+            sentiments = {
+                review["id"]: result["sentiment"]
+                for review, result in zip(batch, results)
+                if "sentiment" in result
+            }
+            failed += len(batch) - len(sentiments)
+            if not sentiments:
+                continue
+            response = update_review_sentiments(
+                sentiments, overwrite=options["all"]
+            )
+            if response.get("Status") == 500:
+                failed += len(sentiments)
+                continue
+            stored += len(sentiments)
+            if not options["all"]:
+                # count only the reviews this run labelled
+                labelled = stored_sentiments(sentiments, response)
+                by_dealer = defaultdict(list)
+                for review in batch:
+                    if review["id"] in labelled:
+                        by_dealer[review["dealership"]].append(
+                            labelled[review["id"]]
+                        )
+                for dealer_id, labels in by_dealer.items():
+                    record_sentiments(dealer_id, labels)
+
+        if options["all"] and stored and rebuild(
+            options["dealer"], batch_size
+        ) is None:
+            self.stderr.write(
+                "Rebuilding the review statistics failed, "
+                "run rebuild_review_stats."
+            )
+        self.stdout.write(
+            f"Stored {stored} of {pending} sentiments "
+            f"({seen} reviews, {failed} failed) "
+            f"in {time.monotonic() - started:.1f}s."
+        )
+        if failed:
+            raise CommandError(f"{failed} reviews could not be scored.")
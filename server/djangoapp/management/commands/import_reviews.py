@@ -0,0 +1,91 @@
+"""
+Management command to import reviews into the backend in bulk.
+
+The file holds {"reviews": [...]} like database/data/reviews.json; ids
+in it are ignored, the backend hands out new ones. Reviews without a
+sentiment are scored in analyzer batches first, without the request
+deadline; those the analyzer could not score are imported unlabelled and
+reported. The stored reviews are added to the review statistics.
+
+Usage:
+    python manage.py import_reviews reviews.json
+    python manage.py import_reviews reviews.json --batch-size 5000
+    python manage.py import_reviews reviews.json --no-score
+"""
+
+import json
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from djangoapp.restapis import (
+    REVIEW_INSERT_BATCH_SIZE,
+    analyze_review_sentiments_batch,
+    post_reviews,
+)
+from djangoapp.review_stats import add_counts, count_reviews
+
+
+class Command(BaseCommand):
+    help = "Insert the reviews of a JSON file through the bulk endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON file with a reviews list.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REVIEW_INSERT_BATCH_SIZE,
+            help="Reviews inserted per backend request.",
+        )
+        parser.add_argument(
+            "--no-score",
+            action="store_true",
+            help="Import reviews without a sentiment unlabelled.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options["path"], encoding="utf-8") as fileobj:
+                reviews = json.load(fileobj)["reviews"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read reviews: {e}")
+        reviews = [
+            {key: value for key, value in review.items() if key != "id"}
+            for review in reviews
+        ]
+
+        unscored = [
+            review for review in reviews if not review.get("sentiment")
+        ]
+        if unscored and not options["no_score"]:
+            # however long the analyzer takes, a batch job has no deadline
+            results = analyze_review_sentiments_batch(
+                [review["review"] for review in unscored], deadline=math.inf
+            )
+            for review, result in zip(unscored, results):
+                if "sentiment" in result:
+                    review["sentiment"] = result["sentiment"]
+            failed = sum("sentiment" not in result for result in results)
+            if failed:
+                self.stderr.write(
+                    f"Could not score {failed} reviews, they are imported "
+                    "unlabelled; run backfill_sentiments afterwards."
+                )
+
+        response = post_reviews(reviews, options["batch_size"])
+        stored = response.get("reviews", [])
+        try:
+            add_counts(count_reviews(stored))
+        except DatabaseError:
+            self.stderr.write(
+                "Counting the reviews failed, run rebuild_review_stats."
+            )
+        self.stdout.write(
+            f"Imported {len(stored)} of {len(reviews)} reviews "
+            f"in {time.monotonic() - started:.1f}s."
+        )
+        if response.get("Status") == 500:
+            raise CommandError("Could not insert every review.")
@@ -0,0 +1,21 @@
+"""
+Management command to invalidate the cached dealer list.
+
+The dealer index of every app server reloads the list at its next
+refresh, within settings.DEALER_INDEX["REFRESH_INTERVAL"] seconds.
+
+Usage:
+    python manage.py invalidate_dealer_cache
+"""
+
+from django.core.management.base import BaseCommand
+
+from djangoapp.response_cache import invalidate_dealers
+
+
+class Command(BaseCommand):
+    help = "Invalidate the cached dealer list the dealer indexes load."
+
+    def handle(self, *args, **options):
+        invalidate_dealers()
+        self.stdout.write("Invalidated the cached dealer list.")
@@ -0,0 +1,48 @@
+"""
+Management command to bulk load the car make and car model catalog.
+
+Usage:
+    python manage.py load_catalog
+    python manage.py load_catalog database/data/car_records.json
+    python manage.py load_catalog models.csv --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp.loader import DEFAULT_BATCH_SIZE, iter_records, load_catalog
+from djangoapp.populate import iter_seed_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert car makes and models from a JSON, JSON Lines or CSV file, "
+        "or the built-in seed catalog when no file is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Catalog file to load.")
+        parser.add_argument(
+            "--format",
+            choices=["json", "jsonl", "csv"],
+            help="File format, guessed from the extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Records written per bulk statement.",
+        )
+
+    def handle(self, *args, **options):
+        if options["path"]:
+            records = iter_records(options["path"], options["format"])
+        else:
+            records = iter_seed_records()
+        try:
+            stats = load_catalog(records, batch_size=options["batch_size"])
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not load catalog: {e}") from e
+        self.stdout.write(
+            "Loaded {records} records ({makes} makes, {models} models) "
+            "in {seconds:.2f}s, {rows_per_sec:.0f} rows/sec".format(**stats)
+        )
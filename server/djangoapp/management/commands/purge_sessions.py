@@ -0,0 +1,76 @@
+"""
+Management command to delete expired sessions, once or on a schedule.
+
+Expired rows are deleted in small batches, so the command never holds
+the SQLite write lock for long while the app servers are writing.
+
+Usage:
+    python manage.py purge_sessions
+    python manage.py purge_sessions --interval 3600 --batch-size 500
+"""
+
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions of the configured session store."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Sessions deleted per statement.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Purge again every INTERVAL seconds until interrupted.",
+        )
+
+    def purge(self, batch_size):
+        """
+        Delete the expired sessions.
+
+        Returns:
+            int: Number of sessions deleted, None when the session store
+            expires sessions by itself.
+        """
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, "get_model_class"):
+            # cookie and cache stores have nothing to purge
+            store.clear_expired()
+            return None
+        expired = store.get_model_class().objects.filter(
+            expire_date__lt=timezone.now()
+        )
+        deleted = 0
+        while True:
+            keys = list(
+                expired.values_list("session_key", flat=True)[:batch_size]
+            )
+            if not keys:
+                return deleted
+            deleted += expired.filter(session_key__in=keys).delete()[0]
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            deleted = self.purge(options["batch_size"])
+            if deleted is None:
+                self.stdout.write(
+                    f"{settings.SESSION_ENGINE} expires sessions itself."
+                )
+                return
+            self.stdout.write(
+                f"Deleted {deleted} expired sessions "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,60 @@
+"""
+Management command to recount the review statistics from the backend.
+
+The entrypoint runs it before starting the server, once the backend
+answers, which counts the seed data. Run it again after the Node backend
+restarted: it loads the seed data again and drops the reviews posted
+since, which the counters still include. Reviews posted during a rebuild
+are not counted, so run it while none are posted.
+
+Usage:
+    python manage.py rebuild_review_stats
+    python manage.py rebuild_review_stats --dealer 15
+    python manage.py rebuild_review_stats --wait 600
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp.review_stats import rebuild
+
+# seconds between attempts while waiting for the backend
+RETRY_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = "Recount the per-dealer review statistics from the backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dealer", type=int, help="Only recount this dealer's reviews."
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=1000,
+            help="Reviews fetched per backend request.",
+        )
+        parser.add_argument(
+            "--wait",
+            type=float,
+            default=0,
+            help="Seconds to keep retrying while the backend is down.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = rebuild(options["dealer"], options["page_size"])
+        while stats is None and (
+            time.monotonic() - started < options["wait"]
+        ):
+            time.sleep(RETRY_INTERVAL)
+            stats = rebuild(options["dealer"], options["page_size"])
+        if stats is None:
+            raise CommandError("Could not fetch reviews from the backend.")
+        self.stdout.write(
+            f"Counted {stats['reviews']} reviews of {stats['dealers']} "
+            f"dealers into {stats['counters']} counters "
+            f"in {time.monotonic() - started:.1f}s."
+        )
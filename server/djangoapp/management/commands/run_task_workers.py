@@ -0,0 +1,53 @@
+"""
+Management command to run background task workers in their own process.
+
+Usage:
+    python manage.py run_task_workers
+    python manage.py run_task_workers --threads 4
+    python manage.py run_task_workers --burst
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from djangoapp.taskqueue import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.TASKS["THREADS"],
+            help="Number of worker threads.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Run the due tasks in this thread, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        config = settings.TASKS
+        worker = Worker(
+            threads=options["threads"],
+            poll_interval=config["POLL_INTERVAL"],
+            lease=config["LEASE"],
+        )
+        if options["burst"]:
+            worker.run_until_empty()
+            return
+        worker.start()
+        self.stdout.write(
+            f"Running background tasks with {options['threads']} threads."
+        )
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the running tasks.")
+            worker.stop()
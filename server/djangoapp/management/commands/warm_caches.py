@@ -0,0 +1,71 @@
+"""
+Management command to warm the dealer page caches, once or on a schedule.
+
+Usage:
+    python manage.py warm_caches
+    python manage.py warm_caches --concurrency 8
+    python manage.py warm_caches --interval 600
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoapp.warmer import local_caches, warm_caches
+
+
+class Command(BaseCommand):
+    help = (
+        "Prefetch the dealer list and the review sentiments "
+        "of every dealer into the shared caches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Dealers warmed at once.",
+        )
+        parser.add_argument(
+            "--deadline",
+            type=float,
+            default=600.0,
+            help="Seconds allowed for one run.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Run again every INTERVAL seconds until interrupted.",
+        )
+
+    def handle(self, *args, **options):
+        local = local_caches()
+        if local:
+            self.stderr.write(
+                "Not shared with the app servers, only this process "
+                f"benefits: {', '.join(local)}. Set SHARED_CACHE_DIR and "
+                "SENTIMENT_SHARED_CACHE to share them."
+            )
+        while True:
+            try:
+                stats = warm_caches(
+                    options["concurrency"], options["deadline"]
+                )
+            except RuntimeError as e:
+                if options["interval"] is None:
+                    raise CommandError(str(e))
+                # a scheduled run tries again at the next interval
+                self.stderr.write(str(e))
+                time.sleep(options["interval"])
+                continue
+            self.stdout.write(
+                f"Warmed {stats['dealers_warmed']}/{stats['dealers']} "
+                f"dealers ({stats['coverage']:.0%} coverage), "
+                f"scored {stats['scored']} of {stats['reviews']} reviews "
+                f"({stats['unscored']} unscored) "
+                f"in {stats['seconds']:.1f}s."
+            )
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,450 @@
+"""
+In-process metrics for the dealership Django application.
+
+Provides thread-safe counters and histograms rendered in the Prometheus
+text exposition format by the `/djangoapp/metrics` view, plus a per-request
+timing context used to build the `Server-Timing` response header.
+
+Values are kept per worker process. With settings.METRICS["DIR"] set,
+every worker writes its samples to its own file there every
+FLUSH_INTERVAL seconds, and the worker answering a scrape sums the
+counters and histograms of all the files, so one scrape covers the whole
+pod. Without it a scrape only shows the worker that answered it.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\")
+                     .replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{%s}" % pairs
+
+
+def _sum_samples(workers):
+    # samples of the same name and labels added up, in first seen order
+    totals = {}
+    for samples in workers:
+        for name, labels, value in samples:
+            key = (name, tuple(labels))
+            totals[key] = totals.get(key, 0) + value
+    for (name, labels), value in totals.items():
+        yield name, labels, value
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, labels, value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket counts, then the +Inf count and the sum
+                series = self._values[labels] = [0] * (len(self.buckets) + 1)
+                series.append(0.0)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {labels: list(s) for labels, s in self._values.items()}
+        for labels, series in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield self.name + "_bucket", labels + (bound,), cumulative
+            cumulative += series[len(self.buckets)]
+            yield self.name + "_bucket", labels + ("+Inf",), cumulative
+            yield self.name + "_count", labels, cumulative
+            yield self.name + "_sum", labels, series[-1]
+
+
+class Registry:
+    """Holds metrics and gauge callbacks and renders them for Prometheus."""
+
+    def __init__(self):
+        self._metrics = []
+        self._gauges = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def callback(
+        self,
+        name,
+        documentation,
+        labelnames,
+        collect,
+        kind="gauge",
+        per_process=False,
+    ):
+        """
+        Register a metric whose samples are computed at scrape time.
+
+        `collect` returns an iterable of (label values, value) pairs.
+        Set `per_process` when they describe the calling process, such as
+        its cache counters: aggregated scrapes then report them per worker
+        with a "worker" label. Other callbacks read state shared by all
+        workers and are only computed by the worker answering the scrape.
+        """
+        self._gauges.append(
+            (name, documentation, kind, tuple(labelnames), collect,
+             per_process)
+        )
+
+    def collect(self):
+        """Return the samples of this process as JSON serializable data."""
+        return {
+            "metrics": {
+                metric.name: [
+                    [name, list(labels), value]
+                    for name, labels, value in metric.samples()
+                ]
+                for metric in self._metrics
+            },
+            "callbacks": {
+                name: [[list(labels), value] for labels, value in collect()]
+                for name, _, _, _, collect, per_process in self._gauges
+                if per_process
+            },
+        }
+
+    def render(self, workers=None):
+        """
+        Return every metric in the Prometheus text format.
+
+        Args:
+            workers(dict, optional): `collect` results keyed by worker id,
+                see `collect_workers`. Counters and histograms are summed
+                over them. Defaults to the samples of this process only.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if workers is None:
+                samples = metric.samples()
+            else:
+                samples = _sum_samples(
+                    data["metrics"].get(metric.name, ())
+                    for data in workers.values()
+                )
+            for name, labels, value in samples:
+                names = metric.labelnames
+                if name.endswith("_bucket"):
+                    names = names + ("le",)
+                lines.append(
+                    f"{name}{_format_labels(names, labels)} {value}"
+                )
+        for (
+            name, documentation, kind, labelnames, collect, per_process
+        ) in self._gauges:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            if workers is None or not per_process:
+                samples = collect()
+            else:
+                labelnames = labelnames + ("worker",)
+                samples = [
+                    (tuple(labels) + (worker,), value)
+                    for worker, data in sorted(workers.items())
+                    for labels, value in data.get("callbacks", {}).get(
+                        name, ()
+                    )
+                ]
+            for labels, value in samples:
+                lines.append(
+                    f"{name}{_format_labels(labelnames, labels)} {value}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.histogram(
+    "django_http_request_duration_seconds",
+    "Latency of Django views.",
+    ("view", "method"),
+)
+requests_total = registry.counter(
+    "django_http_requests_total",
+    "Requests handled by Django views.",
+    ("view", "method", "status"),
+)
+db_queries = registry.histogram(
+    "django_db_queries_per_request",
+    "ORM queries executed per request.",
+    ("view",),
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100),
+)
+upstream_duration = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to upstream services.",
+    ("upstream", "method"),
+)
+upstream_requests = registry.counter(
+    "upstream_requests_total",
+    "Calls to upstream services by outcome (status code or error).",
+    ("upstream", "method", "outcome"),
+)
+
+
+# stats() callables of the caches, keyed by cache name
+_caches = {}
+
+
+def register_cache(name, stats):
+    """
+    Expose a cache's counters.
+
+    `stats` returns a dict of event counts; "hits", "stale_hits" and
+    "shared_hits" count as hits and "misses" as misses for the ratio.
+    """
+    _caches[name] = stats
+
+
+def _collect_cache_events():
+    for name, stats in sorted(_caches.items()):
+        for event, value in sorted(stats().items()):
+            if event not in ("size", "max_entries"):
+                yield (name, event), value
+
+
+def _collect_cache_ratios():
+    for name, stats in sorted(_caches.items()):
+        values = stats()
+        hits = sum(
+            values.get(event, 0)
+            for event in ("hits", "stale_hits", "shared_hits")
+        )
+        lookups = hits + values.get("misses", 0)
+        yield (name,), hits / lookups if lookups else 0.0
+
+
+registry.callback(
+    "cache_events_total",
+    "Cache lookups and evictions by event.",
+    ("cache", "event"),
+    _collect_cache_events,
+    kind="counter",
+    per_process=True,
+)
+registry.callback(
+    "cache_hit_ratio",
+    "Share of cache lookups answered from the cache.",
+    ("cache",),
+    _collect_cache_ratios,
+    per_process=True,
+)
+
+
+# id of this process's samples file, set once it publishes
+_worker_id = None
+_worker_pid = None
+_publish_lock = threading.Lock()
+
+
+def publish():
+    """Write the samples of this process to its file in METRICS["DIR"]."""
+    path = os.path.join(settings.METRICS["DIR"], _worker_id + ".json")
+    data = dict(registry.collect(), written=time.time())
+    # written aside and renamed, readers never see a partial file
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(path + ".tmp", path)
+
+
+def _publish_quietly():
+    try:
+        publish()
+    except (OSError, ValueError):
+        logger.warning("Could not publish metrics", exc_info=True)
+
+
+def _publish_loop(interval):
+    while True:
+        time.sleep(interval)
+        _publish_quietly()
+
+
+def start_publishing():
+    """
+    Start publishing the samples of this process, once per process.
+
+    Does nothing unless METRICS["DIR"] is set. The file name carries a
+    random part, so a later process reusing the pid never overwrites the
+    totals of an exited one.
+    """
+    global _worker_id, _worker_pid
+    config = settings.METRICS
+    pid = os.getpid()
+    if not config["DIR"] or _worker_pid == pid:
+        return
+    with _publish_lock:
+        if _worker_pid == pid:
+            return
+        os.makedirs(config["DIR"], exist_ok=True)
+        _worker_id = f"{pid}-{uuid.uuid4().hex[:8]}"
+        _worker_pid = pid
+        threading.Thread(
+            target=_publish_loop,
+            args=(config["FLUSH_INTERVAL"],),
+            name="metrics-publisher",
+            daemon=True,
+        ).start()
+        # the last samples of a worker shutting down are kept too
+        atexit.register(_publish_quietly)
+
+
+def collect_workers():
+    """
+    Return the published samples of every worker, keyed by worker id.
+
+    Workers that have not published for three flush intervals have
+    exited: their per process callback samples are dropped, but their
+    counters and histograms still count, so totals never go down.
+    """
+    config = settings.METRICS
+    stale = time.time() - 3 * config["FLUSH_INTERVAL"]
+    workers = {}
+    for entry in os.scandir(config["DIR"]):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if data["written"] < stale:
+            data.pop("callbacks", None)
+        workers[entry.name[:-len(".json")]] = data
+    return workers
+
+
+def render_all():
+    """
+    Return the metrics of every worker when METRICS["DIR"] is set,
+    otherwise those of this process, in the Prometheus text format.
+    """
+    if not settings.METRICS["DIR"]:
+        return registry.render()
+    start_publishing()
+    # the answering worker's own samples are current, not a flush old
+    publish()
+    return registry.render(collect_workers())
+
+
+# per-request accumulators for the Server-Timing header
+_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request_timings():
+    """Begin collecting timings for the current request."""
+    timings = {}
+    return timings, _timings.set(timings)
+
+
+def end_request_timings(token):
+    _timings.reset(token)
+
+
+def add_timing(name, seconds):
+    """Add to the named total of the current request, if one is active."""
+    timings = _timings.get()
+    if timings is not None:
+        count, total = timings.get(name, (0, 0.0))
+        timings[name] = (count + 1, total + seconds)
+
+
+@contextmanager
+def upstream_call(upstream, method):
+    """
+    Time one call to an upstream service.
+
+    Yields a dict whose "outcome" the caller sets to the response status
+    code or to an error label; it defaults to "error".
+    """
+    result = {"outcome": "error"}
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        elapsed = time.perf_counter() - started
+        upstream_duration.observe(elapsed, upstream, method)
+        upstream_requests.inc(upstream, method, str(result["outcome"]))
+        add_timing(upstream, elapsed)
+
+
+def server_timing_header(timings, total):
+    """Format request timings as a Server-Timing header value."""
+    parts = [
+        f'{name};dur={seconds * 1000:.1f};desc="{count} calls"'
+        for name, (count, seconds) in sorted(timings.items())
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
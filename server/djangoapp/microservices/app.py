@@ -1,37 +1,116 @@
-from flask import Flask, jsonify
+import logging
+import os
+
+import nltk
+from flask import Flask, jsonify, request
 from nltk.sentiment import SentimentIntensityAnalyzer
+
+from scoring import BatchScorer
+
 app = Flask("Sentiment Analyzer")
 
-sia = SentimentIntensityAnalyzer()
+# SENTI_LOG_LEVEL=DEBUG logs the scores of every /analyze call
+logging.basicConfig(
+    level=os.getenv("SENTI_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
+logger = logging.getLogger(__name__)
 
+# fall back to the lexicon bundled in ./sentiment/vader_lexicon.zip
+nltk.data.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-@app.get('/')
-def home():
-    return "Welcome to the Sentiment Analyzer. \
-    Use /analyze/text to get the sentiment"
+# Loaded at import: under gunicorn --preload this happens once in the
+# master, and the workers share the lexicon pages copy-on-write.
+sia = SentimentIntensityAnalyzer()
+# vectorized scoring of whole batches, same scores as sia.polarity_scores
+scorer = BatchScorer(sia)
 
+# upper bound on texts accepted by a single /analyze_batch call
+MAX_BATCH_SIZE = 1000
 
-@app.get('/analyze/<input_txt>')
-def analyze_sentiment(input_txt):
 
-    scores = sia.polarity_scores(input_txt)
-    print(scores)
+def label_scores(scores):
+    """Pick the dominant pos/neg/neu label from VADER polarity scores."""
     pos = float(scores['pos'])
     neg = float(scores['neg'])
     neu = float(scores['neu'])
     res = "positive"
-    print("pos neg nue ", pos, neg, neu)
     if (neg > pos and neg > neu):
         res = "negative"
     elif (neu > neg and neu > pos):
         res = "neutral"
+    return res
+
+
+@app.get('/')
+def home():
+    return "Welcome to the Sentiment Analyzer. \
+    Use /analyze/text to get the sentiment"
+
+
+# texts scored by the readiness probe and the labels they must get
+PROBE_TEXTS = {
+    "This dealer was great, I love my new car.": "positive",
+    "Terrible service, the worst dealer ever.": "negative",
+}
+
+
+@app.get('/ready')
+def ready():
+    """
+    Readiness probe, OK only once both scoring paths label the probe
+    texts as expected.
+    """
+    texts = list(PROBE_TEXTS)
+    expected = list(PROBE_TEXTS.values())
+    try:
+        single = [label_scores(sia.polarity_scores(text)) for text in texts]
+        batch = [
+            label_scores(scores) for scores in scorer.polarity_scores(texts)
+        ]
+    except Exception as e:
+        return jsonify({"status": "unavailable", "error": str(e)}), 503
+    if single != expected or batch != expected:
+        return jsonify({"status": "unavailable"}), 503
+    return jsonify({"status": "ready", "lexicon_size": len(sia.lexicon)})
+
+
+@app.get('/analyze/<input_txt>')
+def analyze_sentiment(input_txt):
+
+    scores = sia.polarity_scores(input_txt)
+    res = label_scores(scores)
     # This is sending text/html response
     # res = json.dumps({"sentiment": res})
     # return res
-    print(res)
+    logger.debug("Scored text as %s: %s", res, scores)
     # Proper JSON response
     return jsonify({"sentiment": res})
 
 
+@app.post('/analyze_batch')
+def analyze_batch():
+    """
+    Score a list of texts in one call.
+
+    Expects a JSON body {"texts": ["...", ...]} and returns
+    {"sentiments": [{"sentiment": "..."}, ...]} in the same order.
+    """
+    data = request.get_json(silent=True) or {}
+    texts = data.get("texts")
+    if not isinstance(texts, list):
+        return jsonify({"error": "Expected a JSON list under 'texts'"}), 400
+    if len(texts) > MAX_BATCH_SIZE:
+        return jsonify(
+            {"error": f"At most {MAX_BATCH_SIZE} texts per batch"}
+        ), 413
+
+    sentiments = [
+        {"sentiment": label_scores(scores)}
+        for scores in scorer.polarity_scores(texts)
+    ]
+    return jsonify({"sentiments": sentiments})
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,30 @@
+"""
+Gunicorn settings for the sentiment analyzer.
+
+The app is preloaded so the VADER lexicon is built once in the master
+process and shared copy-on-write by the forked workers. Worker and thread
+counts, timeouts and the bind address come from the environment.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("SENTI_BIND", "0.0.0.0:5050")
+preload_app = True
+# scoring is CPU bound, one process per core does the work
+workers = int(os.getenv("SENTI_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.getenv("SENTI_THREADS", 2))
+timeout = int(os.getenv("SENTI_TIMEOUT", 30))
+# time a worker gets to finish in-flight requests after SIGTERM
+graceful_timeout = int(os.getenv("SENTI_GRACEFUL_TIMEOUT", 20))
+keepalive = int(os.getenv("SENTI_KEEPALIVE", 5))
+accesslog = os.getenv("SENTI_ACCESS_LOG") or None
+
+
+def when_ready(server):
+    # Move the preloaded objects out of the collector's reach, so garbage
+    # collection in the workers does not write to (and copy) shared pages.
+    gc.freeze()
+    server.log.info(
+        "Sentiment analyzer preloaded, %s workers", server.cfg.workers
+    )
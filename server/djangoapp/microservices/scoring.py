@@ -0,0 +1,304 @@
+"""
+Batch VADER scoring for the sentiment analyzer.
+
+`BatchScorer.polarity_scores` returns the same scores as
+`SentimentIntensityAnalyzer.polarity_scores`, but for a whole list of
+texts at once. Texts are tokenized in one pass without VADER's per-text
+punctuation product. Every distinct token is looked up in the lexicon only
+once per batch. The valence rules (caps emphasis, boosters, negation,
+"least", "but" and punctuation emphasis) then run as NumPy array operations
+over the flattened tokens of the batch.
+
+The few texts containing a special-case idiom or a multi-word booster
+("kind of", "yeah right", ...) are scored by the analyzer itself.
+"""
+
+import string
+
+import numpy as np
+
+# characters VADER strips from the edges of tokens
+PUNCTUATION = frozenset(string.punctuation)
+
+
+class BatchScorer:
+    """
+    Vectorized equivalent of `SentimentIntensityAnalyzer.polarity_scores`.
+
+    Args:
+        analyzer(SentimentIntensityAnalyzer): Loaded analyzer whose lexicon
+            and constants are used, and which scores the idiom texts.
+    """
+
+    def __init__(self, analyzer):
+        constants = analyzer.constants
+        self.analyzer = analyzer
+        self.lexicon = analyzer.lexicon
+        self.boosters = constants.BOOSTER_DICT
+        self.negations = frozenset(constants.NEGATE)
+        self.punctuation = frozenset(constants.PUNC_LIST)
+        self.n_scalar = constants.N_SCALAR
+        self.c_incr = constants.C_INCR
+        # phrases handled by the analyzer's sequential idiom check
+        self.phrases = tuple(constants.SPECIAL_CASE_IDIOMS) + tuple(
+            phrase for phrase in self.boosters if " " in phrase
+        )
+
+    def tokenize(self, text):
+        """Split a text into VADER's words and emoticons."""
+        tokens = []
+        for token in text.split():
+            if len(token) < 2:
+                continue
+            if token[0] in PUNCTUATION or token[-1] in PUNCTUATION:
+                token = self._strip(token)
+            tokens.append(token)
+        return tokens
+
+    def _strip(self, token):
+        # VADER only removes a PUNC_LIST run from a word that has no other
+        # punctuation, so "cat!!" becomes "cat" but "(cat" and "'cat'" stay
+        start = 0
+        while start < len(token) and token[start] in PUNCTUATION:
+            start += 1
+        if start:
+            head, word = token[:start], token[start:]
+        else:
+            end = len(token)
+            while token[end - 1] in PUNCTUATION:
+                end -= 1
+            word, head = token[:end], token[end:]
+        if (
+            head in self.punctuation
+            and len(word) > 1
+            and not PUNCTUATION.intersection(word)
+        ):
+            return word
+        return token
+
+    def _token_arrays(self, words):
+        """Per distinct token attributes, indexed by token id."""
+        lowers = [word.lower() for word in words]
+        lexicon = self.lexicon
+        boosters = self.boosters
+        negations = self.negations
+        return {
+            "valence": np.array([lexicon.get(w, 0.0) for w in lowers]),
+            "in_lexicon": np.array([w in lexicon for w in lowers], bool),
+            "booster": np.array([boosters.get(w, 0.0) for w in lowers]),
+            "is_booster": np.array([w in boosters for w in lowers], bool),
+            "upper": np.array([word.isupper() for word in words], bool),
+            "negated": np.array(
+                [w in negations or "n't" in w for w in lowers], bool
+            ),
+            "never": np.array([word == "never" for word in words], bool),
+            "so_this": np.array(
+                [word in ("so", "this") for word in words], bool
+            ),
+            "least": np.array([w == "least" for w in lowers], bool),
+            "at_very": np.array([w in ("at", "very") for w in lowers], bool),
+            "kind": np.array([w == "kind" for w in lowers], bool),
+            "of": np.array([w == "of" for w in lowers], bool),
+            "but": np.array([w == "but" for w in lowers], bool),
+        }
+
+    def polarity_scores(self, texts):
+        """
+        Score many texts at once.
+
+        Returns:
+            list: One {"neg", "neu", "pos", "compound"} dict per text, in
+            order, equal to what `polarity_scores` returns for the text.
+        """
+        texts = [str(text) for text in texts]
+        if not texts:
+            return []
+
+        vocabulary = {}
+        ids = []
+        first = []
+        lengths = []
+        cap_diff = []
+        fallback = []
+        for n, text in enumerate(texts):
+            tokens = self.tokenize(text)
+            joined = " ".join(tokens)
+            if any(phrase in joined for phrase in self.phrases):
+                fallback.append(n)
+                tokens = []
+            start = len(ids)
+            seen = {}
+            capitals = 0
+            for position, token in enumerate(tokens):
+                # VADER scores every repeat of a token in the context of
+                # its first occurrence
+                first.append(start + seen.setdefault(token, position))
+                ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                capitals += token.isupper()
+            lengths.append(len(tokens))
+            cap_diff.append(0 < len(tokens) - capitals < len(tokens))
+
+        lengths = np.array(lengths)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        sentiments = self._sentiments(
+            vocabulary, np.array(ids, int), np.array(first, int),
+            starts, lengths, np.array(cap_diff, bool),
+        )
+        scores = self._score(sentiments, starts, lengths, texts)
+        for n in fallback:
+            scores[n] = self.analyzer.polarity_scores(texts[n])
+        return scores
+
+    def _sentiments(self, vocabulary, ids, first, starts, lengths, cap_diff):
+        """Valence of every token of the batch, flattened."""
+        size = len(ids)
+        if not size:
+            return np.zeros(0)
+        tokens = self._token_arrays(list(vocabulary))
+        text_of = np.repeat(np.arange(len(lengths)), lengths)
+        local = np.arange(size) - starts[text_of]
+        cap_diff = cap_diff[text_of]
+
+        def at(name, offset):
+            # attribute of the token `offset` positions before each token
+            # (after it for negative offsets), False where there is none
+            if offset > 0:
+                exists = local >= offset
+            else:
+                exists = local < lengths[text_of] + offset
+            index = np.where(exists, np.arange(size) - offset, 0)
+            value = tokens[name][ids[index]]
+            if value.dtype == bool:
+                value &= exists
+            return value, exists
+
+        n_scalar = self.n_scalar
+        c_incr = self.c_incr
+        valence = tokens["valence"][ids]
+        emphasis = tokens["upper"][ids] & cap_diff
+        valence = np.where(
+            emphasis,
+            np.where(valence > 0, valence + c_incr, valence - c_incr),
+            valence,
+        )
+
+        negated = {k: at("negated", k)[0] for k in (1, 2, 3)}
+        so_this = {k: at("so_this", k)[0] for k in (1, 2)}
+        for start_i, damping in enumerate((1.0, 0.95, 0.9)):
+            offset = start_i + 1
+            in_lexicon, exists = at("in_lexicon", offset)
+            applies = exists & ~in_lexicon
+
+            scalar = at("booster", offset)[0]
+            scalar = np.where(valence < 0, -scalar, scalar)
+            emphasis = (
+                at("is_booster", offset)[0]
+                & at("upper", offset)[0]
+                & cap_diff
+            )
+            scalar = np.where(
+                emphasis,
+                np.where(valence > 0, scalar + c_incr, scalar - c_incr),
+                scalar,
+            )
+            if damping != 1.0:
+                scalar = scalar * damping
+            valence = np.where(applies, valence + scalar, valence)
+
+            # the _never_check of each distance
+            if start_i == 0:
+                factor = np.where(negated[1], n_scalar, 1.0)
+            elif start_i == 1:
+                factor = np.where(
+                    at("never", 2)[0] & so_this[1],
+                    1.5,
+                    np.where(negated[2], n_scalar, 1.0),
+                )
+            else:
+                factor = np.where(
+                    at("never", 3)[0] & so_this[2] | so_this[1],
+                    1.25,
+                    np.where(negated[3], n_scalar, 1.0),
+                )
+            valence = np.where(applies, valence * factor, valence)
+
+        least = at("least", 1)[0] & ~at("in_lexicon", 1)[0]
+        least &= ~at("at_very", 2)[0]
+        valence = np.where(least, valence * n_scalar, valence)
+
+        skipped = tokens["is_booster"][ids] | (
+            tokens["kind"][ids] & at("of", -1)[0]
+        )
+        scored = tokens["in_lexicon"][ids] & ~skipped
+        sentiments = np.where(scored, valence, 0.0)[first]
+
+        # _but_check, relative to the first "but" of each text
+        is_but = tokens["but"][ids]
+        but_at = np.full(len(lengths), size)
+        np.minimum.at(but_at, text_of[is_but], local[is_but])
+        but_at = but_at[text_of]
+        has_but = but_at < size
+        sentiments = np.where(
+            has_but & (local < but_at), sentiments * 0.5, sentiments
+        )
+        sentiments = np.where(
+            has_but & (local > but_at), sentiments * 1.5, sentiments
+        )
+        return sentiments
+
+    def _score(self, sentiments, starts, lengths, texts):
+        """Aggregate token valences into rounded per-text scores."""
+        count = len(lengths)
+        sum_s = np.zeros(count)
+        pos_sum = np.zeros(count)
+        neg_sum = np.zeros(count)
+        neu_count = np.zeros(count)
+        # accumulate position by position, so every text is summed left to
+        # right exactly like VADER's float sums
+        for position in range(int(lengths.max(initial=0))):
+            live = np.flatnonzero(lengths > position)
+            values = sentiments[starts[live] + position]
+            sum_s[live] += values
+            pos_sum[live] += np.where(values > 0, values + 1, 0.0)
+            neg_sum[live] += np.where(values < 0, values - 1, 0.0)
+            neu_count[live] += values == 0
+
+        exclamations = np.array([text.count("!") for text in texts])
+        questions = np.array([text.count("?") for text in texts])
+        amplifier = np.minimum(exclamations, 4) * 0.292 + np.where(
+            questions > 1,
+            np.where(questions <= 3, questions * 0.18, 0.96),
+            0.0,
+        )
+
+        sum_s = np.where(
+            sum_s > 0,
+            sum_s + amplifier,
+            np.where(sum_s < 0, sum_s - amplifier, sum_s),
+        )
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+
+        pos_larger = pos_sum > np.fabs(neg_sum)
+        neg_larger = pos_sum < np.fabs(neg_sum)
+        pos_sum = np.where(pos_larger, pos_sum + amplifier, pos_sum)
+        neg_sum = np.where(neg_larger, neg_sum - amplifier, neg_sum)
+
+        scored = lengths > 0
+        total = np.where(scored, pos_sum + np.fabs(neg_sum) + neu_count, 1.0)
+        pos = np.where(scored, np.fabs(pos_sum / total), 0.0)
+        neg = np.where(scored, np.fabs(neg_sum / total), 0.0)
+        neu = np.where(scored, np.fabs(neu_count / total), 0.0)
+        compound = np.where(scored, compound, 0.0)
+
+        # python's round, not numpy's, to match VADER to the last digit
+        return [
+            {
+                "neg": round(n, 3),
+                "neu": round(u, 3),
+                "pos": round(p, 3),
+                "compound": round(c, 4),
+            }
+            for n, u, p, c in zip(
+                neg.tolist(), neu.tolist(), pos.tolist(), compound.tolist()
+            )
+        ]
@@ -0,0 +1,6 @@
+"""
+WSGI entry point of the sentiment analyzer for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app  # noqa: F401
@@ -0,0 +1,116 @@
+"""
+Middleware for the dealership Django application.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+from .compression import (
+    compress,
+    compress_stream,
+    compressed_bodies,
+    is_compressible,
+    negotiate,
+)
+
+
+class TimingMiddleware:
+    """
+    Record per-view latency and ORM query counts, and add a
+    Server-Timing header listing database and upstream time.
+
+    Must be the first entry of settings.MIDDLEWARE so the measured
+    latency covers the rest of the middleware stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # built once per worker process, after the fork
+        metrics.start_publishing()
+
+    def __call__(self, request):
+        timings, token = metrics.start_request_timings()
+
+        def time_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                metrics.add_timing("db", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(time_query):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request_timings(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.route if match is not None else "unresolved"
+        metrics.request_duration.observe(elapsed, view, request.method)
+        metrics.requests_total.inc(
+            view, request.method, str(response.status_code)
+        )
+        metrics.db_queries.observe(timings.get("db", (0, 0.0))[0], view)
+        response["Server-Timing"] = metrics.server_timing_header(
+            timings, elapsed
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compress JSON and text responses with gzip or brotli, whichever the
+    client accepts and settings.HTTP_CACHE prefers.
+
+    Bodies shorter than COMPRESS_MIN_SIZE are sent as they are. Bodies
+    with an ETag are compressed once and served from a cache afterwards,
+    streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code == 304:
+            # caches must keep the variants of a revalidated body apart
+            patch_vary_headers(response, ("Accept-Encoding",))
+            return response
+        if (
+            response.status_code != 200
+            or response.has_header("Content-Encoding")
+            or not is_compressible(response)
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not response.streaming and (
+            len(response.content) < settings.HTTP_CACHE["COMPRESS_MIN_SIZE"]
+        ):
+            return response
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response["Content-Length"]
+        else:
+            etag = response.get("ETag")
+            if etag:
+                body = compressed_bodies.get(etag, encoding, response.content)
+            else:
+                body = compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarMake',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('description', models.CharField(max_length=300)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CarModel',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('type', models.CharField(
+                    choices=[
+                        ('SEDAN', 'sedan'), ('SUV', 'suv'),
+                        ('HATCHBACK', 'hatchback'), ('WAGON', 'wagon'),
+                    ],
+                    default='SEDAN', max_length=20)),
+                ('year', models.IntegerField(validators=[
+                    django.core.validators.MinValueValidator(2015),
+                    django.core.validators.MaxValueValidator(2023),
+                ])),
+                ('car_make', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to='djangoapp.carmake')),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carmake',
+            index=models.Index(fields=['name'], name='carmake_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carmodel',
+            index=models.Index(
+                fields=['car_make', 'type', 'year', 'id'],
+                name='carmodel_make_type_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carmodel',
+            index=models.Index(
+                fields=['type', 'year', 'id'],
+                name='carmodel_type_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carmodel',
+            index=models.Index(
+                fields=['year', 'id'], name='carmodel_year_idx'),
+        ),
+    ]
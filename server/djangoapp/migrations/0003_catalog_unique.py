@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Merge rows the old lazy seeding may have inserted twice,
+    so the unique constraints below can be created.
+    """
+    CarMake = apps.get_model('djangoapp', 'CarMake')
+    CarModel = apps.get_model('djangoapp', 'CarModel')
+
+    kept_makes = {}
+    for make in CarMake.objects.order_by('id'):
+        kept = kept_makes.setdefault(make.name, make.id)
+        if kept != make.id:
+            CarModel.objects.filter(car_make_id=make.id).update(
+                car_make_id=kept)
+            make.delete()
+
+    seen_models = set()
+    for car_model in CarModel.objects.order_by('id'):
+        key = (car_model.car_make_id, car_model.name, car_model.year)
+        if key in seen_models:
+            car_model.delete()
+        else:
+            seen_models.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0002_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='carmake',
+            name='carmake_name_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='carmake',
+            constraint=models.UniqueConstraint(
+                fields=('name',), name='carmake_unique_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='carmodel',
+            constraint=models.UniqueConstraint(
+                fields=('car_make', 'name', 'year'),
+                name='carmodel_unique_make_name_year'),
+        ),
+    ]
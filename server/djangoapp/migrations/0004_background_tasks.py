@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0003_catalog_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundTask',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('dedup_key', models.CharField(
+                    blank=True, max_length=200, null=True)),
+                ('status', models.CharField(
+                    choices=[('pending', 'pending'), ('running', 'running'),
+                             ('failed', 'failed')],
+                    default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(
+                    default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        fields=['status', 'run_after'],
+                        name='task_status_run_after_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(
+                        condition=models.Q(
+                            ('status__in', ['pending', 'running'])),
+                        fields=('dedup_key',),
+                        name='task_unique_active_dedup_key'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Make non-empty emails unique, so two concurrent registrations with
+    the same email cannot both succeed. The registration view checks
+    first; this index settles the race.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('djangoapp', '0004_background_tasks'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX IF NOT EXISTS auth_user_email_unique "
+            "ON auth_user (email) WHERE email <> ''",
+            reverse_sql="DROP INDEX IF EXISTS auth_user_email_unique",
+        ),
+    ]
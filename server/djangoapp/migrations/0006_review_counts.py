@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0005_auth_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewCount',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID')),
+                ('dealer_id', models.PositiveIntegerField()),
+                ('facet', models.CharField(
+                    choices=[('total', 'total'), ('purchase', 'purchase'),
+                             ('sentiment', 'sentiment'),
+                             ('car_make', 'car make'),
+                             ('car_year', 'car year')],
+                    max_length=20)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('dealer_id', 'facet', 'value'),
+                        name='reviewcount_unique_facet_value'),
+                ],
+            },
+        ),
+    ]
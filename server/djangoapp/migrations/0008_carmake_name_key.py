@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def fill_name_keys(apps, schema_editor):
+    """
+    Store the case-folded name of every make, merging makes whose names
+    only differ in letter case, so the unique constraint below can be
+    created.
+    """
+    CarMake = apps.get_model('djangoapp', 'CarMake')
+    CarModel = apps.get_model('djangoapp', 'CarModel')
+
+    kept_makes = {}
+    for make in CarMake.objects.order_by('id'):
+        key = make.name.strip().casefold()
+        kept = kept_makes.setdefault(key, make.id)
+        if kept == make.id:
+            CarMake.objects.filter(id=make.id).update(name_key=key)
+            continue
+        existing = set(
+            CarModel.objects.filter(car_make_id=kept)
+            .values_list('name', 'year'))
+        for car_model in CarModel.objects.filter(car_make_id=make.id):
+            if (car_model.name, car_model.year) in existing:
+                car_model.delete()
+            else:
+                car_model.car_make_id = kept
+                car_model.save(update_fields=['car_make'])
+                existing.add((car_model.name, car_model.year))
+        make.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoapp', '0007_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carmake',
+            name='name_key',
+            field=models.CharField(
+                default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='carmake',
+            name='carmake_unique_name',
+        ),
+        migrations.AddConstraint(
+            model_name='carmake',
+            constraint=models.UniqueConstraint(
+                fields=('name_key',), name='carmake_unique_name_key'),
+        ),
+    ]
@@ -1,12 +1,14 @@
 """
 Django models for the dealership application.
 
-Defines database schema for car makes and car models
+Defines database schema for car makes and car models, the catalog
+version, the durable queue of background tasks and the review counters.
 Each class represents a table in the database and includes fields
 for storing relevant attributes.
 """
 
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 
@@ -19,6 +21,28 @@ class CarMake(models.Model):
 
     name = models.CharField(max_length=50, blank=False, null=False)
     description = models.CharField(max_length=300, blank=False, null=False)
+    # name in any letter case, see key_for
+    name_key = models.CharField(max_length=100, editable=False)
+
+    class Meta:
+        constraints = [
+            # makes are looked up and upserted by their case-folded name
+            models.UniqueConstraint(
+                fields=["name_key"], name="carmake_unique_name_key"
+            ),
+        ]
+
+    @staticmethod
+    def key_for(name):
+        """Return the name_key of a make name, the same for all cases."""
+        return name.strip().casefold()
+
+    def save(self, *args, **kwargs):
+        self.name_key = self.key_for(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_key"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return str(self.name)
@@ -46,5 +70,129 @@ class CarModel(models.Model):
         validators=[MinValueValidator(2015), MaxValueValidator(2023)]
     )
 
+    class Meta:
+        # catalog filters end in an id range for keyset pagination
+        indexes = [
+            models.Index(
+                fields=["car_make", "type", "year", "id"],
+                name="carmodel_make_type_year_idx",
+            ),
+            models.Index(
+                fields=["type", "year", "id"], name="carmodel_type_year_idx"
+            ),
+            models.Index(fields=["year", "id"], name="carmodel_year_idx"),
+        ]
+        constraints = [
+            # identity of a model when the catalog loader upserts it
+            models.UniqueConstraint(
+                fields=["car_make", "name", "year"],
+                name="carmodel_unique_make_name_year",
+            ),
+        ]
+
     def __str__(self):
         return str(self.name)
+
+
+class CatalogVersion(models.Model):
+    """
+    Represents the version of the car catalog.
+    A single row bumped with every car make or model change, so each
+    process can tell its cached catalog payload is outdated, see
+    djangoapp/catalog.py.
+    """
+
+    # primary key of the one row
+    ROW = 1
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"catalog version {self.version}"
+
+
+class BackgroundTask(models.Model):
+    """
+    Represents a unit of deferred work in the background task queue.
+    Stores the registered task name, its JSON arguments and retry state,
+    see djangoapp/taskqueue.py.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "pending"),
+        (RUNNING, "running"),
+        (FAILED, "failed"),
+    ]
+    name = models.CharField(max_length=100)
+    # {"args": [...], "kwargs": {...}} of the task call
+    payload = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # workers pick the oldest due pending task
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"],
+                name="task_status_run_after_idx",
+            ),
+        ]
+        constraints = [
+            # a key is queued at most once until its task has run
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="task_unique_active_dedup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class ReviewCount(models.Model):
+    """
+    Represents one counter of a dealer's reviews.
+    Stores how many reviews have a facet value, e.g. the sentiment
+    "positive" or the car make "Audi", see djangoapp/review_stats.py.
+    """
+
+    TOTAL = "total"
+    PURCHASE = "purchase"
+    SENTIMENT = "sentiment"
+    CAR_MAKE = "car_make"
+    CAR_YEAR = "car_year"
+    FACETS = [
+        (TOTAL, "total"),
+        (PURCHASE, "purchase"),
+        (SENTIMENT, "sentiment"),
+        (CAR_MAKE, "car make"),
+        (CAR_YEAR, "car year"),
+    ]
+    dealer_id = models.PositiveIntegerField()
+    facet = models.CharField(max_length=20, choices=FACETS)
+    # empty for the total and purchase counters
+    value = models.CharField(max_length=100, blank=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # counters are upserted by these, and read by dealer_id
+            models.UniqueConstraint(
+                fields=["dealer_id", "facet", "value"],
+                name="reviewcount_unique_facet_value",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dealer_id} {self.facet} {self.value}: {self.count}"
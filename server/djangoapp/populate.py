@@ -2,135 +2,128 @@
 Module to push car make and car model data in the
 respective database tables.
 
-Provides function to create data for car make and car model
-from the list containing dictionaries of respective data.
+Holds the built-in seed catalog and provides a function to
+upsert it through the bulk catalog loader.
 """
 
-from .models import CarMake, CarModel
+from .loader import load_catalog
+
+CAR_MAKE_DATA = [
+    {"name": "NISSAN", "description": "Great cars. Japanese technology"},
+    {"name": "Mercedes", "description": "Great cars. German technology"},
+    {"name": "Audi", "description": "Great cars. German technology"},
+    {"name": "Kia", "description": "Great cars. Korean technology"},
+    {"name": "Toyota", "description": "Great cars. Japanese technology"},
+]
+
+CAR_MODEL_DATA = [
+    {
+        "name": "Pathfinder",
+        "type": "SUV",
+        "year": 2023,
+        "make": "NISSAN",
+    },
+    {
+        "name": "Qashqai",
+        "type": "SUV",
+        "year": 2023,
+        "make": "NISSAN",
+    },
+    {
+        "name": "XTRAIL",
+        "type": "SUV",
+        "year": 2023,
+        "make": "NISSAN",
+    },
+    {
+        "name": "A-Class",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Mercedes",
+    },
+    {
+        "name": "C-Class",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Mercedes",
+    },
+    {
+        "name": "E-Class",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Mercedes",
+    },
+    {
+        "name": "A4",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Audi"
+    },
+    {
+        "name": "A5",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Audi"
+    },
+    {
+        "name": "A6",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Audi"
+    },
+    {
+        "name": "Sorrento",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Kia",
+    },
+    {
+        "name": "Carnival",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Kia",
+    },
+    {
+        "name": "Cerato",
+        "type": "Sedan",
+        "year": 2023,
+        "make": "Kia",
+    },
+    {
+        "name": "Corolla",
+        "type": "Sedan",
+        "year": 2023,
+        "make": "Toyota",
+    },
+    {
+        "name": "Camry",
+        "type": "Sedan",
+        "year": 2023,
+        "make": "Toyota",
+    },
+    {
+        "name": "Kluger",
+        "type": "SUV",
+        "year": 2023,
+        "make": "Toyota",
+    },
+    # Add more CarModel instances as needed
+]
+
+
+def iter_seed_records():
+    """Yield the built-in car models as catalog loader records."""
+    descriptions = {
+        data["name"]: data["description"] for data in CAR_MAKE_DATA
+    }
+    for data in CAR_MODEL_DATA:
+        yield dict(data, description=descriptions[data["make"]])
 
 
 def initiate():
     """
     Function to create car make and model data
-    in databse by using respective models.
+    in databse by bulk upserting the seed catalog.
+    Safe to run again, existing rows are left unchanged.
     """
-    car_make_data = [
-        {"name": "NISSAN", "description": "Great cars. Japanese technology"},
-        {"name": "Mercedes", "description": "Great cars. German technology"},
-        {"name": "Audi", "description": "Great cars. German technology"},
-        {"name": "Kia", "description": "Great cars. Korean technology"},
-        {"name": "Toyota", "description": "Great cars. Japanese technology"},
-    ]
-
-    car_make_instances = []
-    for data in car_make_data:
-        # using objects.create to create and save data in db
-        car_make_instances.append(
-            CarMake.objects.create(
-                name=data["name"],
-                description=data["description"]
-            )
-        )
-
-    # Create CarModel instances with the corresponding CarMake instances
-    car_model_data = [
-        {
-            "name": "Pathfinder",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[0],
-        },
-        {
-            "name": "Qashqai",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[0],
-        },
-        {
-            "name": "XTRAIL",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[0],
-        },
-        {
-            "name": "A-Class",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[1],
-        },
-        {
-            "name": "C-Class",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[1],
-        },
-        {
-            "name": "E-Class",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[1],
-        },
-        {
-            "name": "A4",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[2]
-        },
-        {
-            "name": "A5",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[2]
-        },
-        {
-            "name": "A6",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[2]
-        },
-        {
-            "name": "Sorrento",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[3],
-        },
-        {
-            "name": "Carnival",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[3],
-        },
-        {
-            "name": "Cerato",
-            "type": "Sedan",
-            "year": 2023,
-            "car_make": car_make_instances[3],
-        },
-        {
-            "name": "Corolla",
-            "type": "Sedan",
-            "year": 2023,
-            "car_make": car_make_instances[4],
-        },
-        {
-            "name": "Camry",
-            "type": "Sedan",
-            "year": 2023,
-            "car_make": car_make_instances[4],
-        },
-        {
-            "name": "Kluger",
-            "type": "SUV",
-            "year": 2023,
-            "car_make": car_make_instances[4],
-        },
-        # Add more CarModel instances as needed
-    ]
-
-    for data in car_model_data:
-        CarModel.objects.create(
-            name=data["name"],
-            car_make=data["car_make"],
-            type=data["type"],
-            year=data["year"],
-        )
+    return load_catalog(iter_seed_records())
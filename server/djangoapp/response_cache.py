@@ -0,0 +1,191 @@
+"""
+Read-through cache for upstream responses used by the dealer views.
+
+Dealership data barely changes, so the dealer list the dealer index
+(djangoapp/dealers.py) loads is kept in Django's cache framework instead
+of being fetched from the Node.js backend by every worker on every
+refresh. Each cache policy has a TTL
+and a stale window: stale entries are served immediately while a single
+background refresh runs. Concurrent misses on a cold key are coalesced so
+only one upstream fetch happens, and explicit hooks invalidate entries.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .fanout import get_executor
+from .metrics import register_cache
+
+# how often followers poll for a key another worker is filling
+POLL_INTERVAL = 0.05
+
+# returned to followers when the fetch they waited for gave nothing to
+# share, shaped like the restapis error payload
+UNAVAILABLE = {"Status": 500, "message": "Backend error"}
+
+
+def is_cacheable(value):
+    """Upstream error payloads from restapis are never cached."""
+    return not (isinstance(value, dict) and value.get("Status") == 500)
+
+
+class ReadThroughCache:
+    """
+    Read-through cache with stale-while-revalidate and request coalescing.
+
+    Args:
+        alias(str): Name of the django cache in settings.CACHES.
+        policies(dict): Maps a policy name to a dict with "TTL" and
+            "STALE" in seconds.
+        lock_timeout(float): Seconds a worker waits for another worker
+            filling the same key; it then gives up with an error payload
+            rather than fetching the key as well.
+    """
+
+    def __init__(self, alias, policies, lock_timeout=10.0):
+        self.alias = alias
+        self.policies = policies
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version(self, policy):
+        # bumping the version invalidates every key of a policy at once
+        return self.cache.get_or_set(f"rtc:version:{policy}", 1, None)
+
+    def _key(self, policy, key):
+        return f"rtc:{policy}:{self._version(policy)}:{key}"
+
+    def _store(self, cache_key, policy, value):
+        if not is_cacheable(value):
+            return
+        config = self.policies[policy]
+        fresh_until = time.time() + config["TTL"]
+        self.cache.set(
+            cache_key, (value, fresh_until), config["TTL"] + config["STALE"]
+        )
+
+    def _load(self, cache_key, policy, loader):
+        """Run the loader once per key, across threads and workers."""
+        with self._lock:
+            flight = self._inflight.get(cache_key)
+            leader = flight is None
+            if leader:
+                # [done event, value shared with the waiting threads]
+                flight = self._inflight[cache_key] = [
+                    threading.Event(), dict(UNAVAILABLE)
+                ]
+        if not leader:
+            # another thread of this process is fetching the same key
+            flight[0].wait(self.lock_timeout)
+            entry = self.cache.get(cache_key)
+            return entry[0] if entry is not None else flight[1]
+
+        try:
+            flight[1] = self._load_once(cache_key, policy, loader)
+            return flight[1]
+        finally:
+            with self._lock:
+                del self._inflight[cache_key]
+            flight[0].set()
+
+    def _load_once(self, cache_key, policy, loader):
+        # the token makes sure a worker only ever releases its own lock
+        lock_key = cache_key + ":lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock_key, token, self.lock_timeout):
+            # another worker is fetching, wait for its result
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return entry[0]
+            if time.monotonic() >= deadline:
+                # its upstream call is slow or failing, calling it too
+                # would not help
+                return dict(UNAVAILABLE)
+            time.sleep(POLL_INTERVAL)
+        try:
+            value = loader()
+            self._store(cache_key, policy, value)
+            return value
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def _refresh(self, cache_key, policy, loader):
+        with self._lock:
+            if cache_key in self._inflight:
+                return
+        get_executor().submit(self._load, cache_key, policy, loader)
+
+    def get(self, policy, key, loader):
+        """
+        Return the cached value for a key, loading it on a miss.
+
+        Args:
+            policy(str): Name of the cache policy (TTL and stale window).
+            key(str): Key of the value within the policy.
+            loader(callable): Zero-argument callable fetching the value.
+        """
+        cache_key = self._key(policy, key)
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            self.misses += 1
+            return self._load(cache_key, policy, loader)
+        value, fresh_until = entry
+        if fresh_until <= time.time():
+            self.stale_hits += 1
+            self._refresh(cache_key, policy, loader)
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, policy, key, value):
+        """
+        Store a value fetched elsewhere, for example by the cache warmer.
+
+        Returns:
+            bool: False for upstream error payloads, which are not stored.
+        """
+        self._store(self._key(policy, key), policy, value)
+        return is_cacheable(value)
+
+    def invalidate(self, policy, key=None):
+        """Drop one key of a policy, or every key when key is None."""
+        if key is None:
+            try:
+                self.cache.incr(f"rtc:version:{policy}")
+            except ValueError:
+                pass
+        else:
+            self.cache.delete(self._key(policy, key))
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+# process wide cache for dealership responses
+dealer_cache = ReadThroughCache(
+    settings.RESPONSE_CACHE["ALIAS"], settings.RESPONSE_CACHE["POLICIES"]
+)
+register_cache("dealers", dealer_cache.stats)
+
+
+def invalidate_dealers():
+    """Invalidate the cached dealer list."""
+    dealer_cache.invalidate("dealers")
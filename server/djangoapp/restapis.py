@@ -8,18 +8,36 @@ logic to ensure consistent communication across the project.
 """
 
 # Uncomment the imports below before you add the function code
+import contextvars
+import logging
 import os
-import traceback
+from concurrent.futures import TimeoutError
+from functools import partial
 
 import requests
+from django.conf import settings
 from dotenv import load_dotenv
 
+from .fanout import DeadlineExceeded, fan_out, get_executor
+from .sentiment_cache import sentiment_cache
+from .taskqueue import enqueue
+from .upstreams import from_settings
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
 # load environ variables
 load_dotenv()
 
 backend_url = os.getenv("backend_url")
 sentiment_analyzer_url = os.getenv("sentiment_analyzer_url")
 
+# one keep-alive connection pool per upstream service
+backend_client = from_settings("backend", settings.UPSTREAMS["backend"])
+sentiment_client = from_settings(
+    "sentiment", settings.UPSTREAMS["sentiment"]
+)
+
 
 # Add code for get requests to back end
 def get_request(endpoint, **kwargs):
@@ -28,7 +46,8 @@ def get_request(endpoint, **kwargs):
 
     This helper function receives a Django URL from views,
     merges it with the Node.js application endpoint, and
-    performs a GET request using the `requests` library.
+    performs a GET request through the pooled backend client,
+    retrying transient failures.
 
     Args:
         endpoint (str): The backend API endpoint to call.
@@ -38,18 +57,49 @@ def get_request(endpoint, **kwargs):
         requests.Response: The HTTP response object from the backend.
     """
     request_url = backend_url + endpoint
-    print(f"GET from {request_url} with params {kwargs}")
+    logger.debug("GET %s", request_url, extra={"params": kwargs})
     try:
-        response = requests.get(
-            request_url, params=kwargs if kwargs else None, timeout=20
+        response = backend_client.get(
+            request_url, params=kwargs if kwargs else None
         )
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"Network exception occurred: {e}")
+        logger.warning(
+            "Backend request failed", extra={"url": request_url, "error": e}
+        )
         return {"Status": 500, "message": "Backend error"}
 
 
+def iter_review_pages(endpoint, page_size, after=None):
+    """
+    Fetch the reviews of a backend endpoint page by page.
+
+    Each page asks the backend for at most `page_size` reviews with an
+    id above the last one seen, so a caller holds one page at a time.
+
+    Args:
+        endpoint (str): "/fetchReviews" or "/fetchReviews/dealer/<id>".
+        page_size (int): Reviews per backend request.
+        after (int, optional): Only fetch reviews with a larger id.
+
+    Yields:
+        list: Reviews ordered by id. A failed request yields the error
+        payload of `get_request` and ends the iteration.
+    """
+    # the backend serves at most this many, a shorter page ends the loop
+    page_size = min(page_size, settings.REVIEW_PAGES["MAX_PAGE_SIZE"])
+    while True:
+        params = {"limit": page_size}
+        if after is not None:
+            params["after"] = after
+        page = get_request(endpoint, **params)
+        yield page
+        if not isinstance(page, list) or len(page) < page_size:
+            return
+        after = page[-1]["id"]
+
+
 # Add code for retrieving sentiments
 def analyze_review_sentiments(text):
     """
@@ -64,16 +114,102 @@ def analyze_review_sentiments(text):
         requests.Response: The HTTP response object containing
         the sentiment analysis results from the backend.
     """
+    cached = sentiment_cache.get(text)
+    if cached is not None:
+        return {"sentiment": cached}
     request_url = sentiment_analyzer_url + "analyze/" + text
     try:
         # Call get method of requests library with URL and parameters
-        response = requests.get(request_url, timeout=20)
-        return response.json()
+        response = sentiment_client.get(request_url)
+        result = response.json()
+        if "sentiment" in result:
+            sentiment_cache.set(text, result["sentiment"])
+        return result
     except requests.exceptions.RequestException as e:
-        print(f"Network exception occurred: {e}")
+        logger.warning(
+            "Sentiment request failed", extra={"url": request_url, "error": e}
+        )
         return {"Status": 500, "message": "Backend error"}
 
 
+# number of texts sent per /analyze_batch call
+SENTIMENT_BATCH_SIZE = 100
+
+
+# Add code for retrieving sentiments in bulk
+def analyze_review_sentiments_batch(texts, deadline=None):
+    """
+    Send POST requests to the sentiment analysis microservice
+    scoring many review texts per round trip.
+
+    This helper function receives a list of review texts from Django views
+    and posts them in chunks of `SENTIMENT_BATCH_SIZE` to the
+    `/analyze_batch` endpoint, instead of one GET per review.
+    Chunks are sent concurrently and texts already in the sentiment cache
+    are not sent at all.
+
+    Args:
+        texts(list[str]): The review texts to be analyzed.
+        deadline(float, optional): Seconds allowed for all chunks, see
+            fanout.fan_out.
+
+    Returns:
+        list[dict]: One sentiment result per text, in the same order.
+        If a chunk fails or misses the deadline, its entries are
+        error dictionaries
+        with status and message.
+    """
+    request_url = sentiment_analyzer_url + "analyze_batch"
+    known = sentiment_cache.get_many(texts)
+    # score each distinct uncached text once
+    pending = list(dict.fromkeys(t for t in texts if t not in known))
+    chunks = [
+        pending[start:start + SENTIMENT_BATCH_SIZE]
+        for start in range(0, len(pending), SENTIMENT_BATCH_SIZE)
+    ]
+
+    def score_chunk(chunk):
+        try:
+            # scoring is side-effect free, so the POST may be retried
+            response = sentiment_client.post(
+                request_url, json={"texts": chunk}, idempotent=True
+            )
+            response.raise_for_status()
+            scored = {
+                text: result["sentiment"]
+                for text, result in zip(chunk, response.json()["sentiments"])
+            }
+            sentiment_cache.set_many(scored)
+            return scored
+        except (requests.exceptions.RequestException, KeyError) as e:
+            logger.warning(
+                "Sentiment batch request failed",
+                extra={"url": request_url, "error": e, "texts": len(chunk)},
+            )
+            return None
+
+    # chunks are independent, so score them concurrently
+    try:
+        scored_chunks = fan_out(
+            [partial(score_chunk, chunk) for chunk in chunks],
+            deadline=deadline,
+        )
+    except DeadlineExceeded as e:
+        logger.warning(
+            "Sentiment analysis deadline exceeded",
+            extra={"chunks": len(chunks)},
+        )
+        scored_chunks = e.results
+    for scored in scored_chunks:
+        if scored is not None:
+            known.update(scored)
+    return [
+        {"sentiment": known[text]} if text in known
+        else {"Status": 500, "message": "Backend error"}
+        for text in texts
+    ]
+
+
 # Add code for posting review
 def post_review(data_dict):
     """
@@ -94,12 +230,144 @@ def post_review(data_dict):
     request_url = backend_url + "/insert_review"
     try:
         # requests lib has json=parameter that auto calls json.dumps(data_dict)
-        response = requests.post(request_url, json=data_dict, timeout=20)
-        print("Raw backend response :", response.status_code, response.text)
-        backend_response = response.json()
-        print(f"Backend response parsed : {backend_response}")
-        return backend_response
+        # not retried, a retry could insert the review twice
+        response = backend_client.post(request_url, json=data_dict)
+        logger.debug(
+            "Review posted", extra={"status_code": response.status_code}
+        )
+        return response.json()
+    except requests.exceptions.RequestException:
+        logger.warning(
+            "Posting review failed", extra={"url": request_url},
+            exc_info=True,
+        )
+        return {"Status": 500, "message": "Backend error"}
+
+
+# reviews sent per /insert_reviews call, the backend accepts up to 5000
+REVIEW_INSERT_BATCH_SIZE = 1000
+
+
+def post_reviews(reviews, batch_size=REVIEW_INSERT_BATCH_SIZE):
+    """
+    Insert many reviews through the backend bulk endpoint.
+
+    The reviews are sent in batches of `batch_size`; the backend reserves
+    the ids of a batch at once and writes it with a single insert.
+
+    Args:
+        reviews(list): Review dicts shaped like the `post_review` data.
+        batch_size(int): Reviews per backend request.
+
+    Returns:
+        dict: {"status": 200, "reviews": [...]} with every stored review.
+        When a batch fails, the error dictionary with status and message
+        and, under "reviews", the reviews stored by the earlier batches.
+    """
+    request_url = backend_url + "/insert_reviews"
+    stored = []
+    for start in range(0, len(reviews), batch_size):
+        batch = reviews[start:start + batch_size]
+        try:
+            # not retried, a retry could insert the batch twice
+            response = backend_client.post(
+                request_url, json={"reviews": batch}
+            )
+            response.raise_for_status()
+            stored.extend(response.json()["reviews"])
+        except (requests.exceptions.RequestException, KeyError) as e:
+            logger.warning(
+                "Posting reviews failed",
+                extra={"url": request_url, "error": e, "reviews": len(batch)},
+            )
+            return {"Status": 500, "message": "Backend error",
+                    "reviews": stored}
+    return {"status": 200, "reviews": stored}
+
+
+# Add code for storing sentiments of posted reviews
+def update_review_sentiments(sentiments, overwrite=False):
+    """
+    Send a POST request storing analyzer labels on existing reviews.
+
+    Args:
+        sentiments(dict): Maps review ids to their sentiment label.
+        overwrite(bool): Relabel reviews that have a label already;
+            by default only reviews without one are labelled.
+
+    Returns:
+        dict: The parsed JSON response from the backend service, with
+        the "ids" of the reviews labelled unless `overwrite`, or an
+        error dictionary with status and message.
+    """
+    request_url = backend_url + "/update_sentiments"
+    payload = [
+        {"id": review_id, "sentiment": sentiment}
+        for review_id, sentiment in sentiments.items()
+    ]
+    try:
+        # setting a label twice is harmless, so the POST may be retried
+        response = backend_client.post(
+            request_url,
+            json={"sentiments": payload, "overwrite": overwrite},
+            idempotent=True,
+        )
+        response.raise_for_status()
+        return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"Network exception occurred: {e}")
-        traceback.print_exc()
+        logger.warning(
+            "Storing review sentiments failed",
+            extra={"url": request_url, "error": e, "reviews": len(payload)},
+        )
         return {"Status": 500, "message": "Backend error"}
+
+
+def stored_sentiments(sentiments, response):
+    """
+    Return the labels of `sentiments` that `update_review_sentiments`
+    reports as stored on a review that had none.
+    """
+    labels = {int(review_id): label for review_id, label in sentiments.items()}
+    return {
+        review_id: labels[review_id]
+        for review_id in response.get("ids") or ()
+        if review_id in labels
+    }
+
+
+def post_scored_review(data_dict):
+    """
+    Post a review together with its sentiment label.
+
+    The review text is scored once, when it is written, so readers never
+    have to call the analyzer for it. The label is posted with the review
+    if the analyzer answers within settings.SENTIMENT_ON_WRITE["WAIT"]
+    seconds. Otherwise the review is posted right away and a background
+    task scores it and stores the label.
+
+    Args:
+        data_dict(dict): The review data to be posted
+
+    Returns:
+        dict: The response of `post_review`.
+    """
+    context = contextvars.copy_context()
+    future = get_executor().submit(
+        context.run, analyze_review_sentiments, data_dict["review"]
+    )
+    try:
+        result = future.result(timeout=settings.SENTIMENT_ON_WRITE["WAIT"])
+    except TimeoutError:
+        result = {}
+    if "sentiment" in result:
+        return post_review(dict(data_dict, sentiment=result["sentiment"]))
+
+    response = post_review(data_dict)
+    review_id = response.get("review", {}).get("id")
+    if review_id is not None:
+        enqueue(
+            "store_review_sentiment", review_id, data_dict["review"],
+            data_dict.get("dealership"),
+            dedup_key=f"sentiment:{review_id}",
+        )
+    return response
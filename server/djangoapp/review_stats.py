@@ -0,0 +1,195 @@
+"""
+Per-dealer review counters behind the review statistics endpoint.
+
+Every review a dealer gets adds one to a few `ReviewCount` rows: the
+total, the purchases, its sentiment, its car make and its car year.
+Reviews posted through `add_review` or `import_reviews` are counted as
+they are stored, and labels stored later for unlabelled reviews (by the
+background tasks, the read path, the warmer or backfill_sentiments) are
+counted then, so the statistics of a dealer are read from a handful of
+rows however many reviews it has.
+
+`rebuild` recounts everything from the backend. The entrypoint runs it
+before the server starts, once the backend answers, which counts the
+seed data. The Node backend drops its reviews and loads the seed data
+again whenever it restarts, so rebuild the counters
+(`manage.py rebuild_review_stats`) after that, while no reviews are
+posted.
+"""
+
+import logging
+from collections import Counter
+
+from django.db import DatabaseError, connections, router, transaction
+
+from .models import ReviewCount
+from .restapis import iter_review_pages
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ("positive", "neutral", "negative")
+
+
+def review_facets(review):
+    """Return the (facet, value) counters a backend review adds to."""
+    facets = [(ReviewCount.TOTAL, "")]
+    if review.get("purchase"):
+        facets.append((ReviewCount.PURCHASE, ""))
+    if review.get("sentiment"):
+        facets.append((ReviewCount.SENTIMENT, review["sentiment"]))
+    if review.get("car_make"):
+        facets.append((ReviewCount.CAR_MAKE, str(review["car_make"])))
+    if review.get("car_year"):
+        facets.append((ReviewCount.CAR_YEAR, str(review["car_year"])))
+    return facets
+
+
+def count_reviews(reviews, counts=None):
+    """
+    Add reviews to a Counter keyed by (dealer id, facet, value).
+
+    Returns:
+        Counter: `counts`, or a new Counter.
+    """
+    counts = Counter() if counts is None else counts
+    for review in reviews:
+        dealer_id = int(review["dealership"])
+        for facet, value in review_facets(review):
+            counts[(dealer_id, facet, value)] += 1
+    return counts
+
+
+def add_counts(counts):
+    """
+    Add a Counter of (dealer id, facet, value) to the stored counters.
+
+    Each counter is one upsert, so concurrent writers never lose an
+    increment and need no read first.
+    """
+    if not counts:
+        return
+    connection = connections[router.db_for_write(ReviewCount)]
+    quote = connection.ops.quote_name
+    table = quote(ReviewCount._meta.db_table)
+    key = ", ".join(map(quote, ("dealer_id", "facet", "value")))
+    column = quote("count")
+    sql = (
+        f"INSERT INTO {table} ({key}, {column}) VALUES (%s, %s, %s, %s) "
+        f"ON CONFLICT ({key}) DO UPDATE "
+        f"SET {column} = {table}.{column} + excluded.{column}"
+    )
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                (dealer_id, facet, value, count)
+                for (dealer_id, facet, value), count in counts.items()
+            ])
+
+
+def record_review(review):
+    """
+    Count a review the backend stored.
+
+    The review is stored whatever happens here, so a failure is only
+    logged; the next `rebuild` corrects the counters.
+    """
+    try:
+        add_counts(count_reviews([review]))
+    except DatabaseError:
+        logger.exception("Counting review failed")
+
+
+def record_sentiments(dealer_id, sentiments):
+    """
+    Count the labels stored for reviews of a dealer that had none.
+
+    Args:
+        dealer_id(int): Dealer of the reviews.
+        sentiments(iterable): Their new labels, see record_review.
+    """
+    counts = Counter(
+        (int(dealer_id), ReviewCount.SENTIMENT, sentiment)
+        for sentiment in sentiments
+    )
+    try:
+        add_counts(counts)
+    except DatabaseError:
+        logger.exception("Counting review sentiments failed")
+
+
+def dealer_stats(dealer_id):
+    """
+    Return the review statistics of a dealer.
+
+    Returns:
+        dict: Review and purchase counts, the purchase ratio, counts by
+        sentiment (with the reviews not labelled yet as "unscored"),
+        by car make and by car year.
+    """
+    rows = ReviewCount.objects.filter(dealer_id=dealer_id).values_list(
+        "facet", "value", "count"
+    )
+    facets = {facet: {} for facet, _ in ReviewCount.FACETS}
+    for facet, value, count in rows:
+        facets[facet][value] = count
+    reviews = facets[ReviewCount.TOTAL].get("", 0)
+    purchases = facets[ReviewCount.PURCHASE].get("", 0)
+    sentiments = dict.fromkeys(SENTIMENTS, 0)
+    sentiments.update(facets[ReviewCount.SENTIMENT])
+    # negative if labels were counted twice, rebuild to correct it
+    sentiments["unscored"] = reviews - sum(sentiments.values())
+    return {
+        "reviews": reviews,
+        "purchases": purchases,
+        "purchase_ratio": purchases / reviews if reviews else None,
+        "sentiments": sentiments,
+        "car_makes": dict(sorted(facets[ReviewCount.CAR_MAKE].items())),
+        "car_years": dict(sorted(facets[ReviewCount.CAR_YEAR].items())),
+    }
+
+
+def rebuild(dealer_id=None, page_size=1000):
+    """
+    Recount the reviews of one dealer, or of every dealer, from the
+    backend and replace the stored counters with the result.
+
+    The stored counters are replaced in one transaction, so readers see
+    either the old or the new ones, but reviews and labels counted while
+    the backend is read are replaced as well: run it before the server
+    starts or while no reviews are posted.
+
+    Returns:
+        dict: Counts of reviews seen, dealers and counters written,
+        None when the backend could not be read.
+    """
+    endpoint = "/fetchReviews"
+    if dealer_id is not None:
+        endpoint += f"/dealer/{dealer_id}"
+    counts = Counter()
+    reviews = 0
+    # only the counters are kept, one page of reviews at a time
+    for page in iter_review_pages(endpoint, page_size):
+        if not isinstance(page, list):
+            return None
+        reviews += len(page)
+        count_reviews(page, counts)
+
+    stale = ReviewCount.objects.all()
+    if dealer_id is not None:
+        stale = stale.filter(dealer_id=dealer_id)
+    with transaction.atomic(using=router.db_for_write(ReviewCount)):
+        stale.delete()
+        ReviewCount.objects.bulk_create(
+            [
+                ReviewCount(
+                    dealer_id=key[0], facet=key[1], value=key[2], count=count
+                )
+                for key, count in counts.items()
+            ],
+            batch_size=500,
+        )
+    return {
+        "reviews": reviews,
+        "dealers": len({key[0] for key in counts}),
+        "counters": len(counts),
+    }
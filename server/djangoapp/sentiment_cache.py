@@ -0,0 +1,178 @@
+"""
+Sentiment result cache for the dealership Django application.
+
+Review text never changes once posted, so the label returned by the
+sentiment analyzer microservice can be remembered. Results are keyed by
+a hash of the normalized text and kept in two tiers: a bounded in-process
+LRU with optional TTL, and an optional shared tier backed by Django's
+cache framework so every gunicorn worker benefits from a single scoring.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import register_cache
+
+# prefix for keys stored in the shared django cache tier
+KEY_PREFIX = "sentiment:"
+
+
+def text_key(text):
+    """
+    Build the content address for a review text.
+
+    Whitespace is collapsed before hashing. Case is kept because
+    VADER treats upper-case words as emphasis.
+    """
+    normalized = " ".join(str(text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Two-tier LRU/TTL cache mapping review text to its sentiment label.
+
+    Args:
+        max_entries(int): Capacity of the in-process LRU tier.
+        ttl(float, optional): Seconds an entry stays valid.
+            None keeps entries until they are evicted.
+        shared_alias(str, optional): Name of a django cache in
+            settings.CACHES used as the shared tier.
+    """
+
+    def __init__(self, max_entries=10000, ttl=None, shared_alias=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _shared(self):
+        if self.shared_alias is None:
+            return None
+        return caches[self.shared_alias]
+
+    def _get_local(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key, value, now):
+        expires = now + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, texts):
+        """
+        Look up many texts at once.
+
+        Returns:
+            dict: Maps each text found in either tier to its sentiment.
+        """
+        found = {}
+        missing = {}
+        now = time.monotonic()
+        with self._lock:
+            for text in texts:
+                if text in found or text in missing:
+                    continue
+                key = text_key(text)
+                value = self._get_local(key, now)
+                if value is None:
+                    missing[text] = key
+                else:
+                    found[text] = value
+                    self.hits += 1
+
+        shared = self._shared()
+        if shared is not None and missing:
+            shared_values = shared.get_many(
+                [KEY_PREFIX + key for key in missing.values()]
+            )
+            with self._lock:
+                for text, key in list(missing.items()):
+                    value = shared_values.get(KEY_PREFIX + key)
+                    if value is not None:
+                        found[text] = value
+                        self._set_local(key, value, now)
+                        self.shared_hits += 1
+                        del missing[text]
+
+        with self._lock:
+            self.misses += len(missing)
+        return found
+
+    def get(self, text):
+        """Return the cached sentiment of a text, or None."""
+        return self.get_many([text]).get(text)
+
+    def set_many(self, mapping):
+        """Store text -> sentiment pairs in both tiers."""
+        if not mapping:
+            return
+        now = time.monotonic()
+        keyed = {text_key(text): value for text, value in mapping.items()}
+        with self._lock:
+            for key, value in keyed.items():
+                self._set_local(key, value, now)
+        shared = self._shared()
+        if shared is not None:
+            shared.set_many(
+                {KEY_PREFIX + key: value for key, value in keyed.items()},
+                timeout=self.ttl,
+            )
+
+    def set(self, text, sentiment):
+        """Store the sentiment of a single text."""
+        self.set_many({text: sentiment})
+
+    def clear(self):
+        """Drop the in-process tier and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = 0
+            self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+def _build_cache():
+    config = getattr(settings, "SENTIMENT_CACHE", {})
+    return SentimentCache(
+        max_entries=config.get("MAX_ENTRIES", 10000),
+        ttl=config.get("TTL"),
+        shared_alias=config.get("SHARED_CACHE"),
+    )
+
+
+# process wide cache used by restapis
+sentiment_cache = _build_cache()
+register_cache("sentiment", sentiment_cache.stats)
@@ -0,0 +1,46 @@
+"""
+Signal handlers for the dealership application.
+
+Keeps derived data, such as the pre-serialized car catalog and the
+cached users of authenticated requests, in step with writes to the car
+make, car model and user tables.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import user_cache, user_cache_key
+from .catalog import catalog_payload
+from .models import CarMake, CarModel
+
+
+@receiver(post_save, sender=CarMake)
+@receiver(post_delete, sender=CarMake)
+@receiver(post_save, sender=CarModel)
+@receiver(post_delete, sender=CarModel)
+def invalidate_catalog(sender, **kwargs):
+    """Rebuild the catalog payload after any car make or model change."""
+    catalog_payload.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached copy of a changed user."""
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        # saved by every login, authentication does not depend on it
+        return
+    if user_cache() is not None:
+        user_cache().delete(user_cache_key(instance.pk))
+
+
+@receiver(user_logged_in)
+def cache_logged_in_user(sender, request, user, **kwargs):
+    """Prime the user cache for the next request of the new session."""
+    if user_cache() is not None:
+        user_cache().set(
+            user_cache_key(user.pk), user, settings.USER_CACHE_TTL
+        )
@@ -0,0 +1,319 @@
+"""
+Durable background task queue for the dealership Django application.
+
+Views enqueue slow work, such as storing review sentiments or forwarding
+reviews to the Node.js backend, and return right away. Each task is a row
+of the BackgroundTask table in the local SQLite database, so queued work
+survives restarts without Redis or Celery. Tasks are run by worker threads,
+either started lazily inside every process that enqueues or in a
+standalone `manage.py run_task_workers` process.
+
+A task fails by raising and is then retried with jittered exponential
+backoff until it runs out of attempts. A deduplication key keeps the same
+work from being queued twice while it is pending or running.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    close_old_connections,
+    transaction,
+)
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .metrics import registry
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+task_runs = registry.counter(
+    "background_tasks_total",
+    "Background task runs by outcome (done, retry or failed).",
+    ("task", "outcome"),
+)
+task_duration = registry.histogram(
+    "background_task_duration_seconds",
+    "Run time of background tasks.",
+    ("task",),
+)
+
+# registered task functions and their max attempts, keyed by task name
+_tasks = {}
+
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def task(name=None, max_attempts=None):
+    """
+    Register a function as a background task.
+
+    The function is called with the JSON-serializable arguments given to
+    `enqueue`, and signals a failure by raising.
+
+    Args:
+        name(str, optional): Name the task is queued under, defaults to
+            the function name.
+        max_attempts(int, optional): Runs before the task is marked
+            failed, defaults to settings.TASKS["MAX_ATTEMPTS"].
+    """
+    def register(func):
+        _tasks[name or func.__name__] = (func, max_attempts)
+        return func
+    return register
+
+
+def enqueue(name, *args, dedup_key=None, delay=0, **kwargs):
+    """
+    Queue a call of a registered task.
+
+    Args:
+        name(str): Name of the registered task.
+        *args, **kwargs: JSON-serializable arguments of the call.
+        dedup_key(str, optional): Skip queueing while a task with the
+            same key is pending or running.
+        delay(float): Seconds before the task may run.
+
+    Returns:
+        BackgroundTask: The queued task, or the task already queued under
+        `dedup_key`.
+    """
+    if name not in _tasks:
+        raise KeyError(f"Unknown background task {name!r}")
+    config = settings.TASKS
+    try:
+        with transaction.atomic():
+            queued = BackgroundTask.objects.create(
+                name=name,
+                payload={"args": list(args), "kwargs": kwargs},
+                dedup_key=dedup_key,
+                max_attempts=_tasks[name][1] or config["MAX_ATTEMPTS"],
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        logger.debug("Task already queued", extra={"dedup_key": dedup_key})
+        return BackgroundTask.objects.filter(
+            dedup_key=dedup_key,
+            status__in=[BackgroundTask.PENDING, BackgroundTask.RUNNING],
+        ).first()
+    if config["IN_PROCESS"]:
+        transaction.on_commit(get_worker().wake)
+    return queued
+
+
+def _claim():
+    """Mark the oldest due pending task as running and return it."""
+    now = timezone.now()
+    due = BackgroundTask.objects.filter(
+        status=BackgroundTask.PENDING, run_after__lte=now
+    ).order_by("run_after", "id").values_list("id", flat=True)
+    for task_id in due[:5]:
+        # only one worker wins the conditional update of a task
+        claimed = BackgroundTask.objects.filter(
+            id=task_id, status=BackgroundTask.PENDING
+        ).update(
+            status=BackgroundTask.RUNNING,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return BackgroundTask.objects.get(id=task_id)
+    return None
+
+
+def _retry_or_fail(record):
+    config = settings.TASKS
+    error = traceback.format_exc()
+    if record.attempts < record.max_attempts:
+        # full jitter: uniform(0, backoff * 2**attempt), capped
+        delay = random.uniform(0, min(
+            config["MAX_BACKOFF"],
+            config["BACKOFF"] * (2 ** (record.attempts - 1)),
+        ))
+        BackgroundTask.objects.filter(id=record.id).update(
+            status=BackgroundTask.PENDING,
+            run_after=timezone.now() + timedelta(seconds=delay),
+            locked_at=None,
+            last_error=error,
+        )
+        logger.warning(
+            "Background task failed, retrying",
+            extra={"task": record.name, "task_id": record.id,
+                   "attempts": record.attempts, "retry_in": delay},
+        )
+        return "retry"
+    BackgroundTask.objects.filter(id=record.id).update(
+        status=BackgroundTask.FAILED, locked_at=None, last_error=error
+    )
+    logger.error(
+        "Background task failed permanently",
+        extra={"task": record.name, "task_id": record.id,
+               "attempts": record.attempts, "error": error},
+    )
+    return "failed"
+
+
+def run_next():
+    """
+    Run the oldest due task, if there is one.
+
+    Returns:
+        bool: Whether a task was run.
+    """
+    record = _claim()
+    if record is None:
+        return False
+    started = time.perf_counter()
+    try:
+        entry = _tasks.get(record.name)
+        if entry is None:
+            raise KeyError(f"Unknown background task {record.name!r}")
+        entry[0](
+            *record.payload.get("args", []),
+            **record.payload.get("kwargs", {}),
+        )
+    except Exception:
+        outcome = _retry_or_fail(record)
+    else:
+        # finished tasks leave the table, failed ones stay for inspection
+        record.delete()
+        outcome = "done"
+    task_duration.observe(time.perf_counter() - started, record.name)
+    task_runs.inc(record.name, outcome)
+    return True
+
+
+def requeue_stale(lease):
+    """
+    Queue again the running tasks whose worker died.
+
+    Tasks that used their last attempt are marked failed instead.
+
+    Returns:
+        int: Number of tasks queued again.
+    """
+    expired = timezone.now() - timedelta(seconds=lease)
+    stale = BackgroundTask.objects.filter(
+        status=BackgroundTask.RUNNING, locked_at__lt=expired
+    )
+    # a task that keeps killing its worker runs out of attempts too
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=BackgroundTask.FAILED,
+        locked_at=None,
+        last_error="Worker lease expired on the last attempt",
+    )
+    if failed:
+        logger.error(
+            "Abandoned background tasks failed permanently",
+            extra={"tasks": failed},
+        )
+    return stale.update(status=BackgroundTask.PENDING, locked_at=None)
+
+
+class Worker:
+    """
+    Threads running due tasks until stopped.
+
+    Args:
+        threads(int): Number of worker threads.
+        poll_interval(float): Seconds an idle thread waits before looking
+            for due tasks again, unless woken up by `enqueue`.
+        lease(float): Seconds after which a running task is considered
+            abandoned by a dead worker and run again.
+    """
+
+    def __init__(self, threads=2, poll_interval=1.0, lease=300.0):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_requeue = 0.0
+
+    def start(self):
+        for number in range(self.threads):
+            thread = threading.Thread(
+                target=self._loop, name=f"taskqueue-{number}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wake(self):
+        """Make idle threads look for due tasks now."""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        """Let the threads finish their current task and exit."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_until_empty(self):
+        """Run due tasks in the calling thread until none are left."""
+        requeue_stale(self.lease)
+        while run_next():
+            pass
+
+    def _loop(self):
+        while not self._stop.is_set():
+            ran = False
+            try:
+                now = time.monotonic()
+                if now - self._last_requeue >= self.lease / 10:
+                    self._last_requeue = now
+                    requeue_stale(self.lease)
+                ran = run_next()
+            except OperationalError:
+                # e.g. the database is locked by another writer
+                logger.warning("Task queue poll failed", exc_info=True)
+            finally:
+                close_old_connections()
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def get_worker():
+    """Return the in-process worker of the current process, started lazily."""
+    global _worker, _worker_pid
+    pid = os.getpid()
+    if _worker is None or _worker_pid != pid:
+        with _worker_lock:
+            if _worker is None or _worker_pid != pid:
+                config = settings.TASKS
+                _worker = Worker(
+                    threads=config["THREADS"],
+                    poll_interval=config["POLL_INTERVAL"],
+                    lease=config["LEASE"],
+                ).start()
+                _worker_pid = pid
+    return _worker
+
+
+def _collect_queue_depth():
+    counts = BackgroundTask.objects.values("status").annotate(n=Count("id"))
+    found = {row["status"]: row["n"] for row in counts}
+    for status, _ in BackgroundTask.STATUSES:
+        yield (status,), found.get(status, 0)
+
+
+registry.callback(
+    "background_tasks_queued",
+    "Background tasks in the queue by status.",
+    ("status",),
+    _collect_queue_depth,
+)
@@ -0,0 +1,64 @@
+"""Catalog payload invalidation and filtered catalog queries."""
+
+from django.db import IntegrityError
+from django.test import TestCase
+
+from djangoapp.catalog import CatalogPayload, query_catalog
+from djangoapp.loader import load_catalog
+from djangoapp.models import CarMake, CarModel
+
+
+class CatalogPayloadTests(TestCase):
+    def setUp(self):
+        make = CarMake.objects.create(name="Audi", description="German")
+        CarModel.objects.create(car_make=make, name="A4", year=2020)
+        # two processes, each with its own payload
+        self.worker, self.other = CatalogPayload(), CatalogPayload()
+
+    def test_payload_is_reused_until_the_catalog_changes(self):
+        body, etag = self.worker.get()
+        self.assertIs(self.worker.get()[0], body)
+        CarModel.objects.create(
+            car_make=CarMake.objects.get(name="Audi"), name="A6", year=2021
+        )
+        new_body, new_etag = self.worker.get()
+        self.assertIn(b'"A6"', new_body)
+        self.assertNotEqual(new_etag, etag)
+
+    def test_change_in_one_process_reaches_the_others(self):
+        self.other.get()
+        make = CarMake.objects.get(name="Audi")
+        CarModel.objects.create(car_make=make, name="Q5", year=2022)
+        self.assertIn(b'"Q5"', self.other.get()[0])
+
+    def test_loader_invalidates_the_payload(self):
+        self.other.get()
+        load_catalog([{"make": "Kia", "model": "Rio", "year": 2019}])
+        self.assertIn(b'"Rio"', self.other.get()[0])
+
+
+class QueryCatalogTests(TestCase):
+    def setUp(self):
+        load_catalog([
+            {"make": "McLaren", "model": "720S", "year": 2021},
+            {"make": "Kia", "model": "Rio", "bodyType": "sedan",
+             "year": 2019},
+        ])
+
+    def test_make_matches_in_any_letter_case(self):
+        for make in ("mclaren", "MCLAREN", "McLaren", "mcLAREN"):
+            cars, cursor = query_catalog(make=make)
+            self.assertEqual(
+                cars, [{"CarModel": "720S", "CarMake": "McLaren"}]
+            )
+            self.assertIsNone(cursor)
+        self.assertEqual(query_catalog(make="Ferrari"), ([], None))
+
+    def test_makes_differing_in_case_are_one_make(self):
+        load_catalog([{"make": "MCLAREN", "model": "Artura", "year": 2023}])
+        self.assertEqual(CarMake.objects.count(), 2)
+        cars, _ = query_catalog(make="mclaren")
+        self.assertEqual([car["CarModel"] for car in cars],
+                         ["720S", "Artura"])
+        with self.assertRaises(IntegrityError):
+            CarMake.objects.create(name="KIA", description="Korean")
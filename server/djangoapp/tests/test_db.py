@@ -0,0 +1,64 @@
+"""
+Read-replica routing against a replica that lags behind the primary.
+
+The "replica" alias is added before the test databases are created, so
+the runner gives it a test database of its own that never sees the
+writes made to "default", which is what a lagging replica looks like.
+"""
+
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+
+from djangoapp.catalog import catalog_payload
+from djangoapp.db import ReadReplicaRouter
+from djangoapp.loader import load_catalog
+from djangoapp.models import CarMake, CarModel, ReviewCount
+from djangoapp.review_stats import add_counts, count_reviews, dealer_stats
+
+if "replica" not in connections.settings:
+    default = connections.settings["default"]
+    connections.settings["replica"] = dict(
+        default, TEST=dict(default["TEST"], NAME=None, MIRROR=None)
+    )
+
+RECORDS = [
+    {"make": "Zeta", "model": "Z1", "bodyType": "suv", "year": 2021},
+    {"make": "Zeta", "model": "Z2", "bodyType": "sedan", "year": 2022},
+]
+
+
+@override_settings(DATABASE_ROUTERS=["djangoapp.db.ReadReplicaRouter"])
+class ReadReplicaRouterTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def test_reads_go_to_the_replica_outside_transactions(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_read(CarModel), "replica")
+        self.assertEqual(router.db_for_read(ReviewCount), "default")
+        self.assertEqual(router.db_for_write(CarModel), "default")
+
+    def test_loader_reads_back_its_own_writes(self):
+        stats = load_catalog(RECORDS)
+        self.assertEqual(stats["models"], 2)
+        self.assertEqual(
+            CarModel.objects.using("default")
+            .filter(car_make__name="Zeta").count(),
+            2,
+        )
+        # the lagging replica has none of it
+        self.assertFalse(
+            CarMake.objects.using("replica").filter(name="Zeta").exists()
+        )
+
+    def test_catalog_rebuild_sees_the_load(self):
+        load_catalog(RECORDS)
+        body, _ = catalog_payload.get()
+        self.assertIn(b'"Z1"', body)
+
+    def test_review_stats_read_the_primary(self):
+        add_counts(count_reviews([
+            {"dealership": 3, "purchase": True, "sentiment": "positive"},
+        ]))
+        stats = dealer_stats(3)
+        self.assertEqual(stats["reviews"], 1)
+        self.assertEqual(stats["sentiments"]["positive"], 1)
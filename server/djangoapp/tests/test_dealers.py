@@ -0,0 +1,93 @@
+"""Dealer index loading, refresh and lookups."""
+
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from djangoapp import dealers
+from djangoapp.dealers import DealerIndex
+
+
+def dealer(dealer_id, state="Texas"):
+    return {
+        "id": dealer_id, "city": "El Paso", "state": state, "st": "TX",
+        "address": "1 Main St", "zip": "79901", "lat": "31.7",
+        "long": "-106.4", "short_name": "D",
+        "full_name": f"Dealer {dealer_id}",
+    }
+
+
+class DealerIndexTests(SimpleTestCase):
+    def test_apply_rebuilds_only_changed_states(self):
+        index = DealerIndex(lambda fresh=False: None)
+        index.apply([dealer(1), dealer(2, "Ohio")])
+        ohio = index.in_state("Ohio")
+        stats = index.apply([dealer(1), dealer(2, "Ohio"), dealer(3)])
+        self.assertEqual(stats["added"], 1)
+        self.assertEqual(stats["unchanged"], 2)
+        self.assertIs(index.in_state("Ohio"), ohio)
+        self.assertEqual([d.id for d in index.in_state("Texas")], [1, 3])
+
+    def test_unknown_id_refreshes_fresh_once(self):
+        documents = [dealer(1)]
+        calls = []
+
+        def loader(fresh=False):
+            calls.append(fresh)
+            time.sleep(0.05)
+            return list(documents)
+
+        index = DealerIndex(loader, miss_refresh=0)
+        index.snapshot()
+        documents.append(dealer(2))
+        found = []
+        threads = [
+            threading.Thread(target=lambda: found.append(index.get(2)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # the first load, then one shared refresh that skipped the cache
+        self.assertEqual(calls, [False, True])
+        self.assertEqual({d.id for d in found}, {2})
+
+    def test_falls_back_to_the_file(self):
+        index = DealerIndex(
+            lambda fresh=False: None,
+            fallback_path=dealers.settings.DEALER_INDEX["FALLBACK_FILE"],
+        )
+        self.assertTrue(index.all())
+
+
+class FetchDealersTests(SimpleTestCase):
+    def setUp(self):
+        caches[dealers.dealer_cache.alias].clear()
+
+    def test_reads_share_the_cache_and_fresh_reads_fill_it(self):
+        with mock.patch.object(
+            dealers, "get_request", return_value=[dealer(1)]
+        ) as get_request:
+            self.assertEqual(dealers._fetch_dealers(), [dealer(1)])
+            self.assertEqual(dealers._fetch_dealers(), [dealer(1)])
+            self.assertEqual(get_request.call_count, 1)
+
+            get_request.return_value = [dealer(1), dealer(2)]
+            self.assertEqual(len(dealers._fetch_dealers(fresh=True)), 2)
+            self.assertEqual(get_request.call_count, 2)
+            # the other workers now read the fresh list from the cache
+            self.assertEqual(len(dealers._fetch_dealers()), 2)
+            self.assertEqual(get_request.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        error = {"Status": 500, "message": "Backend error"}
+        with mock.patch.object(
+            dealers, "get_request", return_value=error
+        ) as get_request:
+            self.assertIsNone(dealers._fetch_dealers())
+            self.assertIsNone(dealers._fetch_dealers())
+            self.assertEqual(get_request.call_count, 2)
@@ -0,0 +1,49 @@
+"""Concurrent fan-out of independent calls and its deadline."""
+
+import math
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from djangoapp.fanout import DeadlineExceeded, fan_out
+
+
+@override_settings(
+    FANOUT={"MAX_WORKERS": 4, "MAX_CONCURRENCY": 2, "DEADLINE": 0.05}
+)
+class FanOutTests(SimpleTestCase):
+    def test_results_keep_the_order_of_the_calls(self):
+        calls = [lambda i=i: time.sleep(0.01 * (3 - i)) or i for i in range(3)]
+        self.assertEqual(fan_out(calls), [0, 1, 2])
+
+    def test_concurrency_is_capped(self):
+        lock, running, peak = threading.Lock(), [0], [0]
+
+        def call():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        fan_out([call] * 6)
+        self.assertEqual(peak[0], 2)
+
+    def test_default_deadline_keeps_finished_results(self):
+        calls = [lambda: "fast", lambda: time.sleep(0.2) or "slow"]
+        with self.assertRaises(DeadlineExceeded) as raised:
+            fan_out(calls)
+        self.assertEqual(raised.exception.results, ["fast", None])
+
+    def test_infinite_deadline_waits_for_every_call(self):
+        calls = [lambda: "fast", lambda: time.sleep(0.1) or "slow"]
+        self.assertEqual(fan_out(calls, deadline=math.inf), ["fast", "slow"])
+
+    def test_errors_are_raised(self):
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            fan_out([fail])
@@ -0,0 +1,57 @@
+"""Logging configured through dictConfig, as settings.LOGGING does."""
+
+import copy
+import io
+import logging
+import logging.config
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from djangoapp.log import QueueStreamHandler
+
+
+class QueueStreamHandlerTests(SimpleTestCase):
+    def configure(self, formatter, **handler):
+        config = copy.deepcopy(settings.LOGGING)
+        config["handlers"]["queue"].update(formatter=formatter, **handler)
+        config["filters"]["sample_debug"]["rate"] = 1.0
+        self.addCleanup(logging.config.dictConfig, settings.LOGGING)
+        output = io.StringIO()
+        with mock.patch("sys.stdout", output):
+            logging.config.dictConfig(config)
+        handler = logging.getLogger().handlers[0]
+        return handler, output
+
+    def log(self, handler):
+        logging.getLogger("djangoapp.tests").warning(
+            "review %s posted", 7, extra={"dealer_id": 15, "user": "ann"}
+        )
+        handler.close()
+
+    def test_settings_build_the_bounded_handler(self):
+        handler, _ = self.configure("json", stream="stderr", maxsize=5)
+        self.assertIsInstance(handler, QueueStreamHandler)
+        self.assertEqual(handler.queue.maxsize, 5)
+        self.assertIsNot(handler.target.stream, None)
+        self.assertEqual(handler.target.stream.name, "<stderr>")
+
+    def test_given_queue_is_used(self):
+        handler = QueueStreamHandler(mock.sentinel.queue)
+        self.assertIs(handler.queue, mock.sentinel.queue)
+
+    def test_json_records_keep_extra_fields(self):
+        handler, output = self.configure("json")
+        self.log(handler)
+        line = output.getvalue()
+        self.assertIn('"message": "review 7 posted"', line)
+        self.assertIn('"dealer_id": 15', line)
+
+    def test_plain_records_keep_extra_fields(self):
+        handler, output = self.configure("plain")
+        self.log(handler)
+        line = output.getvalue().strip()
+        self.assertTrue(
+            line.endswith('review 7 posted dealer_id=15 user="ann"'), line
+        )
@@ -0,0 +1,92 @@
+"""Metrics of several workers summed by one scrape."""
+
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from djangoapp import metrics
+
+
+class WorkerMetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        settings = override_settings(
+            METRICS={"DIR": self.dir, "FLUSH_INTERVAL": 5}
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # publishing already started, no background thread
+        for name, value in (("_worker_id", "self"),
+                            ("_worker_pid", os.getpid())):
+            patch = mock.patch.object(metrics, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def other_worker(
+        self, worker_id, written=None, view="metrics-test", **callbacks
+    ):
+        data = {
+            "written": time.time() if written is None else written,
+            "metrics": {
+                "django_http_requests_total": [
+                    ["django_http_requests_total",
+                     [view, "GET", "200"], 3],
+                ],
+                "upstream_request_duration_seconds": [
+                    ["upstream_request_duration_seconds_count",
+                     ["metrics-test", "GET"], 4],
+                ],
+            },
+            "callbacks": callbacks,
+        }
+        path = os.path.join(self.dir, worker_id + ".json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+    def test_counters_and_histograms_sum_over_workers(self):
+        metrics.requests_total.inc("metrics-test", "GET", "200", amount=2)
+        metrics.upstream_duration.observe(0.01, "metrics-test", "GET")
+        self.other_worker("2-a")
+        body = metrics.render_all()
+        self.assertIn(
+            'django_http_requests_total{view="metrics-test",method="GET",'
+            'status="200"} 5',
+            body,
+        )
+        self.assertIn(
+            'upstream_request_duration_seconds_count{upstream="metrics-test",'
+            'method="GET"} 5',
+            body,
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "self.json")))
+
+    def test_exited_workers_keep_counters_but_not_callbacks(self):
+        sample = [[["metrics-test"], 7]]
+        self.other_worker("2-a", view="exited", cache_hit_ratio=sample)
+        self.other_worker(
+            "3-b", written=time.time() - 60, view="exited",
+            cache_hit_ratio=sample,
+        )
+        body = metrics.render_all()
+        self.assertIn(
+            'cache_hit_ratio{cache="metrics-test",worker="2-a"} 7', body
+        )
+        self.assertNotIn('worker="3-b"', body)
+        self.assertIn(
+            'django_http_requests_total{view="exited",method="GET",'
+            'status="200"} 6',
+            body,
+        )
+
+    def test_without_a_directory_only_this_worker_is_rendered(self):
+        self.other_worker("2-a")
+        with override_settings(METRICS={"DIR": None, "FLUSH_INTERVAL": 5}):
+            body = metrics.render_all()
+        self.assertNotIn('view="metrics-test",method="GET",status="200"} 3',
+                         body)
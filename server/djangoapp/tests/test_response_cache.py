@@ -0,0 +1,79 @@
+"""Read-through cache: coalesced fills, stale reads and fill locks."""
+
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from djangoapp.response_cache import UNAVAILABLE, ReadThroughCache
+
+POLICIES = {"p": {"TTL": 60, "STALE": 60}}
+ERROR = {"Status": 500, "message": "Backend error"}
+
+
+def run_concurrently(count, target):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(target()))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class ReadThroughCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.cache = ReadThroughCache("default", POLICIES, lock_timeout=0.5)
+        self.calls = 0
+
+    def loader(self, value, delay=0.1):
+        def load():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return load
+
+    def test_one_fill_per_cold_key(self):
+        results = run_concurrently(
+            8, lambda: self.cache.get("p", "k", self.loader([1]))
+        )
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [[1]] * 8)
+        self.assertEqual(self.cache.get("p", "k", self.loader([2])), [1])
+
+    def test_failing_fill_is_shared_not_cached(self):
+        results = run_concurrently(
+            6, lambda: self.cache.get("p", "k", self.loader(ERROR))
+        )
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [ERROR] * 6)
+        self.cache.get("p", "k", self.loader(ERROR, delay=0))
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        cache_key = self.cache._key("p", "k")
+        caches["default"].set(cache_key, ([1], time.time() - 1), 60)
+        self.assertEqual(self.cache.get("p", "k", self.loader([2])), [1])
+        deadline = time.monotonic() + 2
+        while caches["default"].get(cache_key)[0] != [2]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(self.calls, 1)
+
+    def test_waiter_gives_up_without_loading_or_unlocking(self):
+        lock_key = self.cache._key("p", "k") + ":lock"
+        caches["default"].add(lock_key, "other worker", 10)
+        result = self.cache.get("p", "k", self.loader([1]))
+        self.assertEqual(result, UNAVAILABLE)
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(caches["default"].get(lock_key), "other worker")
+
+    def test_invalidate_policy(self):
+        self.cache.get("p", "k", self.loader([1], delay=0))
+        self.cache.invalidate("p")
+        self.assertEqual(self.cache.get("p", "k", self.loader([2], 0)), [2])
@@ -0,0 +1,61 @@
+"""Per-dealer review counters."""
+
+from unittest import mock
+
+from django.test import TestCase
+
+from djangoapp import tasks
+from djangoapp.restapis import stored_sentiments
+from djangoapp.review_stats import dealer_stats, record_review
+
+
+def review(review_id, dealer_id=7, **fields):
+    return dict(
+        {"id": review_id, "dealership": dealer_id, "purchase": False,
+         "car_make": "Audi", "car_year": 2020},
+        **fields,
+    )
+
+
+class ReviewStatsTests(TestCase):
+    def test_counts_posted_reviews(self):
+        record_review(review(1, purchase=True, sentiment="positive"))
+        record_review(review(2))
+        stats = dealer_stats(7)
+        self.assertEqual(stats["reviews"], 2)
+        self.assertEqual(stats["purchases"], 1)
+        self.assertEqual(stats["purchase_ratio"], 0.5)
+        self.assertEqual(stats["sentiments"]["positive"], 1)
+        self.assertEqual(stats["sentiments"]["unscored"], 1)
+        self.assertEqual(stats["car_makes"], {"Audi": 2})
+
+    def test_only_labels_the_backend_stored_are_counted(self):
+        record_review(review(1))
+        record_review(review(2))
+        sentiments = {"1": "negative", "2": "negative"}
+        # review 2 was labelled by a concurrent reader first
+        backend = {"status": 200, "updated": 1, "ids": [1]}
+        with mock.patch.object(
+            tasks, "update_review_sentiments", return_value=backend
+        ):
+            tasks.store_review_sentiments(sentiments, 7)
+        stats = dealer_stats(7)
+        self.assertEqual(stats["sentiments"]["negative"], 1)
+        self.assertEqual(stats["sentiments"]["unscored"], 1)
+
+    def test_drift_is_not_hidden(self):
+        record_review(review(1, sentiment="neutral"))
+        with mock.patch.object(
+            tasks, "update_review_sentiments",
+            return_value={"status": 200, "ids": [1]},
+        ):
+            # counted twice, e.g. by a backend without conditional labels
+            tasks.store_review_sentiments({"1": "neutral"}, 7)
+        self.assertEqual(dealer_stats(7)["sentiments"]["unscored"], -1)
+
+    def test_stored_sentiments(self):
+        self.assertEqual(
+            stored_sentiments({"3": "positive", 4: "neutral"}, {"ids": [4]}),
+            {4: "neutral"},
+        )
+        self.assertEqual(stored_sentiments({1: "positive"}, {}), {})
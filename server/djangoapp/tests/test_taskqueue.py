@@ -0,0 +1,92 @@
+"""Durable background task queue: queueing, retries and leases."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from djangoapp import taskqueue
+from djangoapp.models import BackgroundTask
+
+calls = []
+
+
+@taskqueue.task(name="test_record")
+def record(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+@taskqueue.task(name="test_fail", max_attempts=2)
+def fail():
+    raise RuntimeError("upstream down")
+
+
+@override_settings(
+    TASKS=dict(settings.TASKS, IN_PROCESS=False, BACKOFF=0, MAX_ATTEMPTS=5)
+)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_queued_task_runs_once_and_leaves_the_table(self):
+        taskqueue.enqueue("test_record", 15, label="positive")
+        self.assertTrue(taskqueue.run_next())
+        self.assertEqual(calls, [((15,), {"label": "positive"})])
+        self.assertFalse(BackgroundTask.objects.exists())
+        self.assertFalse(taskqueue.run_next())
+
+    def test_dedup_key_queues_the_work_once(self):
+        first = taskqueue.enqueue("test_record", 1, dedup_key="review-1")
+        again = taskqueue.enqueue("test_record", 1, dedup_key="review-1")
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(BackgroundTask.objects.count(), 1)
+        taskqueue.run_next()
+        # the key is free again once the task ran
+        taskqueue.enqueue("test_record", 1, dedup_key="review-1")
+        self.assertEqual(BackgroundTask.objects.count(), 1)
+
+    def test_delayed_task_waits(self):
+        taskqueue.enqueue("test_record", delay=60)
+        self.assertFalse(taskqueue.run_next())
+        self.assertEqual(calls, [])
+
+    def test_failing_task_is_retried_then_marked_failed(self):
+        taskqueue.enqueue("test_fail")
+        taskqueue.run_next()
+        queued = BackgroundTask.objects.get()
+        self.assertEqual(queued.status, BackgroundTask.PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn("upstream down", queued.last_error)
+        taskqueue.run_next()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, BackgroundTask.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertFalse(taskqueue.run_next())
+
+    def test_unknown_task_is_refused(self):
+        with self.assertRaises(KeyError):
+            taskqueue.enqueue("test_missing")
+
+    def test_tasks_of_dead_workers_run_again(self):
+        expired = timezone.now() - timedelta(seconds=600)
+        abandoned = BackgroundTask.objects.create(
+            name="test_record", status=BackgroundTask.RUNNING,
+            attempts=1, locked_at=expired,
+        )
+        exhausted = BackgroundTask.objects.create(
+            name="test_record", status=BackgroundTask.RUNNING,
+            attempts=5, max_attempts=5, locked_at=expired,
+        )
+        self.assertEqual(taskqueue.requeue_stale(lease=300), 1)
+        abandoned.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(abandoned.status, BackgroundTask.PENDING)
+        self.assertEqual(exhausted.status, BackgroundTask.FAILED)
+
+    def test_worker_runs_due_tasks_until_empty(self):
+        for number in range(3):
+            taskqueue.enqueue("test_record", number)
+        taskqueue.Worker(lease=300).run_until_empty()
+        self.assertEqual(sorted(args for args, _ in calls),
+                         [(0,), (1,), (2,)])
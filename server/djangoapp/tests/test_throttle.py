@@ -0,0 +1,71 @@
+"""Token buckets of the authentication views and client addresses."""
+
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from djangoapp import throttle
+from djangoapp.throttle import TokenBucketThrottle
+
+
+class TokenBucketThrottleTests(SimpleTestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucketThrottle(rate=1, burst=2)
+        with mock.patch("time.monotonic", return_value=100.0):
+            self.assertEqual(bucket.allow("a"), 0)
+            self.assertEqual(bucket.allow("a"), 0)
+            self.assertAlmostEqual(bucket.allow("a"), 1.0)
+            # other keys have their own bucket
+            self.assertEqual(bucket.allow("b"), 0)
+        with mock.patch("time.monotonic", return_value=101.0):
+            self.assertEqual(bucket.allow("a"), 0)
+
+    def test_least_recently_used_buckets_are_dropped(self):
+        bucket = TokenBucketThrottle(rate=1, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            bucket.allow(key)
+        self.assertEqual(len(bucket), 2)
+        self.assertEqual(bucket.allow("a"), 0)
+
+
+class CheckTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        for name, rate, burst in (("ip_throttle", 1, 100),
+                                  ("user_throttle", 0.01, 2)):
+            patch = mock.patch.object(
+                throttle, name, TokenBucketThrottle(rate, burst)
+            )
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def request(self, ip, forwarded=None):
+        headers = {"REMOTE_ADDR": "10.0.0.1"}
+        if forwarded is not None:
+            headers["HTTP_X_FORWARDED_FOR"] = forwarded
+        else:
+            headers["REMOTE_ADDR"] = ip
+        return self.factory.post("/djangoapp/login", **headers)
+
+    def test_username_bucket_is_per_client_ip(self):
+        attacker = self.request("203.0.113.7")
+        for _ in range(2):
+            self.assertEqual(throttle.check(attacker, "login", "Alice"), 0)
+        self.assertGreater(throttle.check(attacker, "login", "alice"), 0)
+        owner = self.request("198.51.100.4")
+        self.assertEqual(throttle.check(owner, "login", "alice"), 0)
+
+    @override_settings(AUTH_THROTTLE={"PROXY_COUNT": 1})
+    def test_clients_behind_the_proxy_are_told_apart(self):
+        first = self.request(None, forwarded="spoofed, 203.0.113.7")
+        second = self.request(None, forwarded="198.51.100.4")
+        self.assertEqual(throttle.client_ip(first), "203.0.113.7")
+        self.assertEqual(throttle.client_ip(second), "198.51.100.4")
+        for _ in range(2):
+            throttle.check(first, "login", "alice")
+        self.assertEqual(throttle.check(second, "login", "alice"), 0)
+
+    @override_settings(AUTH_THROTTLE={"PROXY_COUNT": 0})
+    def test_forwarded_header_is_ignored_without_trusted_proxies(self):
+        request = self.request(None, forwarded="203.0.113.7")
+        self.assertEqual(throttle.client_ip(request), "10.0.0.1")
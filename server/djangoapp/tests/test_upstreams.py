@@ -0,0 +1,77 @@
+"""Retries and circuit breaking of the pooled upstream clients."""
+
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from djangoapp.upstreams import (
+    CircuitBreaker,
+    CircuitOpenError,
+    UpstreamClient,
+)
+
+
+def response(status):
+    result = requests.Response()
+    result.status_code = status
+    result.raw = mock.Mock()
+    return result
+
+
+class UpstreamClientTests(SimpleTestCase):
+    def upstream(self, outcomes, **kwargs):
+        client = UpstreamClient("test", backoff=0, **kwargs)
+        session = mock.Mock()
+        session.request.side_effect = outcomes
+        patch = mock.patch.object(
+            UpstreamClient, "session", new_callable=mock.PropertyMock,
+            return_value=session,
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+        return client, session
+
+    def test_get_is_retried_on_gateway_errors(self):
+        client, session = self.upstream([response(503), response(200)])
+        self.assertEqual(client.get("http://up/x").status_code, 200)
+        self.assertEqual(session.request.call_count, 2)
+        self.assertEqual(client.breaker.failures, 0)
+
+    def test_post_is_not_retried_unless_idempotent(self):
+        down = requests.exceptions.ConnectionError("refused")
+        client, session = self.upstream([down, down, response(200)])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post("http://up/x")
+        self.assertEqual(session.request.call_count, 1)
+        self.assertEqual(
+            client.post("http://up/x", idempotent=True).status_code, 200
+        )
+
+    def test_open_circuit_fails_fast(self):
+        down = requests.exceptions.Timeout("slow")
+        client, session = self.upstream(
+            [down] * 4, retries=1,
+            breaker=CircuitBreaker(threshold=2, reset_timeout=60),
+        )
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.Timeout):
+                client.get("http://up/x")
+        with self.assertRaises(CircuitOpenError):
+            client.get("http://up/x")
+        self.assertEqual(session.request.call_count, 4)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+        with mock.patch("time.monotonic", return_value=100.0):
+            breaker.record_failure()
+            self.assertEqual(breaker.state, "open")
+            self.assertFalse(breaker.allow())
+        with mock.patch("time.monotonic", return_value=110.0):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
@@ -0,0 +1,127 @@
+"""
+Token-bucket throttling of the authentication views.
+
+A credential-stuffing burst against `login_user` or `registration` would
+otherwise make every worker hash passwords flat out. Each client IP and
+each username tried from an IP gets an in-memory token bucket, and a
+request without a token is rejected before any password is hashed. A
+username's bucket is per client IP, so nobody can lock a user out by
+spending it from elsewhere. Buckets live in the
+worker process, so with N workers a client gets at most N times the
+configured rate.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .metrics import registry
+
+throttle_decisions = registry.counter(
+    "auth_throttle_decisions_total",
+    "Authentication requests allowed or rejected by the throttle.",
+    ("endpoint", "scope", "decision"),
+)
+
+
+class TokenBucketThrottle:
+    """
+    Token buckets keyed by client, refilled continuously.
+
+    Args:
+        rate(float): Tokens added per second.
+        burst(int): Bucket size, the requests allowed at once.
+        max_keys(int): Buckets kept; the least recently used are dropped
+            (a dropped bucket starts full again).
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """
+        Take a token from the bucket of a key.
+
+        Returns:
+            float: 0 when allowed, else the seconds until a token is free.
+        """
+        with self._lock:
+            # read under the lock, so a bucket's timestamp never goes back
+            now = time.monotonic()
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            elapsed = max(0.0, now - updated)
+            tokens = min(self.burst, tokens + elapsed * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def _build(scope):
+    config = settings.AUTH_THROTTLE
+    return TokenBucketThrottle(
+        config[f"{scope}_RATE"], config[f"{scope}_BURST"], config["MAX_KEYS"]
+    )
+
+
+# process wide buckets per client IP and per (username, client IP)
+ip_throttle = _build("IP")
+user_throttle = _build("USER")
+
+registry.callback(
+    "auth_throttle_buckets",
+    "Token buckets tracked by the authentication throttle.",
+    ("scope",),
+    lambda: [(("ip",), len(ip_throttle)), (("user",), len(user_throttle))],
+    per_process=True,
+)
+
+
+def client_ip(request):
+    """
+    Return the client address, trusting PROXY_COUNT reverse proxies.
+
+    Each trusted proxy appends the address it received the request from
+    to X-Forwarded-For, so the client is that many entries from the end.
+    """
+    proxies = settings.AUTH_THROTTLE["PROXY_COUNT"]
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if proxies and len(hops) >= proxies:
+        return hops[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def check(request, endpoint, username=None):
+    """
+    Take a token per client IP and, if given, per username from that IP.
+
+    Returns:
+        float: 0 when the request may proceed, else the seconds to wait.
+    """
+    ip = client_ip(request)
+    checks = [("ip", ip_throttle, ip)]
+    if username is not None:
+        checks.append(("user", user_throttle, (str(username).lower(), ip)))
+    for scope, throttle, key in checks:
+        wait = throttle.allow(key)
+        throttle_decisions.inc(
+            endpoint, scope, "rejected" if wait else "allowed"
+        )
+        if wait:
+            return wait
+    return 0.0
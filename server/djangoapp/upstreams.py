@@ -0,0 +1,217 @@
+"""
+Pooled HTTP clients for the upstream services used by the Django app.
+
+Each upstream (the Node.js backend and the sentiment analyzer) gets its own
+keep-alive `requests.Session` with a bounded connection pool, separate
+connect and read timeouts, jittered retries for idempotent calls and a
+circuit breaker that fails fast while the upstream is down. Every attempt
+is recorded in the upstream metrics.
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+# status codes worth retrying for idempotent requests
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `threshold` failed calls in a row the circuit opens and calls fail
+    immediately. Once `reset_timeout` seconds have passed a single trial
+    call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """
+    Connection-pooled HTTP client for one upstream service.
+
+    Args:
+        name(str): Label of the upstream, used in error messages.
+        pool_size(int): Maximum kept-alive connections to the upstream.
+        connect_timeout(float): Seconds to wait for a TCP connection.
+        read_timeout(float): Seconds to wait for the response.
+        retries(int): Extra attempts for idempotent requests.
+        backoff(float): Base delay in seconds, doubled on every retry
+            and fully jittered.
+        breaker(CircuitBreaker, optional): Breaker guarding the upstream.
+    """
+
+    def __init__(
+        self,
+        name,
+        pool_size=10,
+        connect_timeout=3.05,
+        read_timeout=20.0,
+        retries=2,
+        backoff=0.2,
+        breaker=None,
+    ):
+        self.name = name
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._pid = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        The pooled session of the current process.
+
+        Sessions are rebuilt after a fork, so pre-forking servers never
+        share sockets between workers.
+        """
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                        max_retries=0,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+                    self._pid = pid
+        return self._session
+
+    def _sleep_before_retry(self, attempt):
+        # full jitter: uniform(0, backoff * 2**attempt)
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        """
+        Perform a request through the pool.
+
+        GET requests are retried on connection errors, timeouts and
+        502/503/504 responses. Other methods are only retried when
+        `idempotent` is True. The breaker sees one success or failure
+        per call, after its retries.
+
+        Raises:
+            CircuitOpenError: If the upstream circuit is open.
+            requests.exceptions.RequestException: On the last failure.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method == "GET"
+        attempts = 1 + (self.retries if idempotent else 0)
+        kwargs.setdefault("timeout", self.timeout)
+
+        if not self.breaker.allow():
+            metrics.upstream_requests.inc(self.name, method, "circuit_open")
+            raise CircuitOpenError(f"Circuit open for upstream '{self.name}'")
+        succeeded = False
+        try:
+            for attempt in range(attempts):
+                try:
+                    with metrics.upstream_call(self.name, method) as call:
+                        response = self.session.request(method, url, **kwargs)
+                        call["outcome"] = response.status_code
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                ):
+                    if attempt + 1 == attempts:
+                        raise
+                    self._sleep_before_retry(attempt)
+                    continue
+
+                if (
+                    response.status_code in RETRY_STATUSES
+                    and attempt + 1 < attempts
+                ):
+                    response.close()
+                    self._sleep_before_retry(attempt)
+                    continue
+                succeeded = response.status_code not in RETRY_STATUSES
+                return response
+        finally:
+            # one outcome per call, whatever ended it, so a half-open
+            # trial is always resolved
+            if succeeded:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def from_settings(name, config):
+    """Build an UpstreamClient from a settings.UPSTREAMS style dict."""
+    return UpstreamClient(
+        name,
+        pool_size=config.get("POOL_SIZE", 10),
+        connect_timeout=config.get("CONNECT_TIMEOUT", 3.05),
+        read_timeout=config.get("READ_TIMEOUT", 20.0),
+        retries=config.get("RETRIES", 2),
+        backoff=config.get("BACKOFF", 0.2),
+        breaker=CircuitBreaker(
+            threshold=config.get("BREAKER_THRESHOLD", 5),
+            reset_timeout=config.get("BREAKER_RESET", 30.0),
+        ),
+    )
@@ -33,14 +33,28 @@ urlpatterns = [
         view=views.get_dealer_details,
         name="dealer_details",
     ),
+    # path for the dealers nearest to a point
+    path(
+        route="nearest_dealers",
+        view=views.get_nearest_dealers,
+        name="nearest_dealers",
+    ),
     # path for dealer reviews view
     path(
         route="reviews/dealer/<int:dealer_id>",
         view=views.get_dealer_reviews,
         name="dealer_details",
     ),
+    # path for the review statistics of a dealer
+    path(
+        route="reviews/dealer/<int:dealer_id>/stats",
+        view=views.get_dealer_review_stats,
+        name="dealer_review_stats",
+    ),
     # path for add a get_cars
     path(route="get_cars", view=views.get_cars, name="getcars"),
     # path for add a review view
     path(route="add_review", view=views.add_review, name="add_review"),
+    # path for prometheus metrics
+    path(route="metrics", view=views.metrics_view, name="metrics"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
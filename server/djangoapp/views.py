@@ -9,20 +9,58 @@ and execute the logic when those routes are accessed.
 from django.contrib.auth.models import User
 from django.contrib.auth import logout
 
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth import login, authenticate
 import logging
 import json
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.cache import add_never_cache_headers
 from django.views.decorators.csrf import csrf_exempt
-from .populate import initiate
-from .models import CarMake, CarModel
-from .restapis import get_request, analyze_review_sentiments, post_review
+from .catalog import (
+    DEFAULT_FIELDS,
+    DEFAULT_LIMIT,
+    FIELDS as CATALOG_FIELDS,
+    MAX_LIMIT,
+    catalog_payload,
+    query_catalog,
+)
+from .conditional import conditional
+from .dealers import DealerIndexUnavailable, dealer_index
+from .geo import (
+    DEFAULT_LIMIT as NEAREST_DEFAULT_LIMIT,
+    MAX_LIMIT as NEAREST_MAX_LIMIT,
+    dealer_locator,
+)
+from .metrics import render_all
+from .restapis import (
+    analyze_review_sentiments_batch,
+    iter_review_pages,
+    post_scored_review,
+)
+from .review_stats import dealer_stats, record_review
+from .taskqueue import enqueue
+from . import throttle
 
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
 
+def too_many_requests(wait):
+    """Return a 429 response telling the client when to retry."""
+    response = JsonResponse(
+        {"status": 429, "message": "Too Many Requests"}, status=429
+    )
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
 # Create a `login_request`
 @csrf_exempt
 def login_user(request):
@@ -44,6 +82,10 @@ def login_user(request):
     data = json.loads(request.body)
     username = data["userName"]
     password = data["password"]
+    # Refuse bursts per client and per username before hashing anything
+    wait = throttle.check(request, "login", username)
+    if wait:
+        return too_many_requests(wait)
     # Check user credentials
     user = authenticate(username=username, password=password)
     data = {"userName": username}
@@ -113,83 +155,124 @@ def registration(request):
     except (json.JSONDecodeError, KeyError):
         return JsonResponse({"error": "Invalid Request"}, status=400)
 
-    # Check if user already exists
-    username_exist = User.objects.filter(username=username).exists()
-    email_exist = User.objects.filter(email=email).exists()
-
-    # if it is a new user
-    if not username_exist and not email_exist:
-        # create user in auth_user table
-        user = User.objects.create_user(
-            username=username,
-            first_name=first_name,
-            last_name=last_name,
-            password=password,
-            email=email,
-        )
-        login(request, user)
-        # log this is as new user
-        logger.debug(f"{username} is new user")
-        data = {"username": username, "status": "Authenticated"}
+    wait = throttle.check(request, "registration")
+    if wait:
+        return too_many_requests(wait)
+
+    # Check if the username or the email is taken, in one query
+    taken = User.objects.filter(Q(username=username) | Q(email=email))
+    if not taken.exists():
+        try:
+            # create user in auth_user table; the unique indexes on
+            # username and email catch a concurrent registration
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=password,
+                    email=email,
+                )
+        except IntegrityError:
+            pass
+        else:
+            login(request, user)
+            # log this is as new user
+            logger.debug("%s is new user", username)
+            data = {"username": username, "status": "Authenticated"}
+            return JsonResponse(data)
+
+    existing = list(taken.values_list("username", "email"))
+    if any(row[0] == username for row in existing):
+        data = {
+            "username": username,
+            "error": "Username Already Registered"
+        }
+        return JsonResponse(data)
+    elif existing:
+        data = {"email": email, "error": "Email Already Registered"}
         return JsonResponse(data)
     else:
-        if username_exist:
-            data = {
-                "username": username,
-                "error": "Username Already Registered"
-            }
-            return JsonResponse(data)
-        elif email_exist:
-            data = {"email": email, "error": "Email Already Registered"}
-            return JsonResponse(data)
-        else:
-            return JsonResponse({"error": "Invalid Details"}, status=400)
+        return JsonResponse({"error": "Invalid Details"}, status=400)
 
 
+@conditional("catalog")
 def get_cars(request):
     """
     Handle request to retrieve car data
 
-    This view function checks the database for available cars,
-    if no records exists, it uploads car make and car model data
-    using a helper function.
-    Finally it returns total cars with car make and car model details.
+    Without query parameters this view function serves the
+    pre-serialized car catalog payload, which is built once and
+    rebuilt only when car makes or models change. The catalog is
+    seeded by the `load_catalog` management command, never during
+    a request. Its precomputed ETag lets `conditional` answer
+    a matching If-None-Match with a 304 response.
+
+    Query parameters filter and page the catalog instead:
+    make, type, year_min, year_max, after (the "next" cursor of the
+    previous page), limit, and fields (comma separated projection
+    of id, CarModel, CarMake, type and year).
 
     Args:
         request(HTTPRequest):
         The HTTP request object for retrieving car data.
 
     Returns:
-        JsonResponse:
+        HttpResponse:
         A JSON response as a dictionary containing,
         car make and car model details.
     """
-    count = CarMake.objects.filter().count()
-    print(count)
-    if count == 0:
-        # run fn to bulk upload data from populate.py
-        initiate()
-    # using select_related to reference both CarModel and CarMake class
-    car_models = CarModel.objects.select_related("car_make")
+    if not request.GET:
+        body, etag = catalog_payload.get()
+        response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        return response
+
+    params = request.GET
+    try:
+        year_min = params.get("year_min")
+        year_max = params.get("year_max")
+        after = params.get("after")
+        limit = min(int(params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        fields = tuple(params.get("fields", ",".join(DEFAULT_FIELDS))
+                       .split(","))
+        if limit < 1 or any(field not in CATALOG_FIELDS for field in fields):
+            raise ValueError
+        cars, next_cursor = query_catalog(
+            make=params.get("make"),
+            body_type=params.get("type"),
+            year_min=int(year_min) if year_min else None,
+            year_max=int(year_max) if year_max else None,
+            after=int(after) if after else None,
+            limit=limit,
+            fields=fields,
+        )
+    except ValueError:
+        return JsonResponse(
+            {"status": 400, "message": "Bad Request"}, status=400
+        )
+    return JsonResponse({"CarModels": cars, "next": next_cursor})
 
-    cars = []
 
-    for car_model in car_models:
-        cars.append({
-            "CarModel": car_model.name,
-            "CarMake": car_model.car_make.name
-            })
-    return JsonResponse({"CarModels": cars})
+def uncacheable(data):
+    """
+    Return a JSON response that clients must not cache, for the
+    upstream errors the views pass through with a 200 status.
+    """
+    response = JsonResponse(data)
+    add_never_cache_headers(response)
+    return response
 
 
 # Update the `get_dealerships` render list of dealerships all by default,
+@conditional("dealers")
 def get_dealerships(request, state="All"):
     """
     Handle request to retrieve dealerships data with optional state filter.
 
-    This view function receives a user request for dealership information,
-    sends an API request to the node.js mongodb backened service,
-    using a helper function, and returns a list of dealerships.
+    This view function receives a user request for dealership information
+    and returns a list of dealerships read from the in-memory dealer
+    index, which mirrors the node.js mongodb backend service.
     If state is provided, the results are filtered accordingly.
 
     Args:
@@ -201,34 +284,175 @@ def get_dealerships(request, state="All"):
     Returns:
         JsonResponse:  A JSON response containing dealership details.
     """
-    if state == "All":
-        endpoint = "/fetchDealers"
-    else:
-        endpoint = f"/fetchDealers/{state}"
-    dealerships = get_request(endpoint)
-    return JsonResponse({"status": 200, "dealers": dealerships})
+    try:
+        if state == "All":
+            dealerships = dealer_index.all()
+        else:
+            dealerships = dealer_index.in_state(state)
+    except DealerIndexUnavailable:
+        return uncacheable({"status": 500, "message": "Backend error"})
+    return JsonResponse({
+        "status": 200,
+        "dealers": [dealer.as_dict() for dealer in dealerships],
+    })
 
 
 # Create view to render the dealer details
+@conditional("dealers")
 def get_dealer_details(request, dealer_id):
     if dealer_id:
-        endpoint = f"/fetchDealer/{str(dealer_id)}"
-        dealership = get_request(endpoint)
+        try:
+            dealer = dealer_index.get(dealer_id)
+        except DealerIndexUnavailable:
+            return uncacheable({"status": 500, "message": "Backend error"})
+        # a list of zero or one dealer, as the backend returns it
+        dealership = [dealer.as_dict()] if dealer is not None else []
         return JsonResponse({"status": 200, "dealer": dealership})
     else:
         return JsonResponse({"status": 400, "message": "Bad Request"})
 
 
+@conditional("dealers")
+def get_nearest_dealers(request):
+    """
+    Handle requests for the dealers closest to a point.
+
+    Query parameters: lat and long of the point (degrees), limit (the
+    number of dealers, default 5) and optionally radius (km) to return
+    only the dealers within that distance. Dealers come closest first,
+    each with its distance in km.
+
+    Args:
+        request(HTTPRequest):
+        The HTTP request object carrying the query parameters.
+
+    Returns:
+        JsonResponse:
+        A JSON response containing the nearest dealerships.
+    """
+    params = request.GET
+    try:
+        lat = float(params["lat"])
+        long = float(params["long"])
+        limit = min(
+            int(params.get("limit", NEAREST_DEFAULT_LIMIT)),
+            NEAREST_MAX_LIMIT,
+        )
+        radius = params.get("radius")
+        radius = float(radius) if radius else None
+        if (
+            not (-90 <= lat <= 90 and -180 <= long <= 180)
+            or limit < 1
+            or (radius is not None and not radius >= 0)
+        ):
+            raise ValueError
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"status": 400, "message": "Bad Request"}, status=400
+        )
+    try:
+        if radius is None:
+            matches = dealer_locator.nearest(lat, long, limit)
+        else:
+            matches = dealer_locator.within(lat, long, radius, limit)
+    except DealerIndexUnavailable:
+        return uncacheable({"status": 500, "message": "Backend error"})
+    return JsonResponse({
+        "status": 200,
+        "dealers": [
+            dict(dealer.as_dict(), distance=round(distance, 3))
+            for dealer, distance in matches
+        ],
+    })
+
+
+def shape_reviews(reviews, dealer):
+    """
+    Complete a page of a dealer's reviews, in place.
+
+    Reviews carry the sentiment stored when they were posted; only
+    legacy reviews without one are sent to the sentiment analysis
+    microservice, in batches, and their labels are stored back.
+    Every review gets the dealer's location.
+    """
+    deadline = time.monotonic() + settings.FANOUT["DEADLINE"]
+    legacy = [
+        review_detail for review_detail in reviews
+        if not review_detail.get("sentiment")
+    ]
+    sentiments = analyze_review_sentiments_batch(
+        [review_detail["review"] for review_detail in legacy],
+        deadline=max(deadline - time.monotonic(), 0),
+    )
+    scored = {}
+    for review_detail, response in zip(legacy, sentiments):
+        review_detail["sentiment"] = response.get("sentiment")
+        if review_detail["sentiment"]:
+            scored[review_detail["id"]] = review_detail["sentiment"]
+    if scored:
+        # store the labels, so later reads skip the analyzer
+        enqueue(
+            "store_review_sentiments", scored, dealer.id,
+            dedup_key=f"sentiments:dealer:{dealer.id}:{min(scored)}",
+        )
+    for review_detail in reviews:
+        # add new key:value pair in reviews dict
+        review_detail["city"] = dealer.city
+        review_detail["address"] = dealer.address
+        review_detail["zip"] = dealer.zip
+        review_detail["state"] = dealer.state
+    return reviews
+
+
+def stream_reviews(first_page, pages, dealer):
+    """
+    Encode a dealer's reviews as one JSON document, page by page.
+
+    Only one backend page is held at a time. If a later page cannot be
+    fetched the document ends early with "next", the cursor to resume
+    from with ?after=.
+    """
+    yield b'{"status": 200, "reviews": ['
+    separator = b""
+    page = first_page
+    last_id = None
+    while True:
+        if page:
+            yield separator + b", ".join(
+                json.dumps(review_detail).encode("utf-8")
+                for review_detail in page
+            )
+            separator = b", "
+            last_id = page[-1]["id"]
+        page = next(pages, None)
+        if page is None:
+            break
+        if not isinstance(page, list):
+            logger.warning(
+                "Review stream truncated", extra={"dealer": dealer.id}
+            )
+            yield b'], "next": ' + json.dumps(last_id).encode("utf-8") + b"}"
+            return
+        shape_reviews(page, dealer)
+    yield b"]}"
+
+
 # Get dealership reviews
+@conditional("reviews")
 def get_dealer_reviews(request, dealer_id):
     """
     Handle requests to retrieve dealerships reviews.
 
     This view function receives a user request for dealership reviews,
-    sends an API request to the node.js mongodb backend service,
-    using a helper function, and returns a list of reviews.
-    It also calls the sentiment analysis microservice,
-    to enrich each review with its corresponding sentiment.
+    fetches them from the node.js mongodb backend service page by page,
+    completes them with `shape_reviews` and returns a list of reviews.
+
+    Query parameters limit and after page through the reviews ordered
+    by id: the response holds up to limit reviews with an id above
+    after, and "next" is the after of the following page (null on the
+    last one). Without limit every review is returned; when they span
+    several backend pages the response is streamed, so memory per
+    request stays bounded by the page size.
 
     Args:
         request(HTTPRequest):
@@ -242,25 +466,75 @@ def get_dealer_reviews(request, dealer_id):
     """
     # if dealer id has been provided
     if dealer_id:
-        endpoint_reviews = f"/fetchReviews/dealer/{str(dealer_id)}"
-        endpoint_dealer = f"/fetchDealer/{str(dealer_id)}"
-
-        reviews = get_request(endpoint_reviews)
-        dealer_response = get_request(endpoint_dealer)
-        # dealer_response will return a list which contain dict
-        dealer_details = dealer_response[0]
-
-        for review_detail in reviews:
-            # call sentiment analyzer microservice
-            response = analyze_review_sentiments(review_detail["review"])
-            print(f"Reviews:  {reviews}")
-            # add new key:value pair in reviews dict
-            review_detail["sentiment"] = response["sentiment"]
-            review_detail["city"] = dealer_details["city"]
-            review_detail["address"] = dealer_details["address"]
-            review_detail["zip"] = dealer_details["zip"]
-            review_detail["state"] = dealer_details["state"]
-        return JsonResponse({"status": 200, "reviews": reviews})
+        try:
+            limit = request.GET.get("limit")
+            limit = int(limit) if limit else None
+            after = request.GET.get("after")
+            after = int(after) if after else None
+            if limit is not None and limit < 1:
+                raise ValueError
+        except ValueError:
+            return JsonResponse(
+                {"status": 400, "message": "Bad Request"}, status=400
+            )
+        try:
+            dealer = dealer_index.get(dealer_id)
+        except DealerIndexUnavailable:
+            return uncacheable({"status": 500, "message": "Backend error"})
+        if dealer is None:
+            return JsonResponse({"status": 404, "message": "Not Found"})
+
+        page_size = settings.REVIEW_PAGES["PAGE_SIZE"]
+        if limit is not None:
+            page_size = min(limit, settings.REVIEW_PAGES["MAX_PAGE_SIZE"])
+        pages = iter_review_pages(
+            f"/fetchReviews/dealer/{str(dealer_id)}", page_size, after
+        )
+        reviews = next(pages)
+        if not isinstance(reviews, list):
+            return uncacheable({"status": 500, "message": "Backend error"})
+        shape_reviews(reviews, dealer)
+        if limit is not None:
+            next_after = (
+                reviews[-1]["id"] if len(reviews) == page_size else None
+            )
+            return JsonResponse(
+                {"status": 200, "reviews": reviews, "next": next_after}
+            )
+        if len(reviews) < page_size:
+            return JsonResponse({"status": 200, "reviews": reviews})
+        return StreamingHttpResponse(
+            stream_reviews(reviews, pages, dealer),
+            content_type="application/json",
+        )
+    else:
+        return JsonResponse({"status": 400, "message": "Bad Request"})
+
+
+@conditional("reviews")
+def get_dealer_review_stats(request, dealer_id):
+    """
+    Handle requests for the review statistics of a dealership.
+
+    The statistics are read from counters kept current as reviews are
+    added (see djangoapp/review_stats.py), so the response costs the
+    same however many reviews the dealer has.
+
+    Args:
+        request(HTTPRequest):
+        The HTTP request object for retrieving the statistics.
+        dealer_id:
+        The unique identifier of the dealership.
+
+    Returns:
+        JsonResponse:
+        A JSON response with review counts by sentiment, car make and
+        car year, and the share of reviewers who bought a car.
+    """
+    if dealer_id:
+        return JsonResponse(
+            {"status": 200, "dealer_id": dealer_id, **dealer_stats(dealer_id)}
+        )
     else:
         return JsonResponse({"status": 400, "message": "Bad Request"})
 
@@ -272,8 +546,9 @@ def add_review(request):
 
     This view function receives a user request(request.body),
     containing dealership review data. It checks for user authentication,
-    then sends an API call to the node.js mongodb backend service
-    using a helper function.
+    scores the review text once with the sentiment analyzer
+    and sends an API call to the node.js mongodb backend service
+    storing the review with its sentiment, using a helper function.
     Finally it returns a JSON response with the backend result.
 
     Args:
@@ -285,12 +560,40 @@ def add_review(request):
     """
     if not request.user.is_anonymous:
         data = json.loads(request.body)
+        if settings.TASKS["DEFER_REVIEWS"]:
+            # a background task posts it, retrying while the backend is down;
+            # the request id keeps its retries from storing it twice
+            enqueue("forward_review", dict(data, request_id=uuid.uuid4().hex))
+            return JsonResponse(
+                {"status": 200, "message": "Review queued", "queued": True}
+            )
         try:
-            response = post_review(data)
-            print(f"Backend response: {response}")
+            # scored once here, readers use the stored sentiment
+            response = post_scored_review(data)
+            # status and id only, the stored review holds personal data
+            logger.debug(
+                "Review posted",
+                extra={
+                    "status": response.get("status", response.get("Status")),
+                    "review_id": (response.get("review") or {}).get("id"),
+                },
+            )
+            if isinstance(response.get("review"), dict):
+                # keep the dealer's review statistics current
+                record_review(response["review"])
             return JsonResponse(response)
-        except Exception as e:
-            print("Error posting review ", e)
+        except Exception:
+            logger.exception("Error posting review")
             return JsonResponse({"status": 500, "message": "Backend error"})
     else:
         return JsonResponse({"status": 403, "message": "Unauthorized"})
+
+
+def metrics_view(request):
+    """
+    Expose request, upstream, ORM and cache metrics of all workers
+    in the Prometheus text format, see metrics.render_all.
+    """
+    return HttpResponse(
+        render_all(), content_type="text/plain; version=0.0.4"
+    )
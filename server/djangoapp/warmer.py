@@ -0,0 +1,148 @@
+"""
+Cache warmer for the dealer pages.
+
+After a deploy every gunicorn worker starts with cold caches, and the
+first visitor of each dealer page pays for the backend fetches and the
+sentiment analysis. `warm_caches` walks every dealer of `/fetchDealers`
+with bounded concurrency and prefetches what the dealer views need:
+- the dealer list, stored in the shared dealer cache the dealer index
+  of every worker loads from, and applied to this process's index;
+- dealer reviews, whose legacy reviews without a stored sentiment are
+  scored (filling the sentiment cache) and get their label stored in
+  the backend, so `get_dealer_reviews` makes no analyzer calls.
+"""
+
+import logging
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .dealers import dealer_index
+from .fanout import DeadlineExceeded, fan_out
+from .response_cache import dealer_cache
+from .restapis import (
+    analyze_review_sentiments_batch,
+    get_request,
+    iter_review_pages,
+    stored_sentiments,
+    update_review_sentiments,
+)
+from .review_stats import record_sentiments
+
+logger = logging.getLogger(__name__)
+
+
+def local_caches():
+    """
+    Names of the warmed caches that live only in this process.
+
+    Warming those from a management command has no effect on the
+    gunicorn workers.
+    """
+    aliases = {dealer_cache.alias}
+    shared = settings.SENTIMENT_CACHE.get("SHARED_CACHE")
+    if shared:
+        aliases.add(shared)
+    local = sorted(
+        alias for alias in aliases if isinstance(caches[alias], LocMemCache)
+    )
+    if not shared:
+        local.append("sentiment")
+    return local
+
+
+def warm_dealer(dealer_id):
+    """
+    Score the reviews of a dealer.
+
+    Returns:
+        dict: Counts of the reviews, of the reviews scored now and of
+        those left unscored (None when the reviews could not be fetched).
+    """
+    result = {
+        "reviews": 0,
+        "scored": 0,
+        "unscored": 0,
+    }
+    for reviews in iter_review_pages(
+        f"/fetchReviews/dealer/{dealer_id}",
+        settings.REVIEW_PAGES["PAGE_SIZE"],
+    ):
+        if not isinstance(reviews, list):
+            result["unscored"] = None
+            return result
+        legacy = [
+            review for review in reviews if not review.get("sentiment")
+        ]
+        sentiments = {
+            review["id"]: response["sentiment"]
+            for review, response in zip(
+                legacy,
+                analyze_review_sentiments_batch(
+                    [review["review"] for review in legacy]
+                ),
+            )
+            if "sentiment" in response
+        }
+        if sentiments:
+            stored = update_review_sentiments(sentiments)
+            if stored.get("Status") == 500:
+                sentiments = {}
+            else:
+                record_sentiments(
+                    dealer_id, stored_sentiments(sentiments, stored).values()
+                )
+        result["reviews"] += len(reviews)
+        result["scored"] += len(sentiments)
+        result["unscored"] += len(legacy) - len(sentiments)
+    return result
+
+
+def warm_caches(concurrency=4, deadline=600.0):
+    """
+    Prefetch the dealer list and the review sentiments of every dealer.
+
+    Args:
+        concurrency(int): Dealers warmed at once.
+        deadline(float): Seconds allowed for the whole run.
+
+    Returns:
+        dict: Counts of dealers warmed, reviews seen and
+        scored, the share of dealers fully warmed and the duration.
+    """
+    started = time.monotonic()
+    dealers = get_request("/fetchDealers")
+    if not isinstance(dealers, list):
+        raise RuntimeError("Could not fetch dealers from the backend.")
+    dealer_cache.set("dealers", "All", dealers)
+    dealer_index.apply(dealers)
+
+    dealer_ids = [dealer["id"] for dealer in dealers]
+    calls = [partial(warm_dealer, dealer_id) for dealer_id in dealer_ids]
+    # each warm_dealer fans out its own analyzer calls on the same pool,
+    # leave threads for them
+    concurrency = max(1, min(concurrency, settings.FANOUT["MAX_WORKERS"] // 2))
+    try:
+        results = fan_out(
+            calls, deadline=deadline, max_concurrency=concurrency
+        )
+    except DeadlineExceeded as e:
+        logger.warning("Cache warming deadline exceeded")
+        results = e.results
+
+    dealer_results = [r for r in results if r is not None]
+    warmed = [r for r in dealer_results if r["unscored"] == 0]
+    stats = {
+        "dealers": len(dealer_ids),
+        "dealers_warmed": len(warmed),
+        "reviews": sum(r["reviews"] for r in dealer_results),
+        "scored": sum(r["scored"] for r in dealer_results),
+        "unscored": sum(r["unscored"] or 0 for r in dealer_results),
+        "coverage": len(warmed) / len(dealer_ids) if dealer_ids else 1.0,
+        "seconds": time.monotonic() - started,
+    }
+    logger.info("Dealer caches warmed", extra=stats)
+    return stats
@@ -13,6 +13,11 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
+from djangoapp.db import sqlite_options
+from djangoapp.log import parse_levels
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover the whole middleware stack
+    'djangoapp.middleware.TimingMiddleware',
+    # before anything else reading the response body
+    'djangoapp.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,8 +96,312 @@ WSGI_APPLICATION = 'djangoproj.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH') or BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# DB_PROFILE=production tunes SQLite for concurrent gunicorn workers:
+# WAL lets readers run alongside the single writer, synchronous=NORMAL
+# only fsyncs at checkpoints, busy_timeout (ms) makes writers wait for the
+# lock instead of failing, and mmap_size (bytes) and cache_size (negative
+# means KiB) keep hot pages in memory. Connections are kept for
+# CONN_MAX_AGE seconds instead of being reopened on every request.
+DB_PROFILE = os.getenv('DB_PROFILE', 'default')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -32000)),
+    'temp_store': 'MEMORY',
+}
+if DB_PROFILE == 'production':
+    DATABASES['default'].update(
+        OPTIONS=sqlite_options(SQLITE_PRAGMAS),
+        CONN_MAX_AGE=int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        CONN_HEALTH_CHECKS=True,
+    )
+
+# Optional read-only replica of the database file (for example restored by
+# a replication tool), reads are sent to it by djangoapp.db.ReadReplicaRouter
+if os.getenv('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{os.getenv('SQLITE_REPLICA_PATH')}?mode=ro",
+        'OPTIONS': sqlite_options({
+            'query_only': 'ON',
+            'busy_timeout': SQLITE_PRAGMAS['busy_timeout'],
+            'mmap_size': SQLITE_PRAGMAS['mmap_size'],
+            'cache_size': SQLITE_PRAGMAS['cache_size'],
+        }, immediate=False),
+        'CONN_MAX_AGE': DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_ROUTERS = ['djangoapp.db.ReadReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'djangoapp-default',
+    },
+    # Local memory per worker by default, set SHARED_CACHE_DIR to share
+    # the cache between gunicorn workers through the filesystem
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SHARED_CACHE_DIR'),
+    } if os.getenv('SHARED_CACHE_DIR') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'djangoapp-shared',
+    },
+    # primary store of sessions in 'cached_db' mode, shared by the workers
+    # through SHARED_CACHE_DIR (a miss falls back to the database)
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.getenv('SHARED_CACHE_DIR'), 'sessions'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SESSION_CACHE_MAX_ENTRIES', 10000)),
+        },
+    } if os.getenv('SHARED_CACHE_DIR') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'djangoapp-sessions',
+    },
+}
+
+# Session storage, chosen with SESSION_MODE:
+# 'db' keeps sessions in the django_session table only, 'cached_db' reads
+# them from the 'sessions' cache and writes them through to the table, and
+# 'signed_cookies' keeps them in a signed cookie on the client, so no
+# session row is written at all. 'cached_db' needs SHARED_CACHE_DIR: with a
+# cache per worker, a logout would only end the session in one of them.
+SESSION_MODE = os.getenv(
+    'SESSION_MODE', 'cached_db' if os.getenv('SHARED_CACHE_DIR') else 'db'
+)
+if SESSION_MODE == 'cached_db' and not os.getenv('SHARED_CACHE_DIR'):
+    raise ImproperlyConfigured(
+        "SESSION_MODE 'cached_db' needs SHARED_CACHE_DIR"
+    )
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# request.user is loaded through USER_CACHE, which must be shared by all
+# workers so a deactivated user or a changed password counts everywhere at
+# once. Without SHARED_CACHE_DIR there is no shared cache and users are read
+# from the database. USER_CACHE_TTL is the lifetime of a cached user.
+AUTHENTICATION_BACKENDS = ['djangoapp.auth.CachedModelBackend']
+USER_CACHE = 'shared' if os.getenv('SHARED_CACHE_DIR') else None
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))
+
+# Sentiment labels keyed by review text hash, see djangoapp/sentiment_cache.py
+# SHARED_CACHE names an entry in CACHES shared by all workers (None = off)
+SENTIMENT_CACHE = {
+    'MAX_ENTRIES': int(os.getenv('SENTIMENT_CACHE_MAX_ENTRIES', 10000)),
+    'TTL': None,
+    'SHARED_CACHE': os.getenv('SENTIMENT_SHARED_CACHE') or None,
+}
+
+# Reviews are scored once when posted, see restapis.post_scored_review
+# WAIT is how long add_review waits for the analyzer (in seconds) before
+# posting the review and storing its label in the background
+SENTIMENT_ON_WRITE = {
+    'WAIT': float(os.getenv('SENTIMENT_ON_WRITE_WAIT', 0.5)),
+}
+
+# Durable background task queue, see djangoapp/taskqueue.py
+# IN_PROCESS runs THREADS worker threads in every process that enqueues,
+# `manage.py run_task_workers` runs standalone workers. BACKOFF and
+# MAX_BACKOFF bound retry delays, LEASE is when a task whose worker died is
+# run again; it must exceed the longest task (all in seconds).
+# DEFER_REVIEWS makes add_review queue reviews instead of posting them.
+TASKS = {
+    'IN_PROCESS': os.getenv('TASKS_IN_PROCESS', 'true').lower() == 'true',
+    'THREADS': int(os.getenv('TASK_THREADS', 2)),
+    'POLL_INTERVAL': float(os.getenv('TASK_POLL_INTERVAL', 1.0)),
+    'MAX_ATTEMPTS': int(os.getenv('TASK_MAX_ATTEMPTS', 5)),
+    'BACKOFF': float(os.getenv('TASK_BACKOFF', 2.0)),
+    'MAX_BACKOFF': float(os.getenv('TASK_MAX_BACKOFF', 300)),
+    'LEASE': float(os.getenv('TASK_LEASE', 300)),
+    'DEFER_REVIEWS': (
+        os.getenv('TASKS_DEFER_REVIEWS', 'false').lower() == 'true'
+    ),
+}
+
+# Pooled HTTP clients for upstream services, see djangoapp/upstreams.py
+# Timeouts are in seconds, BACKOFF is the base delay of jittered retries
+UPSTREAM_DEFAULTS = {
+    'POOL_SIZE': int(os.getenv('UPSTREAM_POOL_SIZE', 10)),
+    'CONNECT_TIMEOUT': float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05)),
+    'READ_TIMEOUT': float(os.getenv('UPSTREAM_READ_TIMEOUT', 10)),
+    'RETRIES': int(os.getenv('UPSTREAM_RETRIES', 2)),
+    'BACKOFF': float(os.getenv('UPSTREAM_BACKOFF', 0.2)),
+    'BREAKER_THRESHOLD': int(os.getenv('UPSTREAM_BREAKER_THRESHOLD', 5)),
+    'BREAKER_RESET': float(os.getenv('UPSTREAM_BREAKER_RESET', 30)),
+}
+
+UPSTREAMS = {
+    'backend': dict(UPSTREAM_DEFAULTS),
+    'sentiment': dict(UPSTREAM_DEFAULTS),
+}
+
+# Concurrent upstream calls issued by views, see djangoapp/fanout.py
+# MAX_CONCURRENCY caps calls in flight per request, DEADLINE is in seconds
+FANOUT = {
+    'MAX_WORKERS': int(os.getenv('FANOUT_MAX_WORKERS', 16)),
+    'MAX_CONCURRENCY': int(os.getenv('FANOUT_MAX_CONCURRENCY', 4)),
+    'DEADLINE': float(os.getenv('FANOUT_DEADLINE', 15)),
+}
+
+# Review pages fetched from the backend, see restapis.iter_review_pages.
+# PAGE_SIZE is the default page of get_dealer_reviews and the backend page
+# size when streaming a dealer's full review set; MAX_PAGE_SIZE caps the
+# ?limit= of clients (the backend caps pages at 1000).
+REVIEW_PAGES = {
+    'PAGE_SIZE': int(os.getenv('REVIEW_PAGE_SIZE', 500)),
+    'MAX_PAGE_SIZE': 1000,
+}
+
+# Read-through cache of dealer responses, see djangoapp/response_cache.py
+# TTL is how long an entry is fresh, STALE how long it may then be served
+# while a background refresh runs (both in seconds). The dealer list is
+# fresh as long as the dealer index keeps it, see DEALER_INDEX below.
+RESPONSE_CACHE = {
+    'ALIAS': 'shared',
+    'POLICIES': {
+        'dealers': {
+            'TTL': float(os.getenv('DEALER_INDEX_REFRESH', 60)),
+            'STALE': 3600,
+        },
+    },
+}
+
+# In-memory dealership read model, see djangoapp/dealers.py. It reloads the
+# dealer list in the background when older than REFRESH_INTERVAL, and at
+# most every MISS_REFRESH when asked for an unknown dealer (in seconds).
+# FALLBACK_FILE seeds it when the backend is down at start.
+DEALER_INDEX = {
+    'REFRESH_INTERVAL': float(os.getenv('DEALER_INDEX_REFRESH', 60)),
+    'MISS_REFRESH': 10.0,
+    'FALLBACK_FILE': os.path.join(
+        BASE_DIR, 'database', 'data', 'dealerships.json'
+    ),
+}
+
+# HTTP caching of the JSON API. CACHE_CONTROL maps the policy names of
+# djangoapp/conditional.py to Cache-Control headers; clients revalidate with
+# the ETag afterwards and get a 304 while nothing changed. Bodies of at
+# least COMPRESS_MIN_SIZE bytes are compressed with the first encoding of
+# COMPRESS_ENCODINGS the client accepts ('br' needs the Brotli package),
+# COMPRESSED_ENTRIES bounds the compressed bodies kept per process.
+HTTP_CACHE = {
+    'CACHE_CONTROL': {
+        'catalog': 'public, max-age=300, stale-while-revalidate=3600',
+        'dealers': 'public, max-age=60, stale-while-revalidate=300',
+        'reviews': 'public, no-cache',
+    },
+    'COMPRESS_MIN_SIZE': int(os.getenv('COMPRESS_MIN_SIZE', 860)),
+    'COMPRESS_ENCODINGS': ['br', 'gzip'],
+    'COMPRESS_LEVELS': {'br': 5, 'gzip': 6},
+    'COMPRESSED_ENTRIES': 256,
+}
+
+# Prometheus metrics, see djangoapp/metrics.py. Every worker writes its
+# samples to DIR each FLUSH_INTERVAL seconds and /djangoapp/metrics sums
+# those of all workers. DIR defaults to a directory of SHARED_CACHE_DIR;
+# without either, a scrape only shows the worker answering it.
+METRICS = {
+    'DIR': os.getenv('METRICS_DIR') or (
+        os.path.join(os.getenv('SHARED_CACHE_DIR'), 'metrics')
+        if os.getenv('SHARED_CACHE_DIR') else None
+    ),
+    'FLUSH_INTERVAL': float(os.getenv('METRICS_FLUSH_INTERVAL', 5)),
+}
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+# Records go through a queue to a background writer thread, see
+# djangoapp/log.py. LOG_FORMAT is "json" (the default) or "plain", both
+# include the `extra` fields of a record. LOG_LEVELS sets per-logger
+# levels, e.g. "djangoapp.restapis=DEBUG,django=WARNING".
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'djangoapp.log.JsonFormatter'},
+        'plain': {
+            'class': 'djangoapp.log.PlainFormatter',
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'filters': {
+        'sample_debug': {
+            '()': 'djangoapp.log.SamplingFilter',
+            'rate': float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.01)),
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'djangoapp.log.QueueStreamHandler',
+            'formatter': os.getenv('LOG_FORMAT', 'json'),
+            'filters': ['sample_debug'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'django': {'level': 'INFO'},
+        'djangoapp': {'level': os.getenv('DJANGOAPP_LOG_LEVEL', 'INFO')},
+        **parse_levels(os.getenv('LOG_LEVELS', '')),
+    },
+}
+
+# Password hashing, PASSWORD_HASHER_PROFILE picks the hasher new hashes are
+# made with: 'pbkdf2' (Django's default) or 'argon2' (needs argon2-cffi).
+# The other hashers still verify existing hashes, which are upgraded at the
+# next login. Argon2 memory cost is in KiB, the defaults follow the OWASP
+# minimum (19 MiB, 2 passes, 1 lane); PBKDF2_ITERATIONS=0 keeps Django's.
+PASSWORD_HASHER_PROFILE = os.getenv('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHER_COSTS = {
+    'ARGON2_TIME_COST': int(os.getenv('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.getenv('ARGON2_MEMORY_COST', 19456)),
+    'ARGON2_PARALLELISM': int(os.getenv('ARGON2_PARALLELISM', 1)),
+    'PBKDF2_ITERATIONS': int(os.getenv('PBKDF2_ITERATIONS', 0)),
+}
+PASSWORD_HASHERS = {
+    'argon2': [
+        'djangoapp.hashers.TunedArgon2PasswordHasher',
+        'djangoapp.hashers.TunedPBKDF2PasswordHasher',
+    ],
+    'pbkdf2': [
+        'djangoapp.hashers.TunedPBKDF2PasswordHasher',
+        'djangoapp.hashers.TunedArgon2PasswordHasher',
+    ],
+}[PASSWORD_HASHER_PROFILE] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# In-memory token buckets of login_user and registration, per process, see
+# djangoapp/throttle.py. RATE is in tokens per second, BURST the bucket
+# size; USER buckets are per username and client IP. PROXY_COUNT is the
+# number of trusted reverse proxies appending to X-Forwarded-For in front
+# of the app (0 = use REMOTE_ADDR), see yaml/main-deployment.yaml.
+AUTH_THROTTLE = {
+    'USER_RATE': float(os.getenv('AUTH_THROTTLE_USER_RATE', 5 / 60)),
+    'USER_BURST': int(os.getenv('AUTH_THROTTLE_USER_BURST', 10)),
+    'IP_RATE': float(os.getenv('AUTH_THROTTLE_IP_RATE', 1)),
+    'IP_BURST': int(os.getenv('AUTH_THROTTLE_IP_BURST', 30)),
+    'MAX_KEYS': int(os.getenv('AUTH_THROTTLE_MAX_KEYS', 100000)),
+    'PROXY_COUNT': int(os.getenv('AUTH_THROTTLE_PROXY_COUNT', 0)),
 }
 
 AUTH_PASSWORD_VALIDATORS = [
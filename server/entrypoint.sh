@@ -4,5 +4,19 @@
 echo "Making migrations and migrating the database. "
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
+# Seed the car catalog, safe to re-run on every start
+python manage.py load_catalog
 python manage.py collectstatic --noinput
+# Optionally fill the shared caches before serving, see warm_caches
+if [ "$WARM_CACHES_ON_START" = "true" ]; then
+    python manage.py warm_caches || echo "Cache warming failed, starting cold."
+fi
+# Recount the review statistics once the backend answers, before serving:
+# reviews posted while a rebuild runs would be lost from the counters.
+# REVIEW_STATS_WAIT bounds the wait for a backend still starting.
+if [ "${REBUILD_REVIEW_STATS_ON_START:-true}" = "true" ]; then
+    python manage.py rebuild_review_stats \
+        --wait "${REVIEW_STATS_WAIT:-120}" \
+        || echo "Review statistics rebuild failed, run rebuild_review_stats."
+fi
 exec "$@"
\ No newline at end of file